@@ -0,0 +1,80 @@
+"""
+Compare evaluating one expression over a table of inputs row at a time with
+`Interpreter` against a single NumPy batch evaluation. Requires NumPy.
+
+The mixed table replaces one value in a hundred of a column with a string,
+which forces the batch evaluator to fall back to per-row evaluation for the
+nodes that column flows into.
+
+Usage: python benchmarks/batch_evaluation.py [rows]
+"""
+
+import random
+import sys
+import time
+
+import numpy as np
+
+from plox.interpreter import Interpreter
+from plox.parser import Parser
+from plox.scanner import FastScanner
+from plox.vectorized import evaluate_batch
+
+SOURCE = "(x * 2 + y) / (x - y) > z == !flag"
+
+
+def make_table(rows: int, mixed: bool) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(0)
+    table: dict[str, np.ndarray] = {
+        "x": rng.integers(-5, 5, rows).astype(np.float64),
+        "y": rng.integers(-5, 5, rows).astype(np.float64),
+        "z": rng.normal(size=rows),
+        "flag": rng.random(rows) < 0.5,
+    }
+    if mixed:
+        z = table["z"].astype(object)
+        for index in random.Random(0).sample(range(rows), rows // 100):
+            z[index] = "z"
+        table["z"] = z
+    return table
+
+
+def row_at_a_time(interpreter: Interpreter, expr, table) -> list[object]:
+    names = list(table)
+    columns = [table[name].tolist() for name in names]
+    values = []
+    for row in zip(*columns):
+        interpreter.environment = dict(zip(names, row))
+        try:
+            values.append(interpreter.evaluate(expr))
+        except Exception as e:
+            values.append(e)
+    return values
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    expr = Parser(FastScanner(SOURCE).tokens).expression()
+    print(f"{SOURCE}  over {rows:,} rows")
+
+    for name, mixed in (("numbers", False), ("mixed", True)):
+        table = make_table(rows, mixed)
+        start = time.perf_counter()
+        row_at_a_time(Interpreter(), expr, table)
+        loop = time.perf_counter() - start
+
+        start = time.perf_counter()
+        try:
+            evaluate_batch(expr, table)
+        except Exception:
+            # mixed rows raise, as they do in the loop
+            pass
+        batch = time.perf_counter() - start
+        print(
+            f"{name:>8}: row at a time {loop:.3f}s, batch {batch:.3f}s "
+            f"({loop / batch:.0f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
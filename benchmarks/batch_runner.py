@@ -0,0 +1,54 @@
+"""
+Compare running a directory of small scripts with one `plox` process per
+script against a single `plox --jobs N` batch.
+
+Usage: python benchmarks/batch_runner.py [scripts] [jobs] [depth]
+"""
+
+import io
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+from engine_throughput import generate_expression
+
+from plox.batch import run_batch
+from plox.main import RunOptions
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    jobs = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    depth = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for index in range(count):
+            path = Path(directory) / f"script{index:05}.lox"
+            path.write_text(generate_expression(rng, depth), encoding="utf-8")
+        print(f"{count} scripts, {jobs} jobs")
+
+        start = time.perf_counter()
+        for path in sorted(Path(directory).glob("*.lox")):
+            subprocess.run(
+                [sys.executable, "-m", "plox.main", "--no-cache", str(path)],
+                stdout=subprocess.DEVNULL,
+            )
+        elapsed = time.perf_counter() - start
+        print(f"   processes: {elapsed:.3f}s ({count / elapsed:,.0f} scripts/sec)")
+
+        for name, workers in (("batch", 1), (f"batch -j{jobs}", jobs)):
+            start = time.perf_counter()
+            with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+                run_batch([directory], jobs=workers, options=RunOptions(cache=False))
+            elapsed = time.perf_counter() - start
+            print(f"{name:>12}: {elapsed:.3f}s ({count / elapsed:,.0f} scripts/sec)")
+
+
+if __name__ == "__main__":
+    main()
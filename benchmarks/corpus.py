@@ -0,0 +1,157 @@
+"""
+Generate a seeded corpus of Lox expression programs for benchmarking.
+
+Every program is a single expression that evaluates without runtime
+errors: strings are only concatenated and compared for equality, and
+arithmetic and ordering only ever see numbers. The shape of the corpus is
+set by a `CorpusSpec`: the number of programs, the nesting depth, the mix
+of operators and the share of strings among the operands.
+
+Usage: python benchmarks/corpus.py DIRECTORY [--programs N] [--depth N] ...
+writes the corpus as one `.lox` file per program.
+"""
+
+import argparse
+import random
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+
+NUMBERS = ["0.5", "1", "2", "2.5", "3", "10", "42", "1234.5"]
+STRINGS = ['"a"', '"lox"', '"hello"', '"plox"', '"some longer string"']
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    """The parameters of a corpus; the same spec always yields the same corpus."""
+
+    programs: int = 1000
+    # Maximum nesting depth of the expression of each program.
+    depth: int = 6
+    # Probability that a node above the leaves is a leaf anyway, which makes
+    # trees ragged rather than complete.
+    leaf_ratio: float = 0.1
+    # Share of operands of `+`, `==`, `!=` and of whole programs that are
+    # strings rather than numbers.
+    string_ratio: float = 0.2
+    # Relative weights of the operator classes.
+    arithmetic: float = 4.0
+    comparison: float = 1.0
+    equality: float = 1.0
+    unary: float = 1.0
+    # Probability that a binary expression is parenthesized.
+    grouping: float = 0.3
+    seed: int = 0
+
+    def to_dict(self) -> dict[str, object]:
+        return asdict(self)
+
+
+class CorpusGenerator:
+    """Builds the programs of a `CorpusSpec`."""
+
+    def __init__(self, spec: CorpusSpec) -> None:
+        self.spec = spec
+        self.rng = random.Random(spec.seed)
+
+    def programs(self) -> list[str]:
+        return [self.program() for _ in range(self.spec.programs)]
+
+    def program(self) -> str:
+        spec = self.spec
+        rng = self.rng
+        if rng.random() < spec.string_ratio:
+            kind = "string"
+        else:
+            boolean = spec.comparison + spec.equality
+            kind = (
+                "boolean"
+                if rng.random() * (spec.arithmetic + boolean) < boolean
+                else "number"
+            )
+        return self.expression(kind, spec.depth)
+
+    def operand(self) -> str:
+        return "string" if self.rng.random() < self.spec.string_ratio else "number"
+
+    def expression(self, kind: str, depth: int) -> str:
+        spec = self.spec
+        rng = self.rng
+        if depth == 0 or rng.random() < spec.leaf_ratio:
+            return self.leaf(kind)
+        depth -= 1
+        match kind:
+            case "string":
+                return self.binary("+", "string", "string", depth)
+            case "number":
+                if rng.random() * (spec.arithmetic + spec.unary) < spec.unary:
+                    return self.unary("-", "number", depth)
+                return self.binary(rng.choice("+-*/"), "number", "number", depth)
+        choice = rng.random() * (spec.comparison + spec.equality + spec.unary)
+        if choice < spec.unary:
+            return self.unary("!", "boolean", depth)
+        if choice < spec.unary + spec.comparison:
+            operator = rng.choice(["<", "<=", ">", ">="])
+            return self.binary(operator, "number", "number", depth)
+        operand = self.operand()
+        return self.binary(rng.choice(["==", "!="]), operand, operand, depth)
+
+    def unary(self, operator: str, kind: str, depth: int) -> str:
+        operand = self.expression(kind, depth)
+        if " " in operand:
+            # a binary operand binds looser than the unary operator
+            return f"{operator}({operand})"
+        return operator + operand
+
+    def binary(self, operator: str, left: str, right: str, depth: int) -> str:
+        source = (
+            f"{self.expression(left, depth)} {operator} "
+            f"{self.expression(right, depth)}"
+        )
+        if self.rng.random() < self.spec.grouping:
+            return f"({source})"
+        return source
+
+    def leaf(self, kind: str) -> str:
+        match kind:
+            case "string":
+                return self.rng.choice(STRINGS)
+            case "number":
+                return self.rng.choice(NUMBERS)
+        return self.rng.choice(["true", "false"])
+
+
+def generate_corpus(spec: CorpusSpec) -> list[str]:
+    return CorpusGenerator(spec).programs()
+
+
+def add_spec_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add an option for every field of `CorpusSpec` to `parser`."""
+    for field in fields(CorpusSpec):
+        parser.add_argument(
+            "--" + field.name.replace("_", "-"),
+            dest=field.name,
+            type=type(field.default),
+            default=field.default,
+            help=f"(default: {field.default})",
+        )
+
+
+def spec_from_arguments(args: argparse.Namespace) -> CorpusSpec:
+    return CorpusSpec(
+        **{field.name: getattr(args, field.name) for field in fields(CorpusSpec)}
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("directory", type=Path)
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+    args.directory.mkdir(parents=True, exist_ok=True)
+    for index, source in enumerate(generate_corpus(spec_from_arguments(args))):
+        path = args.directory / f"program{index:06}.lox"
+        path.write_text(source, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Compare evaluation throughput of the execution engines in nodes/sec.
+
+Every expression is evaluated `repeat` times after being prepared once.
+
+Usage: python benchmarks/engine_throughput.py [expressions] [depth] [repeat]
+"""
+
+import random
+import sys
+import time
+from typing import Callable
+
+from plox.codegen import CodeGenerator
+from plox.expression import BinaryExpr, Expr, GroupingExpr, UnaryExpr
+from plox.interpreter import Interpreter, IterativeInterpreter
+from plox.parser import Parser
+from plox.quickening import QuickeningInterpreter
+from plox.scanner import FastScanner
+from plox.typecheck import TypeChecker
+from plox.vm import VM, Compiler
+
+
+def generate_expression(rng: random.Random, depth: int) -> str:
+    """Build a random numeric expression that evaluates without errors."""
+    if depth == 0:
+        return rng.choice(["1", "2.5", "3", "0.5", "42"])
+    if rng.random() < 0.1:
+        return "-" + generate_expression(rng, depth - 1)
+    operator = rng.choice(["+", "-", "*", "/", "+", "-"])
+    left = generate_expression(rng, depth - 1)
+    right = generate_expression(rng, depth - 1)
+    if rng.random() < 0.3:
+        return f"({left} {operator} {right})"
+    return f"{left} {operator} {right}"
+
+
+def count_nodes(expr: Expr) -> int:
+    if isinstance(expr, BinaryExpr):
+        return 1 + count_nodes(expr.left) + count_nodes(expr.right)
+    if isinstance(expr, UnaryExpr):
+        return 1 + count_nodes(expr.right)
+    if isinstance(expr, GroupingExpr):
+        return 1 + count_nodes(expr.expression)
+    return 1
+
+
+def engines() -> dict[str, Callable[[Expr], Callable[[], object]]]:
+    """Map engine names to a preparation step returning the evaluation step."""
+
+    def tree(expr: Expr) -> Callable[[], object]:
+        interpreter = Interpreter()
+        return lambda: interpreter.evaluate(expr)
+
+    def typed(expr: Expr) -> Callable[[], object]:
+        interpreter = Interpreter()
+        checked = TypeChecker().check(expr)
+        return lambda: interpreter.evaluate(checked)
+
+    def vm(expr: Expr) -> Callable[[], object]:
+        machine = VM()
+        chunk = Compiler().compile(expr)
+        return lambda: machine.run(chunk)
+
+    def python(expr: Expr) -> Callable[[], object]:
+        return CodeGenerator().compile(expr)
+
+    def quickening(expr: Expr) -> Callable[[], object]:
+        interpreter = QuickeningInterpreter()
+        quickened = interpreter.quicken(expr)
+        return lambda: interpreter.evaluate(quickened)
+
+    def iterative(expr: Expr) -> Callable[[], object]:
+        interpreter = IterativeInterpreter()
+        return lambda: interpreter.evaluate(expr)
+
+    return {
+        "tree": tree,
+        "typed": typed,
+        "vm": vm,
+        "python": python,
+        "quickening": quickening,
+        "iterative": iterative,
+    }
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    depth = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    rng = random.Random(0)
+    exprs = [
+        Parser(FastScanner(generate_expression(rng, depth)).tokens).parse()
+        for _ in range(count)
+    ]
+    nodes = sum(count_nodes(expr) for expr in exprs) * repeat
+    print(f"{count} expressions evaluated {repeat} times, {nodes} nodes")
+
+    for name, prepare in engines().items():
+        start = time.perf_counter()
+        steps = [prepare(expr) for expr in exprs]
+        prepared = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for step in steps:
+            for _ in range(repeat):
+                step()
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:>8}: prepare {prepared:.3f}s, evaluate {elapsed:.3f}s "
+            f"({nodes / elapsed:,.0f} nodes/sec)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Measure what hash-consing saves on a repetitive workload: node count, the
+memory held by the trees, and evaluation time with a per-evaluation memo.
+
+Every expression sums more random subexpressions than there are in the pool
+they are drawn from, so the same subtrees occur over and over, both across
+expressions and within each one, as in generated workloads.
+
+Usage: python benchmarks/hash_consing.py [expressions] [pool] [depth]
+"""
+
+import io
+import random
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+from engine_throughput import count_nodes, generate_expression
+
+from plox.expression import Expr
+from plox.hashcons import Interner, MemoizingInterpreter
+from plox.interpreter import Interpreter
+from plox.parser import Parser
+from plox.scanner import FastScanner
+
+
+def generate_workload(count: int, pool: int, depth: int) -> list[str]:
+    rng = random.Random(0)
+    parts = [f"({generate_expression(rng, depth)})" for _ in range(pool)]
+    return [
+        " + ".join(rng.choice(parts) for _ in range(rng.randint(pool, 2 * pool)))
+        for _ in range(count)
+    ]
+
+
+def parse_all(sources: list[str]) -> tuple[list[Expr], int]:
+    """Parse every source, returning the trees and the bytes they hold."""
+    tracemalloc.start()
+    exprs = [Parser(FastScanner(source).tokens).parse() for source in sources]
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return exprs, held
+
+
+def intern_all(sources: list[str]) -> tuple[list[Expr], Interner, int]:
+    """Parse and intern every source, returning the bytes the shared trees hold."""
+    tracemalloc.start()
+    interner = Interner()
+    exprs = [
+        interner.intern(Parser(FastScanner(source).tokens).parse())
+        for source in sources
+    ]
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return exprs, interner, held
+
+
+def time_interpret(interpreter: Interpreter, exprs: list[Expr]) -> float:
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        for expr in exprs:
+            interpreter.interpret(expr)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    pool = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    depth = int(sys.argv[3]) if len(sys.argv) > 3 else 6
+    sources = generate_workload(count, pool, depth)
+
+    trees, tree_bytes = parse_all(sources)
+    shared, interner, shared_bytes = intern_all(sources)
+    nodes = sum(count_nodes(expr) for expr in trees)
+    print(f"{count} expressions from a pool of {pool} subexpressions")
+    print(f"   nodes: {nodes:,} in trees, {len(interner.table):,} hash-consed")
+    print(f"  memory: {tree_bytes:,} bytes in trees, {shared_bytes:,} hash-consed")
+
+    tree = time_interpret(Interpreter(), trees)
+    memo = time_interpret(MemoizingInterpreter(interner), shared)
+    print(f"    tree: {tree:.3f}s ({nodes / tree:,.0f} nodes/sec)")
+    print(f"    memo: {memo:.3f}s ({nodes / memo:,.0f} nodes/sec)")
+
+
+if __name__ == "__main__":
+    main()
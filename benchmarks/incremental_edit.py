@@ -0,0 +1,77 @@
+"""
+Compare the time to bring the tokens and tree of an edited source up to date
+by re-lexing and reparsing all of it with that of a `plox.incremental.Document`,
+over sources of growing size.
+
+Every source is a balanced sum of generated programs (see `corpus.py`), each
+in parentheses, so it nests deeper as it grows. Edits are made around a
+cursor that wanders through the first half of the source, as when typing:
+they replace a digit with another, within a line, or add a newline before
+an operator, which moves every following token to another line.
+
+Usage: python benchmarks/incremental_edit.py [edits]
+"""
+
+import random
+import re
+import sys
+import time
+
+from corpus import CorpusSpec, generate_corpus
+
+from plox.incremental import Document
+from plox.parser import Parser
+from plox.scanner import FastScanner
+
+# Numbers of programs in the measured sources.
+SIZES = (100, 1000, 10000)
+
+# Largest distance, in characters, between successive edits.
+CURSOR_STEP = 500
+
+DIGIT = re.compile(r"[0-9]")
+
+
+def balanced_sum(programs: list[str]) -> str:
+    if len(programs) == 1:
+        return f"({programs[0]})"
+    middle = len(programs) // 2
+    return f"({balanced_sum(programs[:middle])}\n+ {balanced_sum(programs[middle:])})"
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rng = random.Random(0)
+    for size in SIZES:
+        source = balanced_sum(generate_corpus(CorpusSpec(programs=size, depth=4)))
+        start = time.perf_counter()
+        Parser(FastScanner(source).tokens).parse()
+        full = time.perf_counter() - start
+
+        document = Document(source)
+        cursor = len(source) // 4
+        for kind in ("digit", "newline"):
+            elapsed = 0.0
+            for _ in range(count):
+                text = document.source
+                # the sum always has digits and `+` in its second half
+                cursor += rng.randint(-CURSOR_STEP, CURSOR_STEP)
+                position = cursor = min(max(cursor, 0), len(text) // 2)
+                if kind == "digit":
+                    match = DIGIT.search(text, position)
+                    assert match is not None
+                    edit = (match.start(), 1, rng.choice("123456789"))
+                else:
+                    edit = (text.index("+", position), 0, "\n")
+                start = time.perf_counter()
+                document.edit(*edit)
+                elapsed += time.perf_counter() - start
+            print(
+                f"{len(source) / 1024:8,.0f} KiB {kind:>8} edit: "
+                f"{elapsed / count * 1e6:9,.1f} us incremental, "
+                f"{full * 1e6:11,.1f} us full ({full * count / elapsed:,.0f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Compare how running independent programs scales with the number of workers
+on each kind of executor of `plox.executor`: threads, subinterpreters and
+processes. Threads only scale on a free-threaded build of Python, and
+subinterpreters need Python 3.14; unavailable executors are skipped.
+
+Usage: python benchmarks/parallel_executor.py [programs] [max workers] [depth]
+"""
+
+import os
+import random
+import sys
+import time
+
+from engine_throughput import generate_expression
+
+from plox.executor import EXECUTORS, gil_enabled, run_programs
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    depth = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    rng = random.Random(0)
+    sources = [generate_expression(rng, depth) for _ in range(count)]
+    workers = [1]
+    while workers[-1] * 2 <= max_workers:
+        workers.append(workers[-1] * 2)
+    print(
+        f"{count} programs, Python {sys.version.split()[0]}, "
+        f"GIL {'enabled' if gil_enabled() else 'disabled'}"
+    )
+
+    for kind in EXECUTORS:
+        baseline = None
+        for n in workers:
+            start = time.perf_counter()
+            try:
+                run_programs(sources, kind, n)
+            except ValueError as e:
+                print(f"{kind:>12}: skipped, {e}")
+                break
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(
+                f"{kind:>12} x{n:<3}: {elapsed:.3f}s "
+                f"({count / elapsed:,.0f} programs/sec, {baseline / elapsed:.2f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Find the crossover point between sequential (`CompactScanner`) and parallel
+(`ParallelScanner`) lexing for growing source sizes.
+
+Usage: python benchmarks/parallel_scan.py [workers] [max_size_in_mib]
+"""
+
+import os
+import sys
+import time
+
+from scanner_throughput import generate_source
+
+from plox.scanner import CompactScanner, ParallelScanner
+
+
+def best_of(repeat: int, func) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 1
+    max_size = int(sys.argv[2]) * 1024 * 1024 if len(sys.argv) > 2 else 32 << 20
+    print(f"workers: {workers}")
+
+    crossover = None
+    size = 256 * 1024
+    while size <= max_size:
+        source = generate_source(size)
+        sequential = best_of(3, lambda: CompactScanner(source))
+        parallel = best_of(
+            3, lambda: ParallelScanner(source, workers=workers, threshold=0)
+        )
+        if crossover is None and parallel < sequential:
+            crossover = size
+        print(
+            f"{size // 1024:>8} KiB: sequential {sequential:.3f}s, "
+            f"parallel {parallel:.3f}s ({sequential / parallel:.2f}x)"
+        )
+        size *= 2
+
+    if crossover is None:
+        print("parallel lexing never won; keep the sequential scanner")
+    else:
+        print(f"crossover at about {crossover // 1024} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Compare parse throughput of the recursive-descent `Parser` and the iterative
+`PrattParser` in tokens/sec, and the nesting depth each can handle.
+
+Usage: python benchmarks/parser_throughput.py [size_in_kib] [repeat]
+"""
+
+import sys
+import time
+
+from scanner_throughput import generate_source
+
+from plox.parser import Parser, PrattParser
+from plox.scanner import FastScanner
+
+
+def bench(parser_cls: type, tokens: list, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parser_cls(tokens).parse()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def max_depth(parser_cls: type, limit: int = 1 << 20) -> int:
+    """Return the deepest parenthesized literal `parser_cls` parses, up to `limit`."""
+    depth = 1
+    while depth <= limit:
+        tokens = FastScanner("(" * depth + "1" + ")" * depth).tokens
+        try:
+            parser_cls(tokens).parse()
+        except RecursionError:
+            return depth // 2
+        depth *= 2
+    return limit
+
+
+def main() -> None:
+    size = int(sys.argv[1]) * 1024 if len(sys.argv) > 1 else 1024 * 1024
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    tokens = FastScanner(generate_source(size, identifiers=False)).tokens
+
+    for parser_cls in (Parser, PrattParser):
+        elapsed = bench(parser_cls, tokens, repeat)
+        print(
+            f"{parser_cls.__name__:>12}: {len(tokens) / elapsed:,.0f} tokens/sec, "
+            f"max nesting depth >= {max_depth(parser_cls):,}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Compare running a script with a cold cache (scan, parse and store the
+`.ploxc` entry), a warm cache (load the entry) and the cache disabled.
+
+Usage: python benchmarks/program_cache.py [depth] [repeat]
+"""
+
+import io
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from engine_throughput import generate_expression
+
+from plox.cache import CACHE_DIRECTORY
+from plox.main import RunOptions, run_file
+
+
+def time_run(path: Path, options: RunOptions, cold: bool) -> float:
+    if cold:
+        shutil.rmtree(path.parent / CACHE_DIRECTORY, ignore_errors=True)
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        run_file(str(path), options=options)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 14
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    source = generate_expression(random.Random(0), depth)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "program.lox"
+        path.write_text(source, encoding="utf-8")
+        print(f"{len(source):,} characters, median of {repeat} runs")
+        for name, options, cold in (
+            ("no cache", RunOptions(cache=False), False),
+            ("cold", RunOptions(), True),
+            ("warm", RunOptions(), False),
+        ):
+            times = [time_run(path, options, cold) for _ in range(repeat)]
+            print(f"{name:>8}: {statistics.median(times) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
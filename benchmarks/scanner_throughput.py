@@ -0,0 +1,59 @@
+"""
+Compare lexing throughput of `Scanner` and `FastScanner` in tokens/sec.
+
+Usage: python benchmarks/scanner_throughput.py [size_in_kib] [repeat]
+"""
+
+import random
+import sys
+import time
+
+from plox.scanner import FastScanner, Scanner
+
+
+def generate_source(size: int, seed: int = 0, identifiers: bool = True) -> str:
+    """Build a pseudo-random Lox expression source of roughly `size` chars."""
+    rng = random.Random(seed)
+    atoms = ["12.5", "3", '"some string"', "true", "false", "nil"]
+    if identifiers:
+        atoms.append("ident")
+    operators = [" + ", " - ", " * ", " / ", " == ", " != ", " < ", " >= "]
+    parts: list[str] = []
+    length = 0
+    while length < size:
+        part = rng.choice(atoms) + rng.choice(operators)
+        if rng.random() < 0.05:
+            part += "// a trailing comment\n"
+        elif rng.random() < 0.1:
+            part += "\n"
+        parts.append(part)
+        length += len(part)
+    parts.append("0")
+    return "".join(parts)
+
+
+def bench(scanner_cls: type, source: str, repeat: int) -> tuple[int, float]:
+    best = float("inf")
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = len(scanner_cls(source).tokens)
+        best = min(best, time.perf_counter() - start)
+    return count, best
+
+
+def main() -> None:
+    size = int(sys.argv[1]) * 1024 if len(sys.argv) > 1 else 1024 * 1024
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    source = generate_source(size)
+
+    for scanner_cls in (Scanner, FastScanner):
+        count, elapsed = bench(scanner_cls, source, repeat)
+        print(
+            f"{scanner_cls.__name__:>12}: {count} tokens in {elapsed:.3f}s "
+            f"({count / elapsed:,.0f} tokens/sec)"
+        )
+
+
+if __name__ == "__main__":
+    main()
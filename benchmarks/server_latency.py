@@ -0,0 +1,93 @@
+"""
+Compare the latency of evaluating one expression by starting `plox` on a
+script with that of a request to a running `plox --serve`, and the
+throughput of the server when requests are pipelined.
+
+Usage: python benchmarks/server_latency.py [requests] [workers] [depth]
+"""
+
+import json
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from engine_throughput import generate_expression
+
+# Number of `plox` processes started for the per-process latency.
+PROCESS_RUNS = 20
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    workers = sys.argv[2] if len(sys.argv) > 2 else "1"
+    depth = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    rng = random.Random(0)
+    sources = [generate_expression(rng, depth) for _ in range(count)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "script.lox"
+        times = []
+        for source in sources[:PROCESS_RUNS]:
+            path.write_text(source, encoding="utf-8")
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, "-m", "plox.main", "--no-cache", str(path)],
+                stdout=subprocess.DEVNULL,
+            )
+            times.append(time.perf_counter() - start)
+    print(f"   process per script: {statistics.median(times) * 1000:8.2f} ms median")
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "plox.main", "--serve", "--jobs", workers],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+    )
+    assert server.stdin is not None and server.stdout is not None
+
+    def request(body: dict[str, object]) -> None:
+        server.stdin.write(json.dumps(body).encode("utf-8") + b"\n")
+
+    times = []
+    for index, source in enumerate(sources):
+        start = time.perf_counter()
+        request({"id": index, "source": source})
+        server.stdin.flush()
+        server.stdout.readline()
+        times.append(time.perf_counter() - start)
+    print(f"  one request at once: {statistics.median(times) * 1000:8.2f} ms median")
+
+    def send_all() -> None:
+        for index, source in enumerate(sources):
+            request({"id": index, "source": source})
+        server.stdin.flush()
+
+    # requests are written on a thread: with the server's backpressure, a
+    # client that writes everything before reading would deadlock
+    start = time.perf_counter()
+    sender = threading.Thread(target=send_all)
+    sender.start()
+    for _ in sources:
+        server.stdout.readline()
+    sender.join()
+    elapsed = time.perf_counter() - start
+    print(f"  pipelined requests: {count / elapsed:9,.0f} requests/sec")
+
+    request({"id": "stats", "stats": True})
+    server.stdin.close()
+    stats = json.loads(server.stdout.readline())["stats"]
+    server.wait()
+    print(
+        "      server latency: "
+        + ", ".join(
+            f"{name} {value:.2f} ms" for name, value in stats["latency_ms"].items()
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
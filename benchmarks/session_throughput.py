@@ -0,0 +1,54 @@
+"""
+Compare evaluating a batch of expressions one `plox.main.run` call at a
+time with a single `Session.evaluate_many` call, on a batch in which many
+expressions repeat.
+
+Usage: python benchmarks/session_throughput.py [expressions] [distinct] [depth]
+"""
+
+import io
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+
+from engine_throughput import generate_expression
+
+from plox.main import run
+from plox.session import Session
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    distinct = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    depth = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    rng = random.Random(0)
+    pool = [generate_expression(rng, depth) for _ in range(distinct)]
+    sources = [rng.choice(pool) for _ in range(count)]
+    print(f"{count} expressions, {distinct} distinct")
+
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        for source in sources:
+            run(source)
+    elapsed = time.perf_counter() - start
+    print(f"           run: {elapsed:.3f}s ({count / elapsed:,.0f} expressions/sec)")
+
+    for engine in ("tree", "vm", "python"):
+        session = Session(engine=engine)
+        start = time.perf_counter()
+        session.evaluate_many(sources)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{'session ' + engine:>14}: {elapsed:.3f}s "
+            f"({count / elapsed:,.0f} expressions/sec)"
+        )
+    for name, stats in session.stats().items():
+        print(
+            f"{name:>14}: {stats.hits} hits, {stats.misses} misses, "
+            f"{stats.evictions} evictions"
+        )
+
+
+if __name__ == "__main__":
+    main()
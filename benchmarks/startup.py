@@ -0,0 +1,170 @@
+"""
+Measure the cold start of the `plox` command line on a one-line script:
+the time to its result, and the modules it imports, as reported by
+`python -X importtime`.
+
+The command line is measured as the `plox` script runs it (`from plox.main
+import main; main()`), in three cases: with `--no-cache`; by default, once
+the cache entry of the script exists, as on every run but the first; and by
+default on a first run, which also stores the entry.
+
+Target: in each case, `plox` takes at most 75 ms more than starting the
+Python interpreter alone (`python -c pass`), and imports none of the
+modules that only some engines and modes need (`SLOW_PATH`), except that a
+first run may import what storing the entry needs (`STORE_PATH`). Most
+invocations run tiny scripts, so this overhead is most of their cost.
+
+Usage: python benchmarks/startup.py [--runs N] [--target-ms MS] [--top N]
+
+Exits with status 1 if the target is missed, so it can gate a CI job.
+"""
+
+import argparse
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+# Modules a plain run of a script must not import.
+SLOW_PATH = (
+    "asyncio",
+    "concurrent.futures",
+    "multiprocessing",
+    "tempfile",
+    "tracemalloc",
+    "plox.batch",
+    "plox.codegen",
+    "plox.hashcons",
+    "plox.memstats",
+    "plox.profiler",
+    "plox.quickening",
+    "plox.server",
+    "plox.session",
+    "plox.typecheck",
+    "plox.vm",
+)
+
+# Modules of SLOW_PATH a run that stores a cache entry may import.
+STORE_PATH: tuple[str, ...] = ()
+
+# What the `plox` console script runs.
+PLOX = [sys.executable, "-c", "from plox.main import main; main()"]
+
+
+def wall_time(
+    command: list[str], runs: int, before: Callable[[], None] | None = None
+) -> float:
+    """
+    The median wall time of `runs` runs of `command`, in seconds, calling
+    `before` (untimed) ahead of each run.
+    """
+    times = []
+    for _ in range(runs):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def import_times(command: list[str]) -> dict[str, tuple[int, int]]:
+    """
+    The modules imported by `command`, with their own and cumulative import
+    times in microseconds, from the report of `-X importtime`.
+    """
+    result = subprocess.run(
+        [command[0], "-X", "importtime", *command[1:]],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n\n")[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument(
+        "--target-ms",
+        type=float,
+        default=75.0,
+        help="largest accepted overhead over `python -c pass` (default: 75)",
+    )
+    parser.add_argument(
+        "--top", type=int, default=10, help="number of slowest imports listed"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        script = Path(directory) / "script.lox"
+        script.write_text("1 + 2\n", encoding="utf-8")
+
+        def clear_cache() -> None:
+            shutil.rmtree(Path(directory) / "__ploxcache__", ignore_errors=True)
+
+        # label, command line, what to do before each run, allowed imports
+        cases = [
+            ("--no-cache", [*PLOX, "--no-cache", str(script)], None, ()),
+            ("cached", [*PLOX, str(script)], None, ()),
+            ("first run", [*PLOX, str(script)], clear_cache, STORE_PATH),
+        ]
+        python = wall_time([sys.executable, "-c", "pass"], args.runs)
+        print(f"{'python -c pass':>20}: {python * 1000:8.2f} ms median")
+        # the entry read by the cached runs
+        subprocess.run(cases[1][1], stdout=subprocess.DEVNULL, check=True)
+        missed = False
+        for label, command, before, allowed in cases:
+            total = wall_time(command, args.runs, before)
+            if before is not None:
+                before()
+            modules = import_times(command)
+            missed |= report(label, total - python, modules, allowed, args)
+    if missed:
+        sys.exit(1)
+
+
+def report(
+    label: str,
+    overhead: float,
+    modules: dict[str, tuple[int, int]],
+    allowed: tuple[str, ...],
+    args: argparse.Namespace,
+) -> bool:
+    """Print the measurements of one case, and return whether it missed."""
+    print()
+    print(
+        f"{'plox ' + label:>20}: {overhead * 1000:8.2f} ms overhead "
+        f"(target {args.target_ms} ms)"
+    )
+    imported = sum(self_us for self_us, _ in modules.values())
+    print(f"{'imports took':>20}: {imported / 1000:8.2f} ms in {len(modules)} modules")
+    print(f"{'module':<32}{'self ms':>10}{'cumulative ms':>15}")
+    for name, (self_us, cumulative_us) in sorted(
+        modules.items(), key=lambda item: item[1][0], reverse=True
+    )[: args.top]:
+        print(f"{name:<32}{self_us / 1000:>10.2f}{cumulative_us / 1000:>15.2f}")
+
+    slow = [name for name in SLOW_PATH if name in modules and name not in allowed]
+    if slow:
+        print("imported on the cold path: " + ", ".join(slow))
+    return bool(slow) or overhead * 1000 > args.target_ms
+
+
+if __name__ == "__main__":
+    main()
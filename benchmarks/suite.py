@@ -0,0 +1,201 @@
+"""
+The plox benchmark suite: measures every stage of running a generated
+corpus (see `corpus.py`) and tracks regressions against a stored baseline.
+
+Stages are measured separately, each on the output of the one before:
+
+- scanner: `Scanner` on every program, in tokens/sec
+- parser: `Parser` on the scanned tokens, in nodes/sec
+- interpreter: `Interpreter.evaluate` on the parsed trees, in nodes/sec
+- run: `plox.main.run` on every program, end to end, in nodes/sec
+
+Each stage reports the best time of `--repeat` runs, and the peak memory
+traced while it processes the whole corpus, in a separate run.
+
+Usage:
+    python benchmarks/suite.py run [--output results.json] [corpus options]
+    python benchmarks/suite.py compare baseline.json results.json [--threshold 0.05]
+
+`compare` exits with status 1 if any metric regressed by more than the
+threshold, so it can gate a CI job.
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from corpus import (
+    CorpusSpec,
+    add_spec_arguments,
+    generate_corpus,
+    spec_from_arguments,
+)
+
+import plox
+from plox.executor import captured_output
+from plox.expression import Expr
+from plox.interpreter import Interpreter
+from plox.main import run
+from plox.optimizer import count_nodes
+from plox.parser import Parser
+from plox.ptoken import PToken
+from plox.scanner import Scanner
+
+# Version of the layout of the results file.
+RESULTS_FORMAT = 1
+
+# Metrics compared by `compare`, and whether higher values are better.
+METRICS = {"per_sec": True, "peak_memory": False}
+
+
+def measure(stage: Callable[[], Any], repeat: int) -> tuple[float, int, Any]:
+    """
+    The best time of `repeat` runs of `stage`, the peak memory traced during
+    one more run, and the result of that run.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        stage()
+        best = min(best, time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    result = stage()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def run_suite(spec: CorpusSpec, repeat: int) -> dict[str, Any]:
+    sources = generate_corpus(spec)
+    results: dict[str, dict[str, Any]] = {}
+
+    def record(name: str, unit: str, count: int, seconds: float, peak: int) -> None:
+        results[name] = {
+            "seconds": seconds,
+            "unit": unit,
+            "count": count,
+            "per_sec": count / seconds,
+            "peak_memory": peak,
+        }
+        print(
+            f"{name:>12}: {seconds:.3f}s, {count / seconds:>12,.0f} {unit}/sec, "
+            f"peak {peak / 1024:,.0f} KiB"
+        )
+
+    def scan() -> list[list[PToken]]:
+        return [Scanner(source).tokens for source in sources]
+
+    seconds, peak, token_lists = measure(scan, repeat)
+    record("scanner", "tokens", sum(map(len, token_lists)), seconds, peak)
+
+    def parse() -> list[Expr]:
+        return [Parser(tokens).expression() for tokens in token_lists]
+
+    seconds, peak, exprs = measure(parse, repeat)
+    nodes = sum(map(count_nodes, exprs))
+    record("parser", "nodes", nodes, seconds, peak)
+
+    def interpret() -> None:
+        interpreter = Interpreter()
+        for expr in exprs:
+            interpreter.evaluate(expr)
+
+    seconds, peak, _ = measure(interpret, repeat)
+    record("interpreter", "nodes", nodes, seconds, peak)
+
+    def run_all() -> None:
+        with captured_output():
+            for source in sources:
+                run(source)
+
+    seconds, peak, _ = measure(run_all, repeat)
+    record("run", "nodes", nodes, seconds, peak)
+
+    return {
+        "format": RESULTS_FORMAT,
+        "plox": plox.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "corpus": spec.to_dict(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(
+    baseline: dict[str, Any], current: dict[str, Any], threshold: float
+) -> bool:
+    """Print how `current` differs from `baseline`; return whether it regressed."""
+    if baseline["corpus"] != current["corpus"]:
+        print("warning: the results were measured on different corpora")
+    regressed = False
+    for name, before in baseline["results"].items():
+        after = current["results"].get(name)
+        if after is None:
+            print(f"{name:>12}: missing from the current results")
+            continue
+        for metric, higher_is_better in METRICS.items():
+            change = after[metric] / before[metric] - 1
+            worse = -change if higher_is_better else change
+            flag = ""
+            if worse > threshold:
+                flag = "  REGRESSION"
+                regressed = True
+            elif -worse > threshold:
+                flag = "  improvement"
+            print(
+                f"{name:>12} {metric:>11}: {before[metric]:>14,.0f} -> "
+                f"{after[metric]:>14,.0f} ({change:+.1%}){flag}"
+            )
+    return regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="The plox benchmark suite.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the suite")
+    run_parser.add_argument("--output", help="write the results as JSON to this file")
+    run_parser.add_argument("--repeat", type=int, default=3)
+    add_spec_arguments(run_parser)
+    compare_parser = commands.add_parser(
+        "compare", help="compare results against a baseline"
+    )
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.05,
+        help="relative change counted as a regression (default: 0.05)",
+    )
+    args = parser.parse_args()
+
+    if args.command == "run":
+        results = run_suite(spec_from_arguments(args), args.repeat)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as file:
+                json.dump(results, file, indent=2)
+                file.write("\n")
+        return
+
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+    with open(args.current, encoding="utf-8") as file:
+        current = json.load(file)
+    if compare(baseline, current, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Compare memory per token and scan+parse time of `PToken` lists (`FastScanner`)
+against the struct-of-arrays `TokenBuffer` (`CompactScanner`).
+
+Usage: python benchmarks/token_memory.py [size_in_kib]
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+
+from scanner_throughput import generate_source
+
+from plox.parser import CompactParser, Parser
+from plox.scanner import CompactScanner, FastScanner
+
+
+def measure_memory(scanner_cls: type, source: str) -> tuple[int, int]:
+    """Return the token count and the bytes retained by the scanned tokens."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tokens = scanner_cls(source).tokens
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return len(tokens), retained
+
+
+def measure_time(scanner_cls: type, parser_cls: type, source: str) -> float:
+    """Return the best-of-three wall time to scan and parse `source`."""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        parser_cls(scanner_cls(source).tokens).parse()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    size = int(sys.argv[1]) * 1024 if len(sys.argv) > 1 else 1024 * 1024
+    source = generate_source(size, identifiers=False)
+
+    for scanner_cls, parser_cls in (
+        (FastScanner, Parser),
+        (CompactScanner, CompactParser),
+    ):
+        count, retained = measure_memory(scanner_cls, source)
+        elapsed = measure_time(scanner_cls, parser_cls, source)
+        print(
+            f"{scanner_cls.__name__:>14}: {count} tokens, "
+            f"{retained / count:.1f} bytes/token, "
+            f"scan+parse {elapsed:.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Measure the per-node cost of visitor dispatch.
+
+A node-counting pass is written twice: once on `functools.singledispatchmethod`
+(how the visitors used to dispatch) and once on the table-driven `Visitor`.
+The passes do no other work, so the difference is the dispatch overhead.
+
+Usage: python benchmarks/visitor_dispatch.py [expressions] [depth] [repeat]
+"""
+
+import random
+import sys
+import time
+from functools import singledispatchmethod
+
+from engine_throughput import count_nodes, generate_expression
+
+from plox.expression import (
+    BinaryExpr,
+    Expr,
+    GroupingExpr,
+    LiteralExpr,
+    UnaryExpr,
+    Visitor,
+    visits,
+)
+from plox.parser import Parser
+from plox.scanner import FastScanner
+
+
+class SingleDispatchCounter:
+    @singledispatchmethod
+    def visit(self, expr: Expr) -> int:
+        raise NotImplementedError
+
+    @visit.register
+    def _(self, expr: LiteralExpr) -> int:
+        return 1
+
+    @visit.register
+    def _(self, expr: GroupingExpr) -> int:
+        return 1 + self.visit(expr.expression)
+
+    @visit.register
+    def _(self, expr: UnaryExpr) -> int:
+        return 1 + self.visit(expr.right)
+
+    @visit.register
+    def _(self, expr: BinaryExpr) -> int:
+        return 1 + self.visit(expr.left) + self.visit(expr.right)
+
+
+class TableCounter(Visitor[int]):
+    @visits(LiteralExpr)
+    def visit_literal(self, expr: LiteralExpr) -> int:
+        return 1
+
+    @visits(GroupingExpr)
+    def visit_grouping(self, expr: GroupingExpr) -> int:
+        return 1 + self.visit(expr.expression)
+
+    @visits(UnaryExpr)
+    def visit_unary(self, expr: UnaryExpr) -> int:
+        return 1 + self.visit(expr.right)
+
+    @visits(BinaryExpr)
+    def visit_binary(self, expr: BinaryExpr) -> int:
+        return 1 + self.visit(expr.left) + self.visit(expr.right)
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    depth = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    rng = random.Random(0)
+    exprs = [
+        Parser(FastScanner(generate_expression(rng, depth)).tokens).parse()
+        for _ in range(count)
+    ]
+    nodes = sum(count_nodes(expr) for expr in exprs) * repeat
+    print(f"{count} expressions visited {repeat} times, {nodes} nodes")
+
+    for name, visitor in (
+        ("singledispatchmethod", SingleDispatchCounter()),
+        ("dispatch table", TableCounter()),
+    ):
+        start = time.perf_counter()
+        visited = 0
+        for _ in range(repeat):
+            for expr in exprs:
+                visited += visitor.visit(expr)
+        elapsed = time.perf_counter() - start
+        assert visited == nodes
+        print(f"{name:>20}: {elapsed:.3f}s ({elapsed / nodes * 1e9:.0f} ns/node)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Run many scripts on a pool of workers, as `plox --jobs N`.
+
+Every worker imports plox once and then runs scripts one after the other,
+so the cost of starting Python is paid once per worker instead of once per
+script. The workers are processes by default, or threads or subinterpreters
+(see `plox.executor`). The output of each script is captured in the worker
+and printed by the parent in the order the scripts were given.
+"""
+
+import glob
+import os
+import signal
+import sys
+import time
+import traceback
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+from plox import executor
+
+if TYPE_CHECKING:
+    from plox import main
+
+# Exit status of a script that ran past its timeout, as reported by timeout(1).
+TIMEOUT_STATUS: int = 124
+
+# Exit status of a script that crashed the interpreter (EX_SOFTWARE).
+INTERNAL_ERROR_STATUS: int = 70
+
+# Number of slowest scripts listed in the summary.
+SLOWEST_REPORTED: int = 5
+
+# File name pattern of the scripts found in a directory.
+SCRIPT_PATTERN: str = "*.lox"
+
+
+class ScriptTimeout(BaseException):
+    """
+    Raised in a worker when a script runs past its timeout. It derives from
+    `BaseException` so that no error handler of the interpreter catches it.
+    """
+
+
+@dataclass(frozen=True)
+class ScriptResult:
+    """The outcome of running one script."""
+
+    path: str
+    status: int
+    output: str
+    elapsed: float
+
+    @property
+    def timed_out(self) -> bool:
+        return self.status == TIMEOUT_STATUS
+
+
+def find_scripts(patterns: Iterable[str]) -> list[str]:
+    """
+    Expand directories, searched recursively for `.lox` files, and glob
+    patterns into a list of script paths, each in sorted order. Any other
+    argument is kept as is, so a missing file is reported when it is run.
+    """
+    scripts: list[str] = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            scripts.extend(
+                sorted(str(path) for path in Path(pattern).rglob(SCRIPT_PATTERN))
+            )
+        elif any(c in pattern for c in "*?["):
+            scripts.extend(sorted(glob.glob(pattern, recursive=True)))
+        else:
+            scripts.append(pattern)
+    return scripts
+
+
+def _raise_timeout(signum: int, frame: object) -> None:
+    raise ScriptTimeout
+
+
+def run_script(
+    path: str,
+    options: "main.RunOptions",
+    timeout: float | None = None,
+    stream: bool = False,
+    use_mmap: bool = False,
+) -> ScriptResult:
+    """
+    Run one script as `plox path` would, capturing what it prints and its
+    exit status: 0, 65 when it had errors, 66 when it could not be read.
+    """
+    # imported here: plox.main imports this module
+    from plox import main
+
+    status = 0
+    start = time.perf_counter()
+    with executor.captured_output() as lines:
+        try:
+            if timeout is not None:
+                signal.signal(signal.SIGALRM, _raise_timeout)
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+            if main.run_file(path, stream=stream, use_mmap=use_mmap, options=options):
+                status = 65
+        except SystemExit as e:
+            status = e.code if isinstance(e.code, int) else 1
+        except ScriptTimeout:
+            status = TIMEOUT_STATUS
+            lines.append(f"Error: '{path}' timed out after {timeout:g}s")
+        except Exception:
+            status = INTERNAL_ERROR_STATUS
+            lines.append(traceback.format_exc().rstrip("\n"))
+        finally:
+            if timeout is not None:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+    output = "".join(line + "\n" for line in lines)
+    return ScriptResult(path, status, output, time.perf_counter() - start)
+
+
+def run_scripts(
+    paths: list[str],
+    jobs: int | None = None,
+    timeout: float | None = None,
+    options: "main.RunOptions | None" = None,
+    stream: bool = False,
+    use_mmap: bool = False,
+    kind: str = "processes",
+) -> Iterator[ScriptResult]:
+    """
+    Run `paths` on `jobs` workers of `kind` (one per CPU by default) and
+    yield their results in the order of `paths`. With a single job the
+    scripts run in this process.
+
+    Timeouts rely on a timer signal, which is only delivered to the main
+    thread: they work with a single job or worker processes.
+    """
+    # imported here: plox.main imports this module
+    from plox import main
+
+    if timeout is not None:
+        if not hasattr(signal, "setitimer"):
+            raise ValueError("Script timeouts are not supported on this platform")
+        if kind != "processes" and jobs != 1:
+            raise ValueError(f"Script timeouts are not supported with {kind}")
+    jobs = jobs or os.cpu_count() or 1
+    run = partial(
+        run_script,
+        options=options or main.RunOptions(),
+        timeout=timeout,
+        stream=stream,
+        use_mmap=use_mmap,
+    )
+    if jobs == 1 or len(paths) < 2:
+        yield from map(run, paths)
+        return
+    # several scripts per task, so small scripts are not dominated by IPC
+    chunksize = max(1, min(64, len(paths) // (jobs * 4)))
+    with executor.make_executor(kind, jobs) as pool:
+        yield from pool.map(run, paths, chunksize=chunksize)
+
+
+def run_batch(
+    patterns: Iterable[str],
+    jobs: int | None = None,
+    timeout: float | None = None,
+    options: "main.RunOptions | None" = None,
+    stream: bool = False,
+    use_mmap: bool = False,
+    kind: str = "processes",
+) -> int:
+    """
+    Run every script matched by `patterns`, print their output in order and
+    a summary on stderr, and return the highest exit status of any script.
+    """
+    paths = find_scripts(patterns)
+    start = time.perf_counter()
+    results: list[ScriptResult] = []
+    for result in run_scripts(paths, jobs, timeout, options, stream, use_mmap, kind):
+        sys.stdout.write(result.output)
+        results.append(result)
+    report_batch(results, time.perf_counter() - start)
+    return max((result.status for result in results), default=0)
+
+
+def report_batch(results: list[ScriptResult], elapsed: float) -> None:
+    """Report the throughput, failures and slowest scripts of a batch on stderr."""
+    failed = sum(1 for result in results if result.status != 0)
+    timed_out = sum(1 for result in results if result.timed_out)
+    rate = len(results) / elapsed if elapsed > 0 else 0.0
+    print(
+        f"Ran {len(results)} scripts in {elapsed:.3f}s "
+        f"({rate:,.0f} scripts/sec), {failed} failed, {timed_out} timed out",
+        file=sys.stderr,
+    )
+    slowest = sorted(results, key=lambda result: result.elapsed, reverse=True)
+    for result in slowest[:SLOWEST_REPORTED]:
+        print(
+            f"  {result.elapsed * 1000:8.1f} ms  {result.path} (exit {result.status})",
+            file=sys.stderr,
+        )
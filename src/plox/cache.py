@@ -0,0 +1,189 @@
+"""
+On-disk cache of parsed programs, in the manner of `__pycache__`.
+
+The parsed (and optimized) tree of `dir/script.lox` is stored in
+`dir/__ploxcache__/script.lox[.opt-N].ploxc` as a flat post-order list of
+nodes serialized with `marshal`. An entry records the plox version and a
+hash of the source, and any mismatch makes it stale: it is ignored and
+overwritten by the next store.
+"""
+
+import marshal
+import os
+from pathlib import Path
+from typing import Any
+
+import plox
+from plox.expression import (
+    AssignExpr,
+    BinaryExpr,
+    Expr,
+    GroupingExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr,
+)
+from plox.ptoken import PToken, PTokenType, TokenLike
+
+CACHE_DIRECTORY = "__ploxcache__"
+CACHE_SUFFIX = ".ploxc"
+
+# Bumped whenever the layout of an entry changes.
+_FORMAT = b"PLOXC1"
+
+# Tags of the serialized nodes.
+_LITERAL = 0
+_GROUPING = 1
+_UNARY = 2
+_BINARY = 3
+_ASSIGN = 4
+_VARIABLE = 5
+
+
+def cache_path(path: str | os.PathLike[str], opt_level: int = 0) -> Path:
+    """The cache entry of the script at `path` run at `opt_level`."""
+    script = Path(path)
+    name = script.name
+    if opt_level:
+        name += f".opt-{opt_level}"
+    return script.parent / CACHE_DIRECTORY / (name + CACHE_SUFFIX)
+
+
+def source_hash(source: str) -> bytes:
+    # imported here, as `plox.main` imports this module even with --no-cache
+    import hashlib
+
+    return hashlib.sha256(source.encode("utf-8", "surrogatepass")).digest()
+
+
+def encode(expr: Expr) -> tuple[list[tuple[Any, ...]], list[tuple[Any, ...]]]:
+    """
+    Flatten a tree into post-order node records and a table of the tokens
+    they refer to, without recursion, so trees of any depth fit `marshal`.
+    """
+    nodes: list[tuple[Any, ...]] = []
+    tokens: list[tuple[Any, ...]] = []
+
+    def token_index(token: TokenLike) -> int:
+        tokens.append((token.type.name, token.lexeme, token.literal, token.line))
+        return len(tokens) - 1
+
+    # a 1-tuple holds a node whose children have already been emitted
+    work: list[Expr | tuple[Expr]] = [expr]
+    while work:
+        item = work.pop()
+        if isinstance(item, tuple):
+            node = item[0]
+            if isinstance(node, BinaryExpr):
+                nodes.append((_BINARY, token_index(node.operator)))
+            elif isinstance(node, UnaryExpr):
+                nodes.append((_UNARY, token_index(node.operator)))
+            elif isinstance(node, GroupingExpr):
+                nodes.append((_GROUPING,))
+            elif isinstance(node, AssignExpr):
+                nodes.append((_ASSIGN, token_index(node.name)))
+        elif isinstance(item, LiteralExpr):
+            nodes.append((_LITERAL, item.value))
+        elif isinstance(item, VariableExpr):
+            nodes.append((_VARIABLE, token_index(item.name)))
+        elif isinstance(item, BinaryExpr):
+            work.extend(((item,), item.right, item.left))
+        elif isinstance(item, UnaryExpr):
+            work.extend(((item,), item.right))
+        elif isinstance(item, GroupingExpr):
+            work.extend(((item,), item.expression))
+        elif isinstance(item, AssignExpr):
+            work.extend(((item,), item.value))
+        else:
+            raise TypeError(f"Cannot cache {type(item).__name__} nodes")
+    return nodes, tokens
+
+
+def decode(nodes: list[tuple[Any, ...]], tokens: list[tuple[Any, ...]]) -> Expr:
+    """Rebuild the tree flattened by `encode`."""
+    ptokens = [
+        PToken(type=PTokenType[name], lexeme=lexeme, literal=literal, line=line)
+        for name, lexeme, literal, line in tokens
+    ]
+    stack: list[Expr] = []
+    push = stack.append
+    pop = stack.pop
+    for record in nodes:
+        tag = record[0]
+        if tag == _LITERAL:
+            push(LiteralExpr(record[1]))
+        elif tag == _BINARY:
+            right = pop()
+            push(BinaryExpr(pop(), ptokens[record[1]], right))
+        elif tag == _UNARY:
+            push(UnaryExpr(ptokens[record[1]], pop()))
+        elif tag == _GROUPING:
+            push(GroupingExpr(pop()))
+        elif tag == _VARIABLE:
+            push(VariableExpr(ptokens[record[1]]))
+        elif tag == _ASSIGN:
+            push(AssignExpr(ptokens[record[1]], pop()))
+        else:
+            raise ValueError(f"Unknown node tag {tag!r}")
+    (expr,) = stack
+    return expr
+
+
+def load(path: Path, source: str, opt_level: int = 0) -> tuple[Expr, int] | None:
+    """
+    The cached tree of `source` and the number of nodes the optimizer
+    removed from it, or None when there is no valid entry at `path`.
+    """
+    try:
+        data = marshal.loads(path.read_bytes())
+        form, version, digest, level, removed, nodes, tokens = data
+        if (
+            form != _FORMAT
+            or version != plox.__version__
+            or level != opt_level
+            or digest != source_hash(source)
+        ):
+            return None
+        return decode(nodes, tokens), removed
+    except (OSError, EOFError, ValueError, TypeError, KeyError, IndexError):
+        return None
+
+
+def store(
+    path: Path, source: str, expr: Expr, opt_level: int = 0, removed: int = 0
+) -> bool:
+    """
+    Write the cache entry of `source` to `path` atomically: readers see
+    either the previous entry or the complete new one. Returns whether the
+    entry was written; failures (e.g. a read-only directory) are not errors.
+    """
+    nodes, tokens = encode(expr)
+    data = marshal.dumps(
+        (
+            _FORMAT,
+            plox.__version__,
+            source_hash(source),
+            opt_level,
+            removed,
+            nodes,
+            tokens,
+        )
+    )
+    # threads and processes may store the same entry at once: `data` is
+    # alive until the entry is written, so its id tells this call apart
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.{id(data)}.tmp")
+    try:
+        path.parent.mkdir(exist_ok=True)
+        # created like any other file: readable by whoever the umask allows,
+        # which mkstemp's 0600 would not be
+        fd = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+    except OSError:
+        return False
+    return True
@@ -0,0 +1,197 @@
+import math
+from typing import Callable, Mapping
+
+from plox.errors import PloxRuntimeError
+from plox.expression import (
+    BinaryExpr,
+    Expr,
+    GroupingExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr,
+    Visitor,
+    visits,
+)
+from plox.logger import error, write
+from plox.ptoken import PTokenType, TokenLike
+
+_FUNCTION_NAME = "plox_expression"
+
+# Python operators of the binary expressions that only take numbers.
+_ARITHMETIC_OPERATORS: dict[PTokenType, str] = {
+    PTokenType.MINUS: "-",
+    PTokenType.STAR: "*",
+    PTokenType.GREATER: ">",
+    PTokenType.GREATER_EQUAL: ">=",
+    PTokenType.LESS: "<",
+    PTokenType.LESS_EQUAL: "<=",
+}
+
+
+def divide_by_zero(dividend: float) -> float:
+    """Result of dividing `dividend` by zero, emulating Lox division."""
+    if dividend == 0.0:
+        return math.nan
+    return math.inf if dividend > 0 else -math.inf
+
+
+class CodeGenerator(Visitor[str]):
+    """
+    Translates an expression tree into the source of a Python function
+    computing its value, with the semantics and runtime errors of the
+    tree-walking `Interpreter`.
+
+    The function body is straight-line code: the value of every node is
+    assigned to a local named after the depth of its operand stack slot (as
+    the `VM` would push it), literals and operator tokens are bound as
+    globals, and every operand check is inlined. Variables are looked up in
+    `environment`, which the function keeps a reference to.
+    """
+
+    def __init__(self, environment: Mapping[str, object] | None = None) -> None:
+        self.environment: Mapping[str, object] = environment or {}
+
+    def generate(self, expr: Expr) -> tuple[str, dict[str, object]]:
+        """Return the function source and the globals it must run with."""
+        self.lines: list[str] = [f"def {_FUNCTION_NAME}():"]
+        self.namespace: dict[str, object] = {
+            "PloxRuntimeError": PloxRuntimeError,
+            "divide_by_zero": divide_by_zero,
+            "environment": self.environment,
+        }
+        self.depth = 0
+        result = expr.accept(self)
+        self.emit(f"return {result}")
+        return "\n".join(self.lines) + "\n", self.namespace
+
+    def compile(self, expr: Expr) -> Callable[[], object]:
+        """Compile `expr` into a Python function returning its value."""
+        source, namespace = self.generate(expr)
+        exec(compile(source, "<plox>", "exec"), namespace)
+        return namespace[_FUNCTION_NAME]  # type: ignore[return-value]
+
+    def emit(self, line: str) -> None:
+        self.lines.append("    " + line)
+
+    def bind(self, value: object) -> str:
+        """Bind `value` to a fresh global and return its name."""
+        name = f"k{len(self.namespace)}"
+        self.namespace[name] = value
+        return name
+
+    def raise_error(self, message: str, token: TokenLike) -> str:
+        return f"raise PloxRuntimeError({message!r}, {self.bind(token)})"
+
+    @visits(LiteralExpr)
+    def visit_literal(self, expr: LiteralExpr) -> str:
+        return self.bind(expr.value)
+
+    @visits(VariableExpr)
+    def visit_variable(self, expr: VariableExpr) -> str:
+        result = f"v{self.depth}"
+        name = expr.name.lexeme
+        self.emit(f"if {name!r} not in environment:")
+        self.emit("    " + self.raise_error(f"Undefined variable '{name}'.", expr.name))
+        self.emit(f"{result} = environment[{name!r}]")
+        return result
+
+    @visits(GroupingExpr)
+    def visit_grouping(self, expr: GroupingExpr) -> str:
+        return expr.expression.accept(self)
+
+    @visits(UnaryExpr)
+    def visit_unary(self, expr: UnaryExpr) -> str:
+        right = expr.right.accept(self)
+        result = f"v{self.depth}"
+
+        match expr.operator.type:
+            case PTokenType.MINUS:
+                self.emit(f"if not isinstance({right}, float):")
+                self.emit(
+                    "    " + self.raise_error("Operand must be a number", expr.operator)
+                )
+                self.emit(f"{result} = -{right}")
+            case PTokenType.BANG:
+                self.emit(f"{result} = {right} is None or {right} is False")
+            case _:
+                raise ValueError(
+                    "Invalid unary operator type parsed, "
+                    "this is an error in Plox implementation",
+                    expr.operator,
+                )
+        return result
+
+    @visits(BinaryExpr)
+    def visit_binary(self, expr: BinaryExpr) -> str:
+        left = expr.left.accept(self)
+        self.depth += 1
+        right = expr.right.accept(self)
+        self.depth -= 1
+        result = f"v{self.depth}"
+        operator_type = expr.operator.type
+
+        if operator_type == PTokenType.PLUS:
+            self.emit(
+                f"if isinstance({left}, float) and isinstance({right}, float) "
+                f"or isinstance({left}, str) and isinstance({right}, str):"
+            )
+            self.emit(f"    {result} = {left} + {right}")
+            self.emit("else:")
+            self.emit(
+                "    "
+                + self.raise_error("Illegal combination of operarands", expr.operator)
+            )
+        elif operator_type == PTokenType.EQUAL_EQUAL:
+            self.emit(f"{result} = type({left}) is type({right}) and {left} == {right}")
+        elif operator_type == PTokenType.BANG_EQUAL:
+            self.emit(
+                f"{result} = not (type({left}) is type({right}) "
+                f"and {left} == {right})"
+            )
+        elif (
+            operator_type == PTokenType.SLASH or operator_type in _ARITHMETIC_OPERATORS
+        ):
+            self.emit(
+                f"if not isinstance({left}, float) "
+                f"or not isinstance({right}, float):"
+            )
+            self.emit(
+                "    " + self.raise_error("Operand must be a number", expr.operator)
+            )
+            if operator_type == PTokenType.SLASH:
+                self.emit(
+                    f"{result} = divide_by_zero({left}) if {right} == 0.0 "
+                    f"else {left} / {right}"
+                )
+            else:
+                python_operator = _ARITHMETIC_OPERATORS[operator_type]
+                self.emit(f"{result} = {left} {python_operator} {right}")
+        else:
+            raise ValueError(
+                "Invalid binary operator type parsed, "
+                "this is an error in Plox implementation",
+                expr.operator,
+            )
+        return result
+
+
+class CompiledInterpreter:
+    """
+    An execution engine that compiles every expression into a native
+    Python function once and then simply calls it.
+    """
+
+    def __init__(self, environment: Mapping[str, object] | None = None) -> None:
+        self.environment: Mapping[str, object] = environment or {}
+
+    def interpret(self, expr: Expr) -> None:
+        try:
+            value = CodeGenerator(self.environment).compile(expr)()
+            write(self.stringify(value))
+        except PloxRuntimeError as e:
+            error(e.token.line if e.token is not None else None, e.message)
+
+    def stringify(self, value: object) -> str:
+        if value is None:
+            return "nil"
+        return str(value)
@@ -1,10 +1,12 @@
 from abc import ABC
-from plox.ptoken import PToken, PTokenType
+
+from plox.ptoken import PTokenType, TokenLike
 
 
 class PloxErrorBase(Exception, ABC):
     """Base class for all Lox-related errors."""
-    def __init__(self, message: str, token: PToken | None = None) -> None:
+
+    def __init__(self, message: str, token: TokenLike | None = None) -> None:
         self.message = message
         self.token = token
         super().__init__(self.__str__())
@@ -20,12 +22,23 @@ class PloxErrorBase(Exception, ABC):
 
 class PloxSyntaxError(PloxErrorBase):
     """Errors detected during scanning/parsing."""
+
     pass
 
+
 class PloxNotImplementedError(PloxErrorBase):
     """Errors detected during scanning/parsing."""
+
     pass
 
+
+class PloxTypeError(PloxErrorBase):
+    """Errors detected during type checking."""
+
+    pass
+
+
 class PloxRuntimeError(PloxErrorBase):
     """Errors detected during scanning/parsing."""
+
     pass
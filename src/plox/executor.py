@@ -0,0 +1,107 @@
+"""
+Run independent programs in parallel within one process.
+
+A run keeps all of its state in the objects it creates and reports whether
+it had errors as a return value; what it prints goes through the
+`plox.logger.output` context variable, which every worker thread sets to
+capture its own output. Programs can therefore run side by side on:
+
+- `threads`: a thread pool. The programs run in parallel only on a
+  free-threaded build of Python (3.13t and later); with the GIL, they take
+  turns.
+- `interpreters`: a pool of subinterpreters, each with its own GIL
+  (Python 3.14 and later).
+- `processes`: a process pool, as `plox --jobs` uses by default.
+"""
+
+import sys
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import partial
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+from plox import logger
+
+# `concurrent.futures` is imported by `make_executor`, as `plox.main`
+# imports this module on every start.
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+    from plox import main
+
+# Kinds of executor accepted by `make_executor`.
+EXECUTORS: tuple[str, ...] = ("processes", "threads", "interpreters")
+
+# Default number of requests a `plox --serve` server evaluates at once.
+DEFAULT_MAX_CONCURRENCY: int = 64
+
+
+@dataclass(frozen=True)
+class ProgramResult:
+    """What a program printed, and whether it had errors."""
+
+    output: str
+    had_error: bool
+
+
+def gil_enabled() -> bool:
+    """Whether the GIL serializes Python threads in this interpreter."""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+
+def make_executor(kind: str = "threads", workers: int | None = None) -> "Executor":
+    """A pool of `workers` threads, subinterpreters or processes."""
+    match kind:
+        case "processes":
+            from concurrent.futures import ProcessPoolExecutor
+
+            return ProcessPoolExecutor(workers)
+        case "threads":
+            from concurrent.futures import ThreadPoolExecutor
+
+            return ThreadPoolExecutor(workers)
+        case "interpreters":
+            if sys.version_info >= (3, 14):
+                from concurrent.futures import InterpreterPoolExecutor
+
+                return InterpreterPoolExecutor(workers)
+            raise ValueError("Subinterpreters require Python 3.14 or later")
+        case _:
+            raise ValueError(f"Unknown executor {kind!r}")
+
+
+@contextmanager
+def captured_output() -> Iterator[list[str]]:
+    """Collect the lines printed in this context instead of printing them."""
+    lines: list[str] = []
+    reset = logger.output.set(lines.append)
+    try:
+        yield lines
+    finally:
+        logger.output.reset(reset)
+
+
+def run_program(source: str, options: "main.RunOptions | None" = None) -> ProgramResult:
+    """Run a program as `plox.main.run` would, capturing its output."""
+    # imported here: plox.main imports this module
+    from plox import main
+
+    with captured_output() as lines:
+        had_error = main.run(source, options)
+    return ProgramResult("".join(line + "\n" for line in lines), had_error)
+
+
+def run_programs(
+    sources: Iterable[str],
+    kind: str = "threads",
+    workers: int | None = None,
+    options: "main.RunOptions | None" = None,
+) -> list[ProgramResult]:
+    """Run every program on an executor of `kind`; results are in input order."""
+    # imported here: plox.main imports this module
+    from plox import main
+
+    run = partial(run_program, options=options or main.RunOptions())
+    with make_executor(kind, workers) as executor:
+        return list(executor.map(run, sources))
@@ -1,80 +1,156 @@
 from __future__ import annotations
+
 from abc import ABC, abstractmethod
-from typing import Any, Protocol, runtime_checkable
-from functools import singledispatchmethod
 from dataclasses import dataclass
-from plox.ptoken import PToken
+from typing import Any, Callable, ClassVar, TypeVar
+
+from plox.ptoken import TokenLike
 
 
 class Expr(ABC):
+    __slots__ = ()
+
     def accept[T](self, visitor: Visitor[T]) -> T:
         return visitor.visit(self)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class AssignExpr(Expr):
-    name: PToken
+    name: TokenLike
     value: Expr
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class GroupingExpr(Expr):
     expression: Expr
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class LiteralExpr(Expr):
     value: Any
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
+class VariableExpr(Expr):
+    name: TokenLike
+
+
+@dataclass(frozen=True, slots=True)
 class UnaryExpr(Expr):
-    operator: PToken
+    operator: TokenLike
     right: Expr
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class BinaryExpr(Expr):
     left: Expr
-    operator: PToken
+    operator: TokenLike
     right: Expr
 
 
-@runtime_checkable
-class Visitor[R](Protocol):
-    def visit(self, expr: Expr) -> R: ...
+@dataclass(frozen=True, slots=True)
+class NumericBinaryExpr(BinaryExpr):
+    """A `BinaryExpr` whose operands are known to evaluate to numbers."""
 
+    operation: Callable[[float, float], object]
 
-class AstPrinter(Visitor[str]):
-    def pformat(self, expr: Expr) -> str:
-        return expr.accept(self)
 
-    @singledispatchmethod
-    def visit(self, expr: Expr) -> str:
+class NumericNegateExpr(UnaryExpr):
+    """A `-` whose operand is known to evaluate to a number."""
+
+    __slots__ = ()
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def visits(expr_type: type[Expr]) -> Callable[[F], F]:
+    """Register the decorated `Visitor` method as the handler of `expr_type`."""
+
+    def register(handler: F) -> F:
+        handler.__visits__ = expr_type  # type: ignore[attr-defined]
+        return handler
+
+    return register
+
+
+class Visitor[R]:
+    """
+    Base class of the passes over expression trees.
+
+    Handlers are methods decorated with `@visits(SomeExpr)`. When a visitor
+    class is created, its handlers and those it inherits are collected into
+    a flat dispatch table keyed by node class, so visiting a node is a
+    single dictionary lookup rather than a descriptor binding plus an
+    MRO-based dispatch. Node classes without a handler of their own (such
+    as subclasses of the dataclasses above) are resolved through their MRO
+    on first sight and then cached in the table.
+    """
+
+    dispatch_table: ClassVar[dict[type[Expr], Callable[[Any, Any], Any]]] = {}
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # handler names are resolved on `cls`, so that overriding a handler
+        # by name also replaces it in the table
+        names: dict[type[Expr], str] = {}
+        for klass in reversed(cls.__mro__):
+            for name, attribute in vars(klass).items():
+                expr_type = getattr(attribute, "__visits__", None)
+                if expr_type is not None:
+                    names[expr_type] = name
+        cls.dispatch_table = {
+            expr_type: getattr(cls, name) for expr_type, name in names.items()
+        }
+
+    def visit(self, expr: Expr) -> R:
+        try:
+            handler = self.dispatch_table[expr.__class__]
+        except KeyError:
+            handler = self.resolve(expr.__class__)
+        result: R = handler(self, expr)
+        return result
+
+    @classmethod
+    def resolve(cls, expr_type: type[Expr]) -> Callable[[Any, Any], Any]:
+        for klass in expr_type.__mro__:
+            handler = cls.dispatch_table.get(klass)
+            if handler is not None:
+                cls.dispatch_table[expr_type] = handler
+                return handler
         raise NotImplementedError(
-            f"The `visit` dispatcher for {type(expr)} objects is not defined"
+            f"The `visit` dispatcher for {expr_type} objects is not defined"
         )
 
-    @visit.register
-    def _(self, expr: AssignExpr) -> str:
+
+class AstPrinter(Visitor[str]):
+    def pformat(self, expr: Expr) -> str:
+        return expr.accept(self)
+
+    @visits(AssignExpr)
+    def visit_assign(self, expr: AssignExpr) -> str:
         return self.parenthesize(f"{expr.name}=", expr.value)
 
-    @visit.register
-    def _(self, expr: GroupingExpr) -> str:
+    @visits(GroupingExpr)
+    def visit_grouping(self, expr: GroupingExpr) -> str:
         return self.parenthesize("group", expr.expression)
 
-    @visit.register
-    def _(self, expr: LiteralExpr) -> str:
+    @visits(LiteralExpr)
+    def visit_literal(self, expr: LiteralExpr) -> str:
         if expr.value is None:
             return "nil"
         return str(expr.value)
 
-    @visit.register
-    def _(self, expr: UnaryExpr) -> str:
+    @visits(VariableExpr)
+    def visit_variable(self, expr: VariableExpr) -> str:
+        return str(expr.name.lexeme)
+
+    @visits(UnaryExpr)
+    def visit_unary(self, expr: UnaryExpr) -> str:
         return self.parenthesize(str(expr.operator.lexeme), expr.right)
 
-    @visit.register
-    def _(self, expr: BinaryExpr) -> str:
+    @visits(BinaryExpr)
+    def visit_binary(self, expr: BinaryExpr) -> str:
         return self.parenthesize(str(expr.operator.lexeme), expr.left, expr.right)
 
     def parenthesize(self, name: str, *expressions: Expr):
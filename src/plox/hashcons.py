@@ -0,0 +1,179 @@
+from typing import Any, Hashable, Mapping
+
+from plox.expression import (
+    AssignExpr,
+    BinaryExpr,
+    Expr,
+    GroupingExpr,
+    LiteralExpr,
+    NumericBinaryExpr,
+    UnaryExpr,
+    VariableExpr,
+    Visitor,
+    visits,
+)
+from plox.interpreter import Interpreter
+from plox.ptoken import PTokenType, TokenLike
+
+# Operators that never raise, so their nodes may be shared across lines.
+_TOTAL_OPERATORS = frozenset(
+    {PTokenType.BANG, PTokenType.EQUAL_EQUAL, PTokenType.BANG_EQUAL}
+)
+
+
+def literal_key(value: Any) -> Hashable:
+    """
+    A key under which two literals are equal only when Lox cannot tell them
+    apart: unlike `==`, it separates `1` from `true` and `0` from `-0`, and
+    a NaN is equal to itself.
+    """
+    if type(value) is float:
+        return float, value.hex()
+    return type(value), value
+
+
+def operator_key(operator: TokenLike) -> Hashable:
+    """
+    A key for the operator of a node. A node that may raise keeps the line of
+    its operator, so the error is still reported where it was written.
+    """
+    if operator.type in _TOTAL_OPERATORS:
+        return operator.type
+    return operator.type, operator.line
+
+
+class Interner(Visitor[Expr]):
+    """
+    Hash-cons expression trees: structurally identical subtrees, however
+    often and in however many trees they occur, become one shared node.
+
+    Nodes are keyed by their class, operator and the identity of their
+    already interned children, so interning a tree costs one dictionary
+    lookup per node, and interning an already interned tree returns at its
+    root. Expression nodes are immutable, which makes sharing them safe.
+    `table` holds every distinct node seen so far.
+    """
+
+    def __init__(self) -> None:
+        self.table: dict[Hashable, Expr] = {}
+        # ids of the nodes in `table`, which keeps them alive
+        self.interned: set[int] = set()
+
+    def intern(self, expr: Expr) -> Expr:
+        if id(expr) in self.interned:
+            return expr
+        return self.visit(expr)
+
+    def share(self, key: Hashable, expr: Expr) -> Expr:
+        shared = self.table.setdefault(key, expr)
+        if shared is expr:
+            self.interned.add(id(expr))
+        return shared
+
+    @visits(AssignExpr)
+    def visit_assign(self, expr: AssignExpr) -> Expr:
+        value = self.intern(expr.value)
+        return self.share(
+            (AssignExpr, expr.name.lexeme, expr.name.line, id(value)),
+            AssignExpr(expr.name, value),
+        )
+
+    @visits(LiteralExpr)
+    def visit_literal(self, expr: LiteralExpr) -> Expr:
+        return self.share((LiteralExpr, literal_key(expr.value)), expr)
+
+    @visits(VariableExpr)
+    def visit_variable(self, expr: VariableExpr) -> Expr:
+        # a lookup may fail, so variables are shared within a line only
+        return self.share((VariableExpr, expr.name.lexeme, expr.name.line), expr)
+
+    @visits(GroupingExpr)
+    def visit_grouping(self, expr: GroupingExpr) -> Expr:
+        inner = self.intern(expr.expression)
+        return self.share((GroupingExpr, id(inner)), GroupingExpr(inner))
+
+    @visits(UnaryExpr)
+    def visit_unary(self, expr: UnaryExpr) -> Expr:
+        right = self.intern(expr.right)
+        return self.share(
+            (type(expr), operator_key(expr.operator), id(right)),
+            type(expr)(expr.operator, right),
+        )
+
+    @visits(BinaryExpr)
+    def visit_binary(self, expr: BinaryExpr) -> Expr:
+        left = self.intern(expr.left)
+        right = self.intern(expr.right)
+        return self.share(
+            (BinaryExpr, operator_key(expr.operator), id(left), id(right)),
+            BinaryExpr(left, expr.operator, right),
+        )
+
+    @visits(NumericBinaryExpr)
+    def visit_numeric_binary(self, expr: NumericBinaryExpr) -> Expr:
+        left = self.intern(expr.left)
+        right = self.intern(expr.right)
+        return self.share(
+            (NumericBinaryExpr, operator_key(expr.operator), id(left), id(right)),
+            NumericBinaryExpr(left, expr.operator, right, expr.operation),
+        )
+
+
+class MemoizingInterpreter(Interpreter):
+    """
+    A tree-walking interpreter that hash-conses every expression it runs and
+    then evaluates each node at most once per `interpret`, so a repeated
+    subtree is evaluated once however often it occurs. Every expression is
+    pure, so the memo only has to live as long as one evaluation; a node
+    that raises aborts the evaluation and is never memoized. Entries keep
+    their node alive, so an `id` is never reused while it is memoized.
+
+    The memo is per expression, so sharing across expressions buys no
+    evaluations: unless an `interner` is given, whose table then lives as
+    long as the caller keeps it, each expression is interned on its own and
+    the interpreter keeps no nodes between expressions, however long it
+    runs (a stream, a `Session`, a `--serve` worker).
+    """
+
+    def __init__(
+        self,
+        interner: Interner | None = None,
+        environment: Mapping[str, object] | None = None,
+    ) -> None:
+        super().__init__(environment)
+        self.interner = interner
+        self.memo: dict[int, tuple[Expr, object]] = {}
+
+    def intern(self, expr: Expr) -> Expr:
+        """Hash-cons `expr` in the given interner, or in a fresh one."""
+        return (self.interner or Interner()).intern(expr)
+
+    def interpret(self, expr: Expr) -> None:
+        self.memo.clear()
+        try:
+            super().interpret(self.intern(expr))
+        finally:
+            self.memo.clear()
+
+    def run(self, expr: Expr) -> object:
+        """Evaluate a whole expression with a fresh memo and return its value."""
+        return self.run_interned(self.intern(expr))
+
+    def run_interned(self, expr: Expr) -> object:
+        """`run` for an expression already hash-consed by `intern`."""
+        self.memo.clear()
+        try:
+            return self.evaluate(expr)
+        finally:
+            self.memo.clear()
+
+    def evaluate(self, expr: Expr) -> object:
+        if expr.__class__ is LiteralExpr:
+            return expr.value
+        key = id(expr)
+        memoized = self.memo.get(key)
+        if memoized is not None:
+            return memoized[1]
+        value = expr.accept(self)
+        self.memo[key] = (expr, value)
+        return value
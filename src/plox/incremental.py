@@ -0,0 +1,83 @@
+"""
+Incremental lexing and parsing of a source under edit, for editors and
+REPL-driven tools that re-run a growing or changing source.
+
+A `Document` holds a source with its tokens and syntax tree, and applies
+edits (offset, number of characters deleted, text inserted) to all three:
+the `IncrementalScanner` re-lexes the source around the edit only and
+keeps the old tokens on either side, and the `IncrementalParser` reuses
+every parenthesized group of the previous tree that is made of old tokens.
+The work of an edit follows the size of the edit, the distance from the
+previous one and the groups enclosing it, not the size of the source: the
+offsets and lines of the tokens after an edit are shifted lazily. What
+remains proportional to the source is copying the text and splicing the
+token list, which are both done in C.
+"""
+
+from plox.expression import Expr
+from plox.parser import IncrementalParser, ParsedGroup
+from plox.ptoken import TokenLike
+from plox.scanner import Edit, IncrementalScanner, IncrementalToken
+
+
+class Document:
+    """A Lox source with tokens and a syntax tree kept up to date by edits."""
+
+    def __init__(self, source: str = "") -> None:
+        self.scanner: IncrementalScanner = IncrementalScanner(source)
+        # the groups of the last tree parsed without errors, and the tokens
+        # that replaced those it was parsed from, or None if none did; an
+        # empty range still marks where tokens were deleted
+        self.groups: dict[TokenLike, ParsedGroup] = {}
+        self.damage: range | None = range(len(self.tokens))
+        self.tree: Expr | None = None
+        self.parse()
+
+    @property
+    def source(self) -> str:
+        return self.scanner.source
+
+    @property
+    def tokens(self) -> list[IncrementalToken]:
+        return self.scanner.tokens
+
+    def edit(self, offset: int, deleted: int = 0, inserted: str = "") -> Expr | None:
+        """
+        Replace `deleted` characters at `offset` with `inserted`, and return
+        the new tree, or None after reporting a syntax error.
+        """
+        start, stop, count = self.scanner.edit(Edit(offset, deleted, inserted))
+        self.damage = self.merge_damage(start, stop, count)
+        return self.parse()
+
+    def parse(self) -> Expr | None:
+        damage = range(0) if self.damage is None else self.damage
+        parser = IncrementalParser(self.tokens, self.groups, damage)
+        self.tree = parser.parse()
+        if self.tree is not None:
+            self.groups = parser.groups
+            self.damage = None
+        return self.tree
+
+    def merge_damage(self, start: int, stop: int, count: int) -> range:
+        """
+        The tokens new since the last tree parsed without errors, once the
+        old tokens `[start, stop)` have been replaced by `count` new ones.
+        """
+        damage = self.damage
+        if damage is None:
+            return range(start, start + count)
+        moved = count - (stop - start)
+        if damage.start < start:
+            first = damage.start
+        elif damage.start >= stop:
+            first = damage.start + moved
+        else:
+            first = start
+        if damage.stop <= start:
+            last = damage.stop
+        elif damage.stop >= stop:
+            last = damage.stop + moved
+        else:
+            last = start + count
+        return range(min(first, start), max(last, start + count))
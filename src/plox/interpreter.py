@@ -1,24 +1,43 @@
+import math
+from typing import Any, Mapping, TypeGuard, cast
+
+from plox.errors import PloxRuntimeError
 from plox.expression import (
-    Visitor,
+    BinaryExpr,
     Expr,
-    LiteralExpr,
     GroupingExpr,
+    LiteralExpr,
+    NumericBinaryExpr,
+    NumericNegateExpr,
     UnaryExpr,
-    BinaryExpr,
+    VariableExpr,
+    Visitor,
+    visits,
 )
-from plox.ptoken import PTokenType, PToken
-from functools import singledispatchmethod
-from plox.errors import PloxRuntimeError
-from plox.logger import error
-import math
-from typing import TypeGuard
+from plox.logger import error, write
+from plox.ptoken import PTokenType, TokenLike
+
+
+def divide(left: float, right: float) -> float:
+    """Divide two numbers the way Lox does, without raising on zero."""
+    try:
+        return left / right
+    except ZeroDivisionError:
+        # emulate Lox division
+        if left == 0.0:
+            return math.nan
+        return math.inf if left > 0 else -math.inf
 
 
 class Interpreter(Visitor[object]):
+    def __init__(self, environment: Mapping[str, object] | None = None) -> None:
+        # values of the variables an expression may refer to
+        self.environment: Mapping[str, object] = environment or {}
+
     def interpret(self, expr: Expr) -> None:
         try:
             value = self.evaluate(expr)
-            print(self.stringify(value))
+            write(self.stringify(value))
         except PloxRuntimeError as e:
             error(e.token.line if e.token is not None else None, e.message)
 
@@ -27,29 +46,51 @@ class Interpreter(Visitor[object]):
             return "nil"
         return str(value)
 
-    @singledispatchmethod
-    def visit(self, expr: Expr) -> object:
-        raise NotImplementedError(
-            f"The `visit` dispatcher for {type(expr)} objects is not defined"
-        )
-
-    @visit.register
-    def _(self, expr: LiteralExpr) -> object:
+    @visits(LiteralExpr)
+    def visit_literal(self, expr: LiteralExpr) -> object:
         return expr.value
 
-    @visit.register
-    def _(self, expr: GroupingExpr) -> object:
+    @visits(VariableExpr)
+    def visit_variable(self, expr: VariableExpr) -> object:
+        try:
+            return self.environment[expr.name.lexeme]
+        except KeyError:
+            raise PloxRuntimeError(
+                f"Undefined variable '{expr.name.lexeme}'.", expr.name
+            ) from None
+
+    @visits(GroupingExpr)
+    def visit_grouping(self, expr: GroupingExpr) -> object:
         return self.evaluate(expr.expression)
         # FIXME: also try:
         # return self.visit(expr.expression)
 
-    @visit.register
-    def _(self, expr: UnaryExpr) -> object:
+    @visits(UnaryExpr)
+    def visit_unary(self, expr: UnaryExpr) -> object:
+        return self.apply_unary(expr.operator, self.evaluate(expr.right))
+
+    @visits(BinaryExpr)
+    def visit_binary(self, expr: BinaryExpr) -> object:
+        leftObj = self.evaluate(expr.left)
         rightObj = self.evaluate(expr.right)
+        return self.apply_binary(expr.operator, leftObj, rightObj)
+
+    @visits(NumericBinaryExpr)
+    def visit_numeric_binary(self, expr: NumericBinaryExpr) -> object:
+        # the type checker proved both operands are numbers
+        left = cast(float, self.evaluate(expr.left))
+        right = cast(float, self.evaluate(expr.right))
+        return expr.operation(left, right)
+
+    @visits(NumericNegateExpr)
+    def visit_numeric_negate(self, expr: NumericNegateExpr) -> object:
+        return -cast(float, self.evaluate(expr.right))
 
-        match expr.operator.type:
+    def apply_unary(self, operator: TokenLike, rightObj: object) -> object:
+        """Apply a unary operator to its already evaluated operand."""
+        match operator.type:
             case PTokenType.MINUS:
-                if self.check_number_operand(rightObj, expr.operator):
+                if self.check_number_operand(rightObj, operator):
                     return -rightObj
             case PTokenType.BANG:
                 return not self.is_truthy(rightObj)
@@ -57,32 +98,25 @@ class Interpreter(Visitor[object]):
                 raise ValueError(
                     "Invalid unary operator type parsed, "
                     "this is an error in Plox implementation",
-                    expr.operator,
+                    operator,
                 )
 
-    @visit.register
-    def _(self, expr: BinaryExpr) -> object:
-        leftObj = self.evaluate(expr.left)
-        rightObj = self.evaluate(expr.right)
-
-        match expr.operator.type:
+    def apply_binary(
+        self, operator: TokenLike, leftObj: object, rightObj: object
+    ) -> object:
+        """Apply a binary operator to its already evaluated operands."""
+        match operator.type:
             case PTokenType.MINUS:
-                if self.check_number_operand(leftObj, expr.operator):
-                    if self.check_number_operand(rightObj, expr.operator):
+                if self.check_number_operand(leftObj, operator):
+                    if self.check_number_operand(rightObj, operator):
                         return leftObj - rightObj
             case PTokenType.SLASH:
-                if self.check_number_operand(leftObj, expr.operator):
-                    if self.check_number_operand(rightObj, expr.operator):
-                        try:
-                            return leftObj / rightObj
-                        except ZeroDivisionError:
-                            # emulate Lox division
-                            if leftObj == 0.0:
-                                return math.nan
-                            return math.inf if leftObj > 0 else -math.inf
+                if self.check_number_operand(leftObj, operator):
+                    if self.check_number_operand(rightObj, operator):
+                        return divide(leftObj, rightObj)
             case PTokenType.STAR:
-                if self.check_number_operand(leftObj, expr.operator):
-                    if self.check_number_operand(rightObj, expr.operator):
+                if self.check_number_operand(leftObj, operator):
+                    if self.check_number_operand(rightObj, operator):
                         return leftObj * rightObj
             case PTokenType.PLUS:
                 if isinstance(leftObj, float) and isinstance(rightObj, float):
@@ -91,23 +125,23 @@ class Interpreter(Visitor[object]):
                     return leftObj + rightObj
                 else:
                     raise PloxRuntimeError(
-                        "Illegal combination of operarands", expr.operator
+                        "Illegal combination of operarands", operator
                     )
             case PTokenType.GREATER:
-                if self.check_number_operand(leftObj, expr.operator):
-                    if self.check_number_operand(rightObj, expr.operator):
+                if self.check_number_operand(leftObj, operator):
+                    if self.check_number_operand(rightObj, operator):
                         return leftObj > rightObj
             case PTokenType.GREATER_EQUAL:
-                if self.check_number_operand(leftObj, expr.operator):
-                    if self.check_number_operand(rightObj, expr.operator):
+                if self.check_number_operand(leftObj, operator):
+                    if self.check_number_operand(rightObj, operator):
                         return leftObj >= rightObj
             case PTokenType.LESS:
-                if self.check_number_operand(leftObj, expr.operator):
-                    if self.check_number_operand(rightObj, expr.operator):
+                if self.check_number_operand(leftObj, operator):
+                    if self.check_number_operand(rightObj, operator):
                         return leftObj < rightObj
             case PTokenType.LESS_EQUAL:
-                if self.check_number_operand(leftObj, expr.operator):
-                    if self.check_number_operand(rightObj, expr.operator):
+                if self.check_number_operand(leftObj, operator):
+                    if self.check_number_operand(rightObj, operator):
                         return leftObj <= rightObj
             case PTokenType.EQUAL_EQUAL:
                 return self.is_equal(leftObj, rightObj)
@@ -117,12 +151,24 @@ class Interpreter(Visitor[object]):
                 raise ValueError(
                     "Invalid binary operator type parsed, "
                     "this is an error in Plox implementation",
-                    expr.operator,
+                    operator,
                 )
 
     def evaluate(self, expr: Expr) -> object:
         return expr.accept(self)
 
+    def evaluate_batch(
+        self, expr: Expr, columns: Mapping[str, Any], length: int | None = None
+    ) -> Any:
+        """
+        Evaluate `expr` for every row of `columns` with NumPy array operations;
+        see `plox.vectorized.BatchEvaluator`. Requires NumPy.
+        """
+        # imported here: NumPy is optional, and plox.vectorized imports us
+        from plox.vectorized import evaluate_batch
+
+        return evaluate_batch(expr, columns, length)
+
     def is_truthy(self, object) -> bool:
         # Lox follows Ruby’s simple rule: false and nil are falsey, and everything else is truthy.
         if object is None:
@@ -135,8 +181,56 @@ class Interpreter(Visitor[object]):
         return type(left) is type(right) and left == right
 
     def check_number_operand(
-        self, operand: object, operator: PToken
+        self, operand: object, operator: TokenLike
     ) -> TypeGuard[float]:
         if not isinstance(operand, float):
             raise PloxRuntimeError("Operand must be a number", operator)
         return True
+
+
+class IterativeInterpreter(Interpreter):
+    """
+    A tree-walking interpreter that evaluates without recursion.
+
+    The tree is walked in post-order with an explicit work stack and value
+    stack instead of Python frames, so there is no limit on the depth of the
+    expression (such as the long left-leaning chains `Parser.term` builds)
+    and no visitor dispatch per node. Operands are evaluated in the same
+    order, and operators applied with the same `apply_unary`/`apply_binary`,
+    so results and runtime errors are those of `Interpreter`.
+    """
+
+    def evaluate(self, expr: Expr) -> object:
+        # a node on the work stack is still to be evaluated; a 1-tuple holds
+        # an operator node whose operands are already on the value stack
+        work: list[Expr | tuple[Expr]] = [expr]
+        values: list[object] = []
+        push_work = work.append
+        pop_work = work.pop
+        push_value = values.append
+
+        while work:
+            item = pop_work()
+            if isinstance(item, LiteralExpr):
+                push_value(item.value)
+            elif isinstance(item, BinaryExpr):
+                push_work((item,))
+                push_work(item.right)
+                push_work(item.left)
+            elif isinstance(item, UnaryExpr):
+                push_work((item,))
+                push_work(item.right)
+            elif isinstance(item, GroupingExpr):
+                push_work(item.expression)
+            elif isinstance(item, tuple):
+                node = item[0]
+                if isinstance(node, BinaryExpr):
+                    rightObj = values.pop()
+                    leftObj = values[-1]
+                    values[-1] = self.apply_binary(node.operator, leftObj, rightObj)
+                elif isinstance(node, UnaryExpr):
+                    values[-1] = self.apply_unary(node.operator, values[-1])
+            else:
+                push_value(item.accept(self))
+
+        return values.pop()
@@ -1,4 +1,17 @@
+from contextvars import ContextVar
+from typing import Callable
+
+# Where everything a run prints is written: the values of expressions and
+# diagnostics. An embedding application or a worker thread can set it to
+# capture them instead of printing to stdout.
+output: ContextVar[Callable[[str], object]] = ContextVar("output", default=print)
+
 
 def error(line: int | None, message: str) -> None:
     """Print an error message."""
-    print(f"[line {line if line is not None else "<Unknown>"}] Error: {message}")
+    output.get()(f"[line {line if line is not None else "<Unknown>"}] Error: {message}")
+
+
+def write(text: str) -> None:
+    """Print a line of output."""
+    output.get()(text)
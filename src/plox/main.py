@@ -2,62 +2,437 @@
 Main entry point for the Plox interpreter.
 """
 
+import argparse
+import mmap
 import sys
+from contextlib import nullcontext
+from dataclasses import dataclass
+from functools import partial
+from importlib import import_module
 from pathlib import Path
-from plox.scanner import Scanner
-from plox.parser import Parser
-from plox.interpreter import Interpreter
-from plox.expression import AstPrinter
+from typing import (
+    TYPE_CHECKING,
+    BinaryIO,
+    Callable,
+    ContextManager,
+    Iterable,
+    NoReturn,
+    Protocol,
+    Sequence,
+)
+
+from plox import cache, executor
+from plox.expression import Expr
+from plox.interpreter import Interpreter, IterativeInterpreter
+from plox.logger import write
+from plox.optimizer import Optimizer
+from plox.parser import CompactParser, PrattParser, StreamingParser
+from plox.ptoken import PToken, TokenBuffer, TokenLike
+from plox.scanner import BytesScanner, FastScanner, StreamingScanner
+
+# Modules only needed by some engines and modes (the other engines, type
+# checking, profiling, batches, serving, memory accounting) are imported
+# when first used, to keep the startup of a plain `plox script.lox` short.
+if TYPE_CHECKING:
+    from plox.profiler import Profile
+
+# Number of characters read from a script at a time in streaming mode.
+STREAM_CHUNK_SIZE: int = 64 * 1024
+
+
+class Engine(Protocol):
+    """Anything that can evaluate an expression and print its result."""
+
+    def interpret(self, expr: Expr) -> None: ...
+
+
+def lazy_engine(module: str, name: str) -> Callable[[], Engine]:
+    """A factory of the engine `name` that imports `plox.<module>` on use."""
+
+    def make_engine() -> Engine:
+        engine: Engine = getattr(import_module(f"plox.{module}"), name)()
+        return engine
+
+    return make_engine
+
+
+# Execution engines selectable with `--engine`.
+ENGINES: dict[str, Callable[[], Engine]] = {
+    "tree": Interpreter,
+    "vm": lazy_engine("vm", "VM"),
+    "python": lazy_engine("codegen", "CompiledInterpreter"),
+    "quickening": lazy_engine("quickening", "QuickeningInterpreter"),
+    "iterative": IterativeInterpreter,
+    "memo": lazy_engine("hashcons", "MemoizingInterpreter"),
+}
+
+
+@dataclass
+class RunOptions:
+    """Settings that select how a program is executed."""
+
+    engine: str = "tree"
+    opt_level: int = 0
+    typecheck: bool = False
+    cache: bool = True
+    # collects phase timings and, with the tree engine, node counts
+    profile: "Profile | None" = None
+
+    def make_engine(self) -> Engine:
+        if self.profile is not None and self.engine == "tree":
+            from plox.profiler import ProfilingInterpreter
+
+            return ProfilingInterpreter(self.profile)
+        return ENGINES[self.engine]()
+
+    def phase(self, name: str) -> ContextManager[None]:
+        """Measure a phase of the run in the profile, if there is one."""
+        if self.profile is None:
+            return nullcontext()
+        return self.profile.phase(name)
+
+    def skip_phases(self, *names: str) -> None:
+        """Record in the profile, if there is one, phases the cache saved."""
+        if self.profile is not None:
+            for name in names:
+                self.profile.cached(name)
+
+    def make_optimizer(self) -> Optimizer:
+        return Optimizer(self.opt_level)
+
+
+class ArgumentParser(argparse.ArgumentParser):
+    """An `argparse.ArgumentParser` that exits with the Lox usage status."""
+
+    def error(self, message: str) -> NoReturn:
+        self.print_usage()
+        sys.exit(64)
+
+
+def build_arg_parser() -> ArgumentParser:
+    """Build the command line parser for the `plox` entry point."""
+    parser = ArgumentParser(prog="plox")
+    parser.add_argument(
+        "scripts",
+        nargs="*",
+        metavar="script",
+        help="Lox script to run; several scripts, directories or glob "
+        "patterns are run as a batch",
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--stream",
+        action="store_true",
+        help="lex, parse and evaluate the script incrementally, "
+        "one ';'-terminated expression at a time",
+    )
+    mode.add_argument(
+        "--mmap",
+        action="store_true",
+        help="scan the script straight from a memory map of the file",
+    )
+    mode.add_argument(
+        "--scan-workers",
+        type=int,
+        metavar="N",
+        help="lex large scripts in parallel on N worker processes",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="tree",
+        help="execution engine: the tree-walking interpreter (default), "
+        "the bytecode VM, compiled Python functions, the self-specializing "
+        "tree-walking interpreter, the non-recursive tree-walking interpreter "
+        "or the tree-walking interpreter over a hash-consed, memoized tree",
+    )
+    parser.add_argument(
+        "--opt-level",
+        type=int,
+        choices=(0, 1, 2),
+        default=0,
+        help="optimize the syntax tree before running it: 0 disables the "
+        "optimizer (default), 1 folds constants and drops groupings, "
+        "2 also collapses double negations",
+    )
+    parser.add_argument(
+        "--typecheck",
+        action="store_true",
+        help="reject expressions with type errors before running them, and "
+        "skip the runtime checks on operands proven to be numbers",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="cache",
+        action="store_false",
+        help=f"do not read or write the parsed script in {cache.CACHE_DIRECTORY}",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        metavar="N",
+        help="run a batch of scripts on N worker processes " "(default: one per CPU)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        metavar="SECONDS",
+        help="stop a script of a batch that runs for longer than SECONDS",
+    )
+    parser.add_argument(
+        "--executor",
+        choices=executor.EXECUTORS,
+        default="processes",
+        help="run a batch on worker processes (default), on threads, which "
+        "run in parallel on a free-threaded Python, or on subinterpreters "
+        "(Python 3.14+)",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="evaluate newline-delimited JSON requests read from stdin, or "
+        "from the connections to --socket, on --jobs warm workers",
+    )
+    parser.add_argument(
+        "--socket",
+        metavar="PATH",
+        help="serve on a Unix socket at PATH instead of stdin and stdout",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=executor.DEFAULT_MAX_CONCURRENCY,
+        metavar="N",
+        help="evaluate at most N requests at once when serving "
+        f"(default: {executor.DEFAULT_MAX_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="report on stderr the time and the net change in live memory "
+        "blocks (not an allocation count) of every phase, and the phases the "
+        "cache saved, and, with the tree engine, the evaluations of every "
+        "node type and operator",
+    )
+    parser.add_argument(
+        "--profile-format",
+        choices=("table", "json"),
+        default="table",
+        help="format of the --profile report (default: table)",
+    )
+    parser.add_argument(
+        "--memstats",
+        action="store_true",
+        help="report on stderr the peak and retained memory of scanning, "
+        "parsing and evaluating the script, by type of object and by "
+        "allocation site",
+    )
+    return parser
 
-had_error: bool = False
 
 def main() -> None:
     """Main entry point for the Plox interpreter."""
-    if len(sys.argv) > 2:
-        print("Usage: plox [script]")
-        sys.exit(64)
-    elif len(sys.argv) == 2:
+    arg_parser = build_arg_parser()
+    args = arg_parser.parse_args()
+    options = RunOptions(
+        engine=args.engine,
+        opt_level=args.opt_level,
+        typecheck=args.typecheck,
+        cache=args.cache,
+    )
+    if args.profile:
+        from plox.profiler import Profile
+
+        options.profile = Profile()
+    if args.profile and (args.serve or is_batch(args)):
+        arg_parser.error("--profile runs a single script")
+    if args.memstats:
+        if len(args.scripts) != 1 or args.serve or is_batch(args):
+            arg_parser.error("--memstats runs a single script")
+        if args.stream or args.mmap or args.scan_workers or args.profile:
+            arg_parser.error("--memstats runs the script in the default mode")
+        sys.exit(run_memstats(args.scripts[0], options))
+    if args.serve:
+        if args.scripts:
+            arg_parser.error("--serve does not take scripts")
+        from plox import server
+
+        try:
+            server.serve(
+                options,
+                socket=args.socket,
+                workers=args.jobs,
+                kind=args.executor,
+                max_concurrency=args.max_concurrency,
+            )
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(64)
+        except OSError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(71)
+        return
+    if is_batch(args):
+        if args.scan_workers is not None:
+            arg_parser.error("--scan-workers cannot be used with a batch")
+        from plox import batch
+
+        try:
+            status = batch.run_batch(
+                args.scripts,
+                jobs=args.jobs,
+                timeout=args.timeout,
+                options=options,
+                stream=args.stream,
+                use_mmap=args.mmap,
+                kind=args.executor,
+            )
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(64)
+        sys.exit(status)
+    had_error = False
+    if args.scripts:
         # Run script file
-        run_file(sys.argv[1])
+        had_error = run_file(
+            args.scripts[0],
+            stream=args.stream,
+            use_mmap=args.mmap,
+            scan_workers=args.scan_workers,
+            options=options,
+        )
     else:
         # Run REPL
-        run_prompt()
+        run_prompt(options)
 
+    if options.profile is not None:
+        report_profile(options.profile, args.profile_format)
     if had_error:
         sys.exit(65)
 
-def run_file(path: str) -> None:
-    """Run a Lox script from a file."""
+
+def is_batch(args: argparse.Namespace) -> bool:
+    """Whether the command line asks for a batch run rather than one script."""
+    if args.jobs is not None or args.timeout is not None:
+        return True
+    if len(args.scripts) != 1:
+        return len(args.scripts) > 1
+    script = Path(args.scripts[0])
+    is_pattern = any(c in args.scripts[0] for c in "*?[")
+    return script.is_dir() or (is_pattern and not script.exists())
+
+
+def run_file(
+    path: str,
+    stream: bool = False,
+    use_mmap: bool = False,
+    scan_workers: int | None = None,
+    options: RunOptions | None = None,
+) -> bool:
+    """Run a Lox script from a file. Returns whether it had errors."""
     try:
-        with open(path, 'r', encoding='utf-8') as file:
+        if use_mmap:
+            with open(path, "rb") as file:
+                write(f"Running file: {path}")
+                with (options or RunOptions()).phase("scan"):
+                    tokens = scan_mapped(file)
+            return run_tokens(tokens, options)
+        with open(path, "r", encoding="utf-8") as file:
+            if stream:
+                write(f"Running file: {path}")
+                return run_stream(
+                    iter(partial(file.read, STREAM_CHUNK_SIZE), ""), options
+                )
             source = file.read()
     except FileNotFoundError:
-        print(f"Error: Could not find file '{path}'")
+        write(f"Error: Could not find file '{path}'")
         sys.exit(66)
     except IOError as e:
-        print(f"Error reading file '{path}': {e}")
+        write(f"Error reading file '{path}': {e}")
         sys.exit(66)
-    
+
     # TODO: Implement interpreter
-    print(f"Running file: {path}")
-    run(source)
+    write(f"Running file: {path}")
+    if scan_workers is not None:
+        from plox.scanner import ParallelScanner
+
+        with (options or RunOptions()).phase("scan"):
+            buffer = ParallelScanner(source, workers=scan_workers).tokens
+        return run_tokens(buffer, options)
+    if options is None or options.cache:
+        return run_cached(path, source, options or RunOptions())
+    return run(source, options)
+
+
+def run_cached(path: str, source: str, options: RunOptions) -> bool:
+    """
+    Run a script from its cache entry, parsing and caching it on a miss.
+    A script with scan or parse errors is never cached, so its errors are
+    reported on every run.
+    """
+    entry = cache.cache_path(path, options.opt_level)
+    with options.phase("load"):
+        cached = cache.load(entry, source, options.opt_level)
+    if cached is not None:
+        expr, removed = cached
+        options.skip_phases("scan", "parse", "optimize")
+    else:
+        with options.phase("scan"):
+            scanner = FastScanner(source)
+        with options.phase("parse"):
+            parsed = PrattParser(scanner.tokens).parse()
+        if parsed is None:
+            write("Error was had in parsing.")
+            return True
+        optimizer = options.make_optimizer()
+        with options.phase("optimize"):
+            expr = optimizer.optimize(parsed)
+        removed = optimizer.removed
+        if not scanner.had_error:
+            with options.phase("store"):
+                cache.store(entry, source, expr, options.opt_level, removed)
+
+    if options.opt_level:
+        report_optimizer(removed)
+    prepared = typecheck(expr, options)
+    if prepared is None:
+        return True
+    with options.phase("interpret"):
+        options.make_engine().interpret(prepared)
+    return False
+
+
+def run_memstats(path: str, options: RunOptions) -> int:
+    """Run a script under `--memstats` and return its exit status."""
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            source = file.read()
+    except IOError as e:
+        write(f"Error reading file '{path}': {e}")
+        return 66
+    from plox import memstats
+
+    write(f"Running file: {path}")
+    report = memstats.measure_run(source, options)
+    print(report.format(), file=sys.stderr)
+    return 65 if report.had_error else 0
 
-def run_prompt() -> None:
+
+def run_prompt(options: RunOptions | None = None) -> None:
     """Run the interactive REPL."""
     print("Type 'exit' or 'quit' to exit")
     print()
-    
+
     while True:
         try:
             line = input("plox> ")
-            if line.lower() in ('exit', 'quit'):
+            if line.lower() in ("exit", "quit"):
                 print("Goodbye!")
                 break
-            
+
             # TODO: Implement interpreter
-            run(line)
-            had_error = False
-            
+            run(line, options)
+
         except KeyboardInterrupt:
             print("\nGoodbye!")
             break
@@ -65,22 +440,122 @@ def run_prompt() -> None:
             print("\nGoodbye!")
             break
 
-def run(source: str) -> None:
-    """Run the source code."""
 
-    scanner = Scanner(source)
+def scan_mapped(file: BinaryIO) -> list[PToken]:
+    """Scan a script in place from a read-only memory map of `file`."""
+    try:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        # empty files cannot be mapped
+        return BytesScanner(b"").tokens
+    with buffer:
+        return BytesScanner(buffer).tokens
+
+
+def run(source: str, options: RunOptions | None = None) -> bool:
+    """Run the source code. Returns whether it had errors."""
+
+    options = options or RunOptions()
+    with options.phase("scan"):
+        scanner = FastScanner(source)
+    return run_tokens(scanner.tokens, options)
+
+
+def run_tokens(
+    tokens: Sequence[TokenLike] | TokenBuffer, options: RunOptions | None = None
+) -> bool:
+    """Run an already scanned token stream. Returns whether it had errors."""
+
+    options = options or RunOptions()
     # for now, just print the source and parsed tokens
-    expr = Parser(scanner.tokens).parse()
-    
+    with options.phase("parse"):
+        if isinstance(tokens, TokenBuffer):
+            expr = CompactParser(tokens).parse()
+        else:
+            expr = PrattParser(tokens).parse()
+
     if expr is None:
-        had_error = True
-        print("Error was had in parsing.")
-        return
-    
-    Interpreter().interpret(expr)
-    
-    # print(AstPrinter().pformat(expr))
-    
+        write("Error was had in parsing.")
+        return True
+
+    optimizer = options.make_optimizer()
+    expr = prepare(expr, options, optimizer)
+    if options.opt_level:
+        report_optimizer(optimizer.removed)
+    if expr is None:
+        return True
+    with options.phase("interpret"):
+        options.make_engine().interpret(expr)
+    return False
+
+
+def run_stream(chunks: Iterable[str], options: RunOptions | None = None) -> bool:
+    """
+    Run a source given as an iterable of chunks, evaluating each expression
+    as soon as it has been parsed, so memory does not grow with the source.
+    Returns whether it had errors. Scanning is profiled as part of parsing,
+    as the parser pulls tokens from the scanner as it goes.
+    """
+    had_error = False
+    options = options or RunOptions()
+    parser = StreamingParser(StreamingScanner(chunks))
+    interpreter = options.make_engine()
+    optimizer = options.make_optimizer()
+    exprs = parser.parse_stream()
+    while True:
+        with options.phase("parse"):
+            expr = next(exprs, None)
+        if expr is None:
+            break
+        prepared = prepare(expr, options, optimizer)
+        if prepared is None:
+            had_error = True
+        else:
+            with options.phase("interpret"):
+                interpreter.interpret(prepared)
+
+    if options.opt_level:
+        report_optimizer(optimizer.removed)
+    return had_error or parser.had_error
+
+
+def prepare(expr: Expr, options: RunOptions, optimizer: Optimizer) -> Expr | None:
+    """
+    Optimize and, if requested, type check a parsed expression. Returns
+    None after reporting the type errors of an expression that is rejected.
+    """
+    with options.phase("optimize"):
+        expr = optimizer.optimize(expr)
+    return typecheck(expr, options)
+
+
+def typecheck(expr: Expr, options: RunOptions) -> Expr | None:
+    """Type check an expression if requested; see `prepare`."""
+    if options.typecheck:
+        from plox.typecheck import TypeChecker
+
+        checker = TypeChecker()
+        with options.phase("typecheck"):
+            expr = checker.check(expr)
+        if checker.errors:
+            for e in checker.errors:
+                write(str(e))
+            return None
+    return expr
+
+
+def report_optimizer(removed: int) -> None:
+    """Report the effect of the optimizer, through the logger."""
+    write(f"Optimizer removed {removed} nodes")
+
+
+def report_profile(profile: "Profile", format: str) -> None:
+    """Report a profile on stderr as a table or JSON."""
+    if format == "json":
+        print(profile.format_json(), file=sys.stderr)
+    else:
+        print(profile.format_table(), file=sys.stderr)
+
 
 def error(line: int, message: str) -> None:
     """Print an error message."""
@@ -88,5 +563,8 @@ def error(line: int, message: str) -> None:
 
 
 if __name__ == "__main__":
+    # `python -m plox.main` runs this file as `__main__`; register it as
+    # `plox.main` too, or the modules importing plox.main would run it again
+    # and make a second `RunOptions` class
+    sys.modules.setdefault("plox.main", sys.modules[__name__])
     main()
-
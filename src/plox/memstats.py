@@ -0,0 +1,212 @@
+"""
+Memory accounting of a run, as `plox --memstats`.
+
+The run is traced with `tracemalloc`, and after each phase (scanning,
+parsing, evaluation) its peak and retained memory are recorded along with
+the source lines that allocated the most. The token list and the tree are
+then broken down by type of object, walking what each of them references.
+"""
+
+import gc
+import sys
+import tracemalloc
+from collections import defaultdict
+from dataclasses import dataclass, field
+from enum import Enum
+from types import BuiltinFunctionType, FunctionType, ModuleType
+from typing import TYPE_CHECKING
+
+from plox.logger import write
+from plox.optimizer import count_nodes
+from plox.parser import PrattParser
+from plox.scanner import FastScanner
+
+if TYPE_CHECKING:
+    from plox import main
+
+# Number of allocation sites listed per phase.
+TOP_SITES: int = 5
+
+# Objects shared by every run, left out of the breakdown by type.
+_SHARED = (
+    type,
+    ModuleType,
+    FunctionType,
+    BuiltinFunctionType,
+    Enum,
+    bool,
+    type(None),
+)
+
+
+@dataclass
+class PhaseMemory:
+    """Traced memory at the end of a phase, relative to the start of the run."""
+
+    name: str
+    peak: int
+    retained: int
+    # the lines that allocated the most during the phase: (site, bytes, blocks)
+    sites: list[tuple[str, int, int]]
+
+
+@dataclass
+class TypeUsage:
+    count: int = 0
+    size: int = 0
+
+
+@dataclass
+class MemoryReport:
+    phases: list[PhaseMemory] = field(default_factory=list)
+    tokens: int = 0
+    nodes: int = 0
+    token_types: dict[str, TypeUsage] = field(default_factory=dict)
+    tree_types: dict[str, TypeUsage] = field(default_factory=dict)
+    had_error: bool = False
+
+    def format(self) -> str:
+        lines = [f"{'phase':<12}{'peak KiB':>12}{'retained KiB':>14}"]
+        for phase in self.phases:
+            lines.append(
+                f"{phase.name:<12}{phase.peak / 1024:>12.1f}"
+                f"{phase.retained / 1024:>14.1f}"
+            )
+        scanned = self.retained("scan")
+        parsed = self.retained("parse")
+        if self.tokens:
+            lines.append(f"{scanned / self.tokens:.1f} bytes per token")
+        if self.nodes:
+            lines.append(f"{(parsed - scanned) / self.nodes:.1f} bytes per node")
+
+        for title, usage in (
+            (f"{self.tokens} tokens", self.token_types),
+            (f"{self.nodes} nodes, beyond the tokens", self.tree_types),
+        ):
+            lines.append("")
+            lines.append(f"{title:<34}{'count':>10}{'KiB':>12}")
+            for name, stats in sorted(
+                usage.items(), key=lambda item: item[1].size, reverse=True
+            ):
+                lines.append(f"  {name:<32}{stats.count:>10}{stats.size / 1024:>12.1f}")
+
+        for phase in self.phases:
+            lines.append("")
+            lines.append(f"largest allocations in {phase.name}:")
+            for site, size, blocks in phase.sites:
+                lines.append(f"  {size / 1024:>10.1f} KiB {blocks:>8} blocks  {site}")
+        return "\n".join(lines)
+
+    def retained(self, name: str) -> int:
+        for phase in self.phases:
+            if phase.name == name:
+                return phase.retained
+        return 0
+
+
+def measure_objects(root: object, seen: set[int]) -> dict[str, TypeUsage]:
+    """
+    The objects reachable from `root` and not in `seen`, by type, with their
+    `sys.getsizeof` sizes. Types, functions, modules, enum members and
+    singletons are shared by every run and left out. Adds the objects
+    visited to `seen`.
+    """
+    usage: dict[str, TypeUsage] = defaultdict(TypeUsage)
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _SHARED):
+            continue
+        seen.add(id(obj))
+        stats = usage[type(obj).__name__]
+        stats.count += 1
+        stats.size += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+    return dict(usage)
+
+
+class _Tracer:
+    """
+    Records the traced memory of the phases of a run. Snapshots are only
+    taken during the run, and analyzed once tracing has stopped, so that
+    analyzing them allocates nothing that is traced.
+    """
+
+    def __init__(self) -> None:
+        self.phases: list[tuple[str, int, tracemalloc.Snapshot]] = []
+        self.snapshot = tracemalloc.take_snapshot()
+        self.traced = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+
+    def end_phase(self, name: str) -> None:
+        # growth of the peak over the traced memory at the start of the
+        # phase, which includes the snapshots taken so far
+        growth = tracemalloc.get_traced_memory()[1] - self.traced
+        self.phases.append((name, growth, tracemalloc.take_snapshot()))
+        self.traced = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+
+    def report(self, report: MemoryReport) -> None:
+        # the snapshots are traced too: leave out what they allocated
+        filters = (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        )
+        previous = self.snapshot.filter_traces(filters)
+        baseline = retained = self.size(previous)
+        for name, growth, snapshot in self.phases:
+            snapshot = snapshot.filter_traces(filters)
+            peak = retained - baseline + growth
+            retained = self.size(snapshot)
+            sites = [
+                (str(stat.traceback), stat.size_diff, stat.count_diff)
+                for stat in snapshot.compare_to(previous, "lineno")[:TOP_SITES]
+                if stat.size_diff > 0
+            ]
+            report.phases.append(PhaseMemory(name, peak, retained - baseline, sites))
+            previous = snapshot
+
+    def size(self, snapshot: tracemalloc.Snapshot) -> int:
+        return sum(stat.size for stat in snapshot.statistics("filename"))
+
+
+def measure_run(source: str, options: "main.RunOptions | None" = None) -> MemoryReport:
+    """
+    Run `source` as `plox.main.run` does, under `tracemalloc`, and account
+    for the memory of every phase.
+    """
+    # imported here: plox.main imports this module
+    from plox import main
+
+    options = options or main.RunOptions()
+    report = MemoryReport()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        tracer = _Tracer()
+        scanner = FastScanner(source)
+        tracer.end_phase("scan")
+        expr = PrattParser(scanner.tokens).parse()
+        tracer.end_phase("parse")
+        if expr is None:
+            write("Error was had in parsing.")
+            report.had_error = True
+        else:
+            prepared = main.prepare(expr, options, options.make_optimizer())
+            engine = options.make_engine()
+            if prepared is None:
+                report.had_error = True
+            else:
+                engine.interpret(prepared)
+            tracer.end_phase("evaluate")
+    finally:
+        tracemalloc.stop()
+    tracer.report(report)
+
+    seen: set[int] = set()
+    report.tokens = len(scanner.tokens)
+    report.token_types = measure_objects(scanner.tokens, seen)
+    if expr is not None:
+        report.nodes = count_nodes(expr)
+        report.tree_types = measure_objects(expr, seen)
+    return report
@@ -0,0 +1,149 @@
+from plox.errors import PloxRuntimeError
+from plox.expression import (
+    AssignExpr,
+    BinaryExpr,
+    Expr,
+    GroupingExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr,
+    Visitor,
+    visits,
+)
+from plox.interpreter import Interpreter
+from plox.ptoken import PTokenType
+
+# Binary operators that always produce a number, or raise.
+_NUMERIC_OPERATORS = frozenset({PTokenType.MINUS, PTokenType.STAR, PTokenType.SLASH})
+
+# Binary operators that always produce a boolean, or raise.
+_BOOLEAN_OPERATORS = frozenset(
+    {
+        PTokenType.GREATER,
+        PTokenType.GREATER_EQUAL,
+        PTokenType.LESS,
+        PTokenType.LESS_EQUAL,
+        PTokenType.EQUAL_EQUAL,
+        PTokenType.BANG_EQUAL,
+    }
+)
+
+
+def count_nodes(expr: Expr) -> int:
+    """Count the nodes of an expression tree."""
+    count = 0
+    stack = [expr]
+    while stack:
+        node = stack.pop()
+        count += 1
+        match node:
+            case BinaryExpr():
+                stack.append(node.left)
+                stack.append(node.right)
+            case UnaryExpr():
+                stack.append(node.right)
+            case GroupingExpr():
+                stack.append(node.expression)
+            case AssignExpr():
+                stack.append(node.value)
+    return count
+
+
+def is_number(expr: Expr) -> bool:
+    """Whether `expr` evaluates to a number whenever it does not raise."""
+    match expr:
+        case LiteralExpr():
+            return type(expr.value) is float
+        case UnaryExpr():
+            return expr.operator.type == PTokenType.MINUS
+        case BinaryExpr():
+            return expr.operator.type in _NUMERIC_OPERATORS
+    return False
+
+
+def is_boolean(expr: Expr) -> bool:
+    """Whether `expr` evaluates to a boolean whenever it does not raise."""
+    match expr:
+        case LiteralExpr():
+            return type(expr.value) is bool
+        case UnaryExpr():
+            return expr.operator.type == PTokenType.BANG
+        case BinaryExpr():
+            return expr.operator.type in _BOOLEAN_OPERATORS
+    return False
+
+
+class Optimizer(Visitor[Expr]):
+    """
+    Rewrite an expression tree into a smaller one that evaluates the same.
+
+    At level 1, `GroupingExpr` wrappers are dropped and operators whose
+    operands are all literals are folded into a literal. At level 2, `--x`
+    and `!!x` also collapse to `x` when `x` is already a number or a boolean.
+    A subexpression that raises `PloxRuntimeError` is kept, so the error is
+    still reported at runtime against the same token. The input tree is not
+    modified; `removed` counts the nodes optimized away so far.
+    """
+
+    def __init__(self, level: int = 1) -> None:
+        self.level = level
+        self.removed = 0
+        self.evaluator = Interpreter()
+
+    def optimize(self, expr: Expr) -> Expr:
+        if self.level <= 0:
+            return expr
+        optimized = self.visit(expr)
+        self.removed += count_nodes(expr) - count_nodes(optimized)
+        return optimized
+
+    @visits(AssignExpr)
+    def visit_assign(self, expr: AssignExpr) -> Expr:
+        return AssignExpr(expr.name, self.visit(expr.value))
+
+    @visits(LiteralExpr)
+    def visit_literal(self, expr: LiteralExpr) -> Expr:
+        return expr
+
+    @visits(VariableExpr)
+    def visit_variable(self, expr: VariableExpr) -> Expr:
+        return expr
+
+    @visits(GroupingExpr)
+    def visit_grouping(self, expr: GroupingExpr) -> Expr:
+        return self.visit(expr.expression)
+
+    @visits(UnaryExpr)
+    def visit_unary(self, expr: UnaryExpr) -> Expr:
+        right = self.visit(expr.right)
+        if isinstance(right, LiteralExpr):
+            try:
+                return LiteralExpr(
+                    self.evaluator.apply_unary(expr.operator, right.value)
+                )
+            except PloxRuntimeError:
+                pass
+        elif (
+            self.level >= 2
+            and isinstance(right, UnaryExpr)
+            and right.operator.type == expr.operator.type
+        ):
+            match expr.operator.type:
+                case PTokenType.MINUS if is_number(right.right):
+                    return right.right
+                case PTokenType.BANG if is_boolean(right.right):
+                    return right.right
+        return UnaryExpr(expr.operator, right)
+
+    @visits(BinaryExpr)
+    def visit_binary(self, expr: BinaryExpr) -> Expr:
+        left = self.visit(expr.left)
+        right = self.visit(expr.right)
+        if isinstance(left, LiteralExpr) and isinstance(right, LiteralExpr):
+            try:
+                return LiteralExpr(
+                    self.evaluator.apply_binary(expr.operator, left.value, right.value)
+                )
+            except PloxRuntimeError:
+                pass
+        return BinaryExpr(left, expr.operator, right)
@@ -1,6 +1,24 @@
-from plox.ptoken import PToken, PTokenType
-from plox.expression import Expr, BinaryExpr, UnaryExpr, LiteralExpr, GroupingExpr
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
 from plox.errors import PloxSyntaxError
+from plox.expression import (
+    BinaryExpr,
+    Expr,
+    GroupingExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr,
+)
+from plox.logger import write
+from plox.ptoken import (
+    TOKEN_CODES,
+    PToken,
+    PTokenType,
+    TokenBuffer,
+    TokenLike,
+    TokenSequence,
+)
 
 
 class Parser:
@@ -14,11 +32,12 @@ class Parser:
     term           → factor ( ( "-" | "+" ) factor )*
     factor         → unary ( ( "/" | "*" ) unary )*
     unary          → ( "!" | "-" ) unary | primary
-    primary        → NUMBER | STRING | "true" | "false" | "nil" | "(" expression ")"
+    primary        → NUMBER | STRING | "true" | "false" | "nil" | IDENTIFIER
+                   | "(" expression ")"
     """
 
-    def __init__(self, tokens: list[PToken]) -> None:
-        self.tokens: list[PToken] = tokens
+    def __init__(self, tokens: TokenSequence) -> None:
+        self.tokens: TokenSequence = tokens
         self.curr: int = 0
 
     def expression(self) -> Expr:
@@ -28,7 +47,7 @@ class Parser:
         expr: Expr = self.comparison()
 
         while self.match(PTokenType.EQUAL_EQUAL, PTokenType.BANG_EQUAL):
-            operator: PToken = self.prev()
+            operator: TokenLike = self.prev()
             right_expr = self.comparison()
             expr = BinaryExpr(left=expr, operator=operator, right=right_expr)
 
@@ -43,7 +62,7 @@ class Parser:
             PTokenType.LESS,
             PTokenType.LESS_EQUAL,
         ):
-            operator: PToken = self.prev()
+            operator: TokenLike = self.prev()
             right_expr = self.term()
             expr = BinaryExpr(left=expr, operator=operator, right=right_expr)
 
@@ -53,7 +72,7 @@ class Parser:
         expr: Expr = self.factor()
 
         while self.match(PTokenType.MINUS, PTokenType.PLUS):
-            operator: PToken = self.prev()
+            operator: TokenLike = self.prev()
             right_expr = self.factor()
             expr = BinaryExpr(left=expr, operator=operator, right=right_expr)
 
@@ -63,7 +82,7 @@ class Parser:
         expr: Expr = self.unary()
 
         while self.match(PTokenType.STAR, PTokenType.SLASH):
-            operator: PToken = self.prev()
+            operator: TokenLike = self.prev()
             right_expr = self.unary()
             expr = BinaryExpr(left=expr, operator=operator, right=right_expr)
 
@@ -71,7 +90,7 @@ class Parser:
 
     def unary(self) -> Expr:
         if self.match(PTokenType.BANG, PTokenType.MINUS):
-            operator: PToken = self.prev()
+            operator: TokenLike = self.prev()
             right_expr = self.unary()
             return UnaryExpr(operator=operator, right=right_expr)
 
@@ -86,11 +105,13 @@ class Parser:
             return LiteralExpr(None)
         if self.match(PTokenType.NUMBER, PTokenType.STRING):
             return LiteralExpr(self.prev().literal)
+        if self.match(PTokenType.IDENTIFIER):
+            return VariableExpr(self.prev())
         if self.match(PTokenType.LEFT_PAREN):
             expr: Expr = self.expression()
             self.consume(PTokenType.RIGHT_PAREN, "Expected ')' after expression.")
             return GroupingExpr(expr)
-        raise PloxSyntaxError('Expected expression', self.peek())
+        raise PloxSyntaxError("Expected expression", self.peek())
 
     def match(self, *types: PTokenType):
         for token_type in types:
@@ -104,7 +125,7 @@ class Parser:
             return False
         return self.peek().type == tokenType
 
-    def advance(self) -> PToken:
+    def advance(self) -> TokenLike:
         if not self.is_at_end():
             self.curr += 1
         return self.prev()
@@ -112,15 +133,15 @@ class Parser:
     def is_at_end(self) -> bool:
         return self.peek().type == PTokenType.EOF
 
-    def peek(self) -> PToken:
+    def peek(self) -> TokenLike:
         return self.tokens[self.curr]
 
-    def prev(self) -> PToken:
+    def prev(self) -> TokenLike:
         if self.curr == 0:
             raise IndexError("Called prev() on first token")
         return self.tokens[self.curr - 1]
 
-    def consume(self, tokenType: PTokenType, message: str) -> PToken:
+    def consume(self, tokenType: PTokenType, message: str) -> TokenLike:
         if self.check(tokenType):
             return self.advance()
         raise PloxSyntaxError(message, self.peek())
@@ -145,10 +166,251 @@ class Parser:
                 return
             else:
                 self.advance()
-    
+
     def parse(self) -> Expr | None:
         try:
             return self.expression()
         except PloxSyntaxError as e:
-            print(e)
+            write(str(e))
             return None
+
+
+class PrattParser(Parser):
+    """
+    Parses a list of tokens into an expression, without recursion
+
+    It accepts the same grammar and builds the same trees as `Parser`, but
+    resolves precedence with a binding-power table and explicit operand and
+    operator stacks (precedence climbing), so the nesting depth of the input
+    is only bounded by memory and every operand costs a single loop
+    iteration instead of a descent through every precedence level.
+    """
+
+    def expression(self) -> Expr:
+        operands: list[Expr] = []
+        # (binding power, operator token); opening parentheses are kept with
+        # a binding power of 0, so reductions stop at them
+        operators: list[tuple[int, TokenLike]] = []
+
+        while True:
+            # operand position: any prefix operators, then a primary
+            token = self.peek()
+            token_type = token.type
+            if token_type in _PREFIX_OPERATORS:
+                self.advance()
+                operators.append((_UNARY_BINDING_POWER, token))
+                continue
+            if token_type == PTokenType.LEFT_PAREN:
+                self.advance()
+                operators.append((_GROUP_BINDING_POWER, token))
+                continue
+            if token_type in _LITERAL_VALUES:
+                self.advance()
+                operands.append(LiteralExpr(_LITERAL_VALUES[token_type]))
+            elif token_type == PTokenType.NUMBER or token_type == PTokenType.STRING:
+                self.advance()
+                operands.append(LiteralExpr(token.literal))
+            elif token_type == PTokenType.IDENTIFIER:
+                self.advance()
+                operands.append(VariableExpr(token))
+            else:
+                raise PloxSyntaxError("Expected expression", token)
+
+            # operator position: close groups until an infix operator follows
+            while True:
+                token = self.peek()
+                power = _BINARY_BINDING_POWERS.get(token.type)
+                if power is not None:
+                    self.reduce(operands, operators, power)
+                    self.advance()
+                    operators.append((power, token))
+                    break
+
+                self.reduce(operands, operators, _GROUP_BINDING_POWER + 1)
+                if not operators:
+                    return operands.pop()
+                self.consume(PTokenType.RIGHT_PAREN, "Expected ')' after expression.")
+                operators.pop()
+                operands.append(GroupingExpr(operands.pop()))
+
+    def reduce(
+        self,
+        operands: list[Expr],
+        operators: list[tuple[int, TokenLike]],
+        power: int,
+    ) -> None:
+        """Fold every stacked operator binding at least as tightly as `power`."""
+        while operators and operators[-1][0] >= power:
+            operator_power, operator = operators.pop()
+            if operator_power == _UNARY_BINDING_POWER:
+                operands[-1] = UnaryExpr(operator=operator, right=operands[-1])
+            else:
+                right_expr = operands.pop()
+                operands[-1] = BinaryExpr(
+                    left=operands[-1], operator=operator, right=right_expr
+                )
+
+
+_GROUP_BINDING_POWER: int = 0
+_UNARY_BINDING_POWER: int = 5
+_BINARY_BINDING_POWERS: dict[PTokenType, int] = {
+    PTokenType.EQUAL_EQUAL: 1,
+    PTokenType.BANG_EQUAL: 1,
+    PTokenType.GREATER: 2,
+    PTokenType.GREATER_EQUAL: 2,
+    PTokenType.LESS: 2,
+    PTokenType.LESS_EQUAL: 2,
+    PTokenType.MINUS: 3,
+    PTokenType.PLUS: 3,
+    PTokenType.STAR: 4,
+    PTokenType.SLASH: 4,
+}
+_PREFIX_OPERATORS: frozenset[PTokenType] = frozenset(
+    (PTokenType.BANG, PTokenType.MINUS)
+)
+_LITERAL_VALUES: dict[PTokenType, object] = {
+    PTokenType.FALSE: False,
+    PTokenType.TRUE: True,
+    PTokenType.NIL: None,
+}
+
+
+class CompactParser(Parser):
+    """
+    Parses the tokens of a `TokenBuffer`
+
+    Tokens are still handed out as `TokenView`s, but the hot `check` and
+    `is_at_end` tests compare type codes straight from the buffer's type
+    column instead of creating a view for every lookahead.
+    """
+
+    def __init__(self, tokens: TokenBuffer) -> None:
+        super().__init__(tokens)
+        self.types = tokens.types
+
+    def check(self, tokenType: PTokenType) -> bool:
+        code = self.types[self.curr]
+        return code == TOKEN_CODES[tokenType] and code != _EOF_CODE
+
+    def is_at_end(self) -> bool:
+        return self.types[self.curr] == _EOF_CODE
+
+
+_EOF_CODE: int = TOKEN_CODES[PTokenType.EOF]
+
+
+@dataclass(slots=True)
+class ParsedGroup:
+    """A parenthesized expression parsed by an `IncrementalParser`."""
+
+    node: GroupingExpr
+    # number of tokens after the opening parenthesis, the closing one included
+    width: int
+    # the groups directly inside this one, by opening parenthesis
+    groups: dict[TokenLike, "ParsedGroup"]
+
+
+class IncrementalParser(Parser):
+    """
+    Parses the tokens of an edited source, reusing the subtrees of the
+    previous parse that the edit left alone
+
+    The unit of reuse is the parenthesized group: it parses the same way
+    whatever surrounds it, so a group whose tokens all lie before or after
+    the new tokens is taken whole from the previous parse, in one step.
+    Only the groups that enclose the edit are parsed again, and each of them
+    only at its own level, since the groups nested in it are reused too.
+
+    `groups` are the outermost groups of the previous parse, as left in
+    `groups` by the parser that made it, and `damage` the indices of the
+    tokens that replaced those the previous parse saw. Tokens are compared
+    by identity, so the unchanged ones must be the same `PToken` objects,
+    as an `IncrementalScanner` keeps them.
+    """
+
+    def __init__(
+        self,
+        tokens: TokenSequence,
+        groups: dict[TokenLike, ParsedGroup] | None = None,
+        damage: range = range(0),
+    ) -> None:
+        super().__init__(tokens)
+        self.damage: range = damage
+        self.previous: dict[TokenLike, ParsedGroup] = groups or {}
+        self.groups: dict[TokenLike, ParsedGroup] = {}
+
+    def primary(self) -> Expr:
+        if not self.check(PTokenType.LEFT_PAREN):
+            return super().primary()
+        start = self.curr
+        token = self.peek()
+        old = self.previous.get(token)
+        if old is not None and (
+            start + old.width < self.damage.start or start >= self.damage.stop
+        ):
+            self.curr = start + old.width + 1
+            self.groups[token] = old
+            return old.node
+
+        self.advance()
+        outer, previous = self.groups, self.previous
+        self.groups = {}
+        if old is not None:
+            self.previous = old.groups
+        try:
+            expr: Expr = self.expression()
+            self.consume(PTokenType.RIGHT_PAREN, "Expected ')' after expression.")
+            group = ParsedGroup(GroupingExpr(expr), self.curr - 1 - start, self.groups)
+        finally:
+            self.groups, self.previous = outer, previous
+        self.groups[token] = group
+        return group.node
+
+
+class StreamingParser(Parser):
+    """
+    Parses a lazily produced token stream into a sequence of expressions
+
+    Instead of indexing into a fully materialized token list, it pulls tokens
+    from an iterator and only remembers the current and the previous one,
+    which is all the lookahead the grammar needs. It parses a batch of
+    expressions, each terminated by ";" (optional for the last one):
+    batch          → ( expression ( ";" | EOF ) )* EOF
+    """
+
+    def __init__(self, tokens: Iterable[PToken]) -> None:
+        self.stream: Iterator[PToken] = iter(tokens)
+        self.current: PToken = next(self.stream)
+        self.previous: PToken | None = None
+        self.had_error: bool = False
+
+    def advance(self) -> TokenLike:
+        if not self.is_at_end():
+            self.previous = self.current
+            self.current = next(self.stream)
+        return self.prev()
+
+    def peek(self) -> TokenLike:
+        return self.current
+
+    def prev(self) -> TokenLike:
+        if self.previous is None:
+            raise IndexError("Called prev() on first token")
+        return self.previous
+
+    def parse_stream(self) -> Iterator[Expr]:
+        """
+        Yields every expression of the batch as soon as it has been parsed,
+        reporting syntax errors and skipping ahead to the next expression
+        """
+        while not self.is_at_end():
+            try:
+                expr: Expr = self.expression()
+                if not self.is_at_end():
+                    self.consume(PTokenType.SEMICOLON, "Expected ';' after expression.")
+            except PloxSyntaxError as e:
+                write(str(e))
+                self.had_error = True
+                self.synchronize()
+                continue
+            yield expr
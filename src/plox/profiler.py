@@ -0,0 +1,167 @@
+"""
+Profiling of a run, as `plox --profile`.
+
+A `Profile` collects the wall time of each phase of a run (scanning,
+parsing, optimizing, type checking, evaluation) and the net change in live
+memory blocks over it, or that the phase was skipped thanks to the cache,
+and `ProfilingInterpreter` counts the evaluations
+of every node type and operator with their cumulative time. Nothing here
+is on the path of a run without `--profile`: the phases are timed once
+per phase, and per-node counting happens only in the interpreter subclass.
+"""
+
+import json
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Iterator, Mapping
+
+from plox.expression import BinaryExpr, Expr, UnaryExpr
+from plox.interpreter import Interpreter
+
+
+@dataclass
+class PhaseStats:
+    """The totals of one phase over every time it ran."""
+
+    calls: int = 0
+    seconds: float = 0.0
+    # change in the number of live memory blocks, as per
+    # sys.getallocatedblocks: allocations minus frees, not allocations.
+    # Counting allocations would take tracing them all with tracemalloc,
+    # which slows the phases it measures several times over.
+    net_blocks: int = 0
+    # times the phase was skipped, its result loaded from the cache
+    cached: int = 0
+
+
+@dataclass
+class EvaluationStats:
+    """The evaluations of one node type or operator."""
+
+    count: int = 0
+    # time spent in the node including its operands, counted once for
+    # nested nodes of the same kind, and time excluding the operands
+    seconds: float = 0.0
+    self_seconds: float = 0.0
+
+
+class Profile:
+    """The measurements of one or more runs."""
+
+    def __init__(self) -> None:
+        self.phases: dict[str, PhaseStats] = defaultdict(PhaseStats)
+        self.nodes: dict[str, EvaluationStats] = defaultdict(EvaluationStats)
+        self.operators: dict[str, EvaluationStats] = defaultdict(EvaluationStats)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats = self.phases[name]
+            stats.seconds += time.perf_counter() - start
+            stats.net_blocks += sys.getallocatedblocks() - blocks
+            stats.calls += 1
+
+    def cached(self, name: str) -> None:
+        """Record that the phase `name` was skipped thanks to the cache."""
+        self.phases[name].cached += 1
+
+    def to_dict(self) -> dict[str, dict[str, dict[str, object]]]:
+        return {
+            "phases": {name: asdict(stats) for name, stats in self.phases.items()},
+            "nodes": {name: asdict(stats) for name, stats in self.nodes.items()},
+            "operators": {
+                name: asdict(stats) for name, stats in self.operators.items()
+            },
+        }
+
+    def format_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def format_table(self) -> str:
+        lines = [
+            f"{'phase':<14}{'calls':>8}{'wall ms':>12}{'net live blocks':>17}"
+            f"{'cached':>8}"
+        ]
+        for name, phase in self.phases.items():
+            if phase.calls:
+                lines.append(
+                    f"{name:<14}{phase.calls:>8}{phase.seconds * 1000:>12.3f}"
+                    f"{phase.net_blocks:>17}{phase.cached:>8}"
+                )
+            else:
+                lines.append(f"{name:<14}{0:>8}{'-':>12}{'-':>17}{phase.cached:>8}")
+        for title, table in (("node", self.nodes), ("operator", self.operators)):
+            if not table:
+                continue
+            lines.append("")
+            lines.append(f"{title:<22}{'count':>10}{'total ms':>12}{'self ms':>12}")
+            for name, stats in sorted(
+                table.items(), key=lambda item: item[1].self_seconds, reverse=True
+            ):
+                lines.append(
+                    f"{name:<22}{stats.count:>10}{stats.seconds * 1000:>12.3f}"
+                    f"{stats.self_seconds * 1000:>12.3f}"
+                )
+        return "\n".join(lines)
+
+
+class ProfilingInterpreter(Interpreter):
+    """
+    An `Interpreter` that records the evaluations of every node type and
+    every operator in a `Profile`.
+    """
+
+    def __init__(
+        self, profile: Profile, environment: Mapping[str, object] | None = None
+    ) -> None:
+        super().__init__(environment)
+        self.profile = profile
+        # time spent so far in the operands of the node being evaluated
+        self.operand_seconds = 0.0
+        # evaluations in progress per node type and operator: as in cProfile,
+        # only the outermost one adds its time to `seconds`, which would
+        # otherwise count the time of nested nodes once per level
+        self.active: dict[str, int] = defaultdict(int)
+
+    def evaluate(self, expr: Expr) -> object:
+        node = type(expr).__name__
+        operator = None
+        if isinstance(expr, (UnaryExpr, BinaryExpr)):
+            operator = expr.operator.type.name
+            if isinstance(expr, UnaryExpr):
+                operator = "unary " + operator
+            self.active["operator " + operator] += 1
+        self.active[node] += 1
+        outer = self.operand_seconds
+        self.operand_seconds = 0.0
+        start = time.perf_counter()
+        try:
+            return expr.accept(self)
+        finally:
+            elapsed = time.perf_counter() - start
+            self_seconds = elapsed - self.operand_seconds
+            self.operand_seconds = outer + elapsed
+            self.record(self.profile.nodes[node], node, elapsed, self_seconds)
+            if operator is not None:
+                self.record(
+                    self.profile.operators[operator],
+                    "operator " + operator,
+                    elapsed,
+                    self_seconds,
+                )
+
+    def record(
+        self, stats: EvaluationStats, key: str, elapsed: float, self_seconds: float
+    ) -> None:
+        stats.count += 1
+        stats.self_seconds += self_seconds
+        self.active[key] -= 1
+        if not self.active[key]:
+            stats.seconds += elapsed
@@ -1,5 +1,10 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
 from enum import Enum, auto
-from typing import Any
+from typing import Any, Iterator, Protocol
+
 
 class PTokenType(Enum):
     # Single-character tokens.
@@ -14,7 +19,7 @@ class PTokenType(Enum):
     SEMICOLON = auto()
     SLASH = auto()
     STAR = auto()
-    
+
     # One or two character tokens.
     BANG = auto()
     BANG_EQUAL = auto()
@@ -24,7 +29,7 @@ class PTokenType(Enum):
     GREATER_EQUAL = auto()
     LESS = auto()
     LESS_EQUAL = auto()
-    
+
     # Literals.
     IDENTIFIER = auto()
     STRING = auto()
@@ -47,24 +52,152 @@ class PTokenType(Enum):
     TRUE = auto()
     VAR = auto()
     WHILE = auto()
-    
+
     # Special tokens.
     EOF = auto()
 
     # only while in development
     UNIMPLEMENTED = auto()
 
+
 class PToken:
-    def __init__(self, 
-        type: PTokenType, 
-        lexeme: str, 
-        literal: Any, 
-        line: int
-    ) -> None:
+    def __init__(self, type: PTokenType, lexeme: str, literal: Any, line: int) -> None:
         self.type = type
         self.lexeme = lexeme
         self.literal = literal
         self.line = line
-    
-    def __str__(self) -> str: return f"<{self.type}> {self.lexeme} {self.literal}"
-    def __repr__(self) -> str: return self.__str__()
+
+    def __str__(self) -> str:
+        return f"<{self.type}> {self.lexeme} {self.literal}"
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+# Compact token codes, indexed by `TokenBuffer.types`.
+TOKEN_TYPES: tuple[PTokenType, ...] = tuple(PTokenType)
+TOKEN_CODES: dict[PTokenType, int] = {
+    token_type: code for code, token_type in enumerate(TOKEN_TYPES)
+}
+
+
+class TokenBuffer:
+    """
+    Struct-of-arrays storage for a token stream.
+
+    Tokens are kept as parallel `array` columns (type code, start offset,
+    end offset, literal index) into the source instead of one `PToken`
+    object each. Lexemes are sliced from the source only when asked for,
+    lines are looked up in a table of line start offsets, and literal
+    values (and identifier names) are interned in a shared table.
+    """
+
+    def __init__(self, source: str) -> None:
+        offset_code = "I" if len(source) < 2**32 else "Q"
+        self.source: str = source
+        self.types: array[int] = array("B")
+        self.starts: array[int] = array(offset_code)
+        self.ends: array[int] = array(offset_code)
+        self.literal_ids: array[int] = array("i")
+        self.literals: list[Any] = []
+        self.literal_index: dict[Any, int] = {}
+        self.line_starts: array[int] = array(offset_code, [0])
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, index: int) -> TokenView:
+        if index < 0:
+            index += len(self.types)
+        if not 0 <= index < len(self.types):
+            raise IndexError("token index out of range")
+        return TokenView(self, index)
+
+    def __iter__(self) -> Iterator[TokenView]:
+        for index in range(len(self.types)):
+            yield TokenView(self, index)
+
+    def intern(self, value: Any) -> int:
+        """Return the literal table index for `value`, adding it if needed."""
+        index = self.literal_index.get(value)
+        if index is None:
+            index = self.literal_index[value] = len(self.literals)
+            self.literals.append(value)
+        return index
+
+    def type_of(self, index: int) -> PTokenType:
+        return TOKEN_TYPES[self.types[index]]
+
+    def lexeme_of(self, index: int) -> str:
+        if self.types[index] == _IDENTIFIER_CODE:
+            name: str = self.literals[self.literal_ids[index]]
+            return name
+        return self.source[self.starts[index] : self.ends[index]]
+
+    def literal_of(self, index: int) -> Any:
+        literal_id = self.literal_ids[index]
+        if literal_id < 0 or self.types[index] == _IDENTIFIER_CODE:
+            return None
+        return self.literals[literal_id]
+
+    def line_of(self, index: int) -> int:
+        # a token belongs to the line its last character is on, which matches
+        # `Scanner` counting the newlines of a string before adding its token
+        start, end = self.starts[index], self.ends[index]
+        return bisect_right(self.line_starts, end - 1 if end > start else start)
+
+    def to_token(self, index: int) -> PToken:
+        """Materialize the token at `index` as a standalone `PToken`."""
+        return PToken(
+            type=self.type_of(index),
+            lexeme=self.lexeme_of(index),
+            literal=self.literal_of(index),
+            line=self.line_of(index),
+        )
+
+
+_IDENTIFIER_CODE: int = TOKEN_CODES[PTokenType.IDENTIFIER]
+
+
+class TokenView:
+    """A lightweight, `PToken`-compatible handle to a `TokenBuffer` entry."""
+
+    __slots__ = ("buffer", "index")
+
+    def __init__(self, buffer: TokenBuffer, index: int) -> None:
+        self.buffer = buffer
+        self.index = index
+
+    @property
+    def type(self) -> PTokenType:
+        return TOKEN_TYPES[self.buffer.types[self.index]]
+
+    @property
+    def lexeme(self) -> str:
+        return self.buffer.lexeme_of(self.index)
+
+    @property
+    def literal(self) -> Any:
+        return self.buffer.literal_of(self.index)
+
+    @property
+    def line(self) -> int:
+        return self.buffer.line_of(self.index)
+
+    def __str__(self) -> str:
+        return f"<{self.type}> {self.lexeme} {self.literal}"
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+# Anything the parser, the AST and the error types accept as a token.
+TokenLike = PToken | TokenView
+
+
+class TokenSequence(Protocol):
+    """What the parsers read tokens from: a list of tokens or a `TokenBuffer`."""
+
+    def __len__(self) -> int: ...
+
+    def __getitem__(self, index: int, /) -> TokenLike: ...
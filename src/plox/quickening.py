@@ -0,0 +1,320 @@
+import operator
+from collections import Counter, OrderedDict
+from typing import ClassVar, Mapping
+
+from plox.expression import (
+    AssignExpr,
+    BinaryExpr,
+    Expr,
+    GroupingExpr,
+    LiteralExpr,
+    NumericBinaryExpr,
+    UnaryExpr,
+    VariableExpr,
+    Visitor,
+    visits,
+)
+from plox.interpreter import Interpreter, divide
+from plox.ptoken import PTokenType
+
+# Number of trees whose quickened copy a `QuickeningInterpreter` keeps.
+QUICKENED_TREES: int = 256
+
+
+class QuickenedBinaryExpr(BinaryExpr):
+    """
+    Base of the forms a `BinaryExpr` rewrites itself into. Subclasses only
+    change the class of an existing node, so they add no fields.
+    """
+
+    __slots__ = ()
+
+
+class FloatBinaryExpr(QuickenedBinaryExpr):
+    """A binary operator that has only ever seen two numbers."""
+
+    __slots__ = ()
+    # quoted: staticmethod is not subscriptable at runtime
+    operation: "ClassVar[staticmethod[[float, float], object]]"
+
+
+class FloatAddExpr(FloatBinaryExpr):
+    __slots__ = ()
+    operation = staticmethod(operator.add)
+
+
+class FloatSubtractExpr(FloatBinaryExpr):
+    __slots__ = ()
+    operation = staticmethod(operator.sub)
+
+
+class FloatMultiplyExpr(FloatBinaryExpr):
+    __slots__ = ()
+    operation = staticmethod(operator.mul)
+
+
+class FloatDivideExpr(FloatBinaryExpr):
+    __slots__ = ()
+    operation = staticmethod(divide)
+
+
+class FloatGreaterExpr(FloatBinaryExpr):
+    __slots__ = ()
+    operation = staticmethod(operator.gt)
+
+
+class FloatGreaterEqualExpr(FloatBinaryExpr):
+    __slots__ = ()
+    operation = staticmethod(operator.ge)
+
+
+class FloatLessExpr(FloatBinaryExpr):
+    __slots__ = ()
+    operation = staticmethod(operator.lt)
+
+
+class FloatLessEqualExpr(FloatBinaryExpr):
+    __slots__ = ()
+    operation = staticmethod(operator.le)
+
+
+class FloatEqualExpr(FloatBinaryExpr):
+    __slots__ = ()
+    operation = staticmethod(operator.eq)
+
+
+class FloatNotEqualExpr(FloatBinaryExpr):
+    __slots__ = ()
+    operation = staticmethod(operator.ne)
+
+
+class StringConcatExpr(QuickenedBinaryExpr):
+    """A `+` that has only ever seen two strings."""
+
+    __slots__ = ()
+
+
+class GenericBinaryExpr(QuickenedBinaryExpr):
+    """A binary operator whose specialization failed; it stays generic."""
+
+    __slots__ = ()
+
+
+class QuickenedUnaryExpr(UnaryExpr):
+    """Base of the forms a `UnaryExpr` rewrites itself into."""
+
+    __slots__ = ()
+
+
+class FloatNegateExpr(QuickenedUnaryExpr):
+    """A `-` that has only ever seen numbers."""
+
+    __slots__ = ()
+
+
+class NotExpr(QuickenedUnaryExpr):
+    """A `!`, which accepts any operand and so never needs a guard."""
+
+    __slots__ = ()
+
+
+class GenericUnaryExpr(QuickenedUnaryExpr):
+    """A unary operator whose specialization failed; it stays generic."""
+
+    __slots__ = ()
+
+
+_FLOAT_SPECIALIZATIONS: dict[PTokenType, type[FloatBinaryExpr]] = {
+    PTokenType.PLUS: FloatAddExpr,
+    PTokenType.MINUS: FloatSubtractExpr,
+    PTokenType.STAR: FloatMultiplyExpr,
+    PTokenType.SLASH: FloatDivideExpr,
+    PTokenType.GREATER: FloatGreaterExpr,
+    PTokenType.GREATER_EQUAL: FloatGreaterEqualExpr,
+    PTokenType.LESS: FloatLessExpr,
+    PTokenType.LESS_EQUAL: FloatLessEqualExpr,
+    PTokenType.EQUAL_EQUAL: FloatEqualExpr,
+    PTokenType.BANG_EQUAL: FloatNotEqualExpr,
+}
+
+
+class Copier(Visitor[Expr]):
+    """
+    Copy the nodes of an expression tree that quickening rewrites, and those
+    above them. Leaves are never rewritten, so the copy shares them.
+    """
+
+    @visits(AssignExpr)
+    def visit_assign(self, expr: AssignExpr) -> Expr:
+        return AssignExpr(expr.name, self.visit(expr.value))
+
+    @visits(LiteralExpr)
+    def visit_literal(self, expr: LiteralExpr) -> Expr:
+        return expr
+
+    @visits(VariableExpr)
+    def visit_variable(self, expr: VariableExpr) -> Expr:
+        return expr
+
+    @visits(GroupingExpr)
+    def visit_grouping(self, expr: GroupingExpr) -> Expr:
+        return GroupingExpr(self.visit(expr.expression))
+
+    @visits(UnaryExpr)
+    def visit_unary(self, expr: UnaryExpr) -> Expr:
+        return type(expr)(expr.operator, self.visit(expr.right))
+
+    @visits(BinaryExpr)
+    def visit_binary(self, expr: BinaryExpr) -> Expr:
+        return type(expr)(self.visit(expr.left), expr.operator, self.visit(expr.right))
+
+    @visits(NumericBinaryExpr)
+    def visit_numeric_binary(self, expr: NumericBinaryExpr) -> Expr:
+        return NumericBinaryExpr(
+            self.visit(expr.left),
+            expr.operator,
+            self.visit(expr.right),
+            expr.operation,
+        )
+
+
+class QuickeningInterpreter(Interpreter):
+    """
+    A tree-walking interpreter whose `BinaryExpr` and `UnaryExpr` nodes
+    rewrite themselves after their first evaluation.
+
+    A node that has seen only numbers (or, for `+`, only strings) changes
+    its class to a specialized form that skips the operator `match` and the
+    generic operand checks, guarded by a cheap exact type test. When a guard
+    fails the node deoptimizes to a generic form for good, like an inline
+    cache going megamorphic. `specialized` and `deoptimized` count the
+    rewrites by the name of the form involved.
+
+    Trees are shared: the parser caches, the disk cache and hash-consing
+    hand out the same nodes to every caller. Rewriting happens only on a
+    private copy made by `quicken`, which keeps the copies of the last
+    `QUICKENED_TREES` trees, so a tree interpreted again runs its already
+    specialized nodes.
+    """
+
+    def __init__(self, environment: Mapping[str, object] | None = None) -> None:
+        super().__init__(environment)
+        self.specialized: Counter[str] = Counter()
+        self.deoptimized: Counter[str] = Counter()
+        # id of a tree -> the tree, which keeps its id from being reused,
+        # and its quickened copy; least recently used first
+        self.quickened: OrderedDict[int, tuple[Expr, Expr]] = OrderedDict()
+
+    def interpret(self, expr: Expr) -> None:
+        super().interpret(self.quicken(expr))
+
+    def quicken(self, expr: Expr) -> Expr:
+        """The private copy of `expr`, whose nodes may rewrite themselves."""
+        key = id(expr)
+        entry = self.quickened.get(key)
+        if entry is not None:
+            self.quickened.move_to_end(key)
+            return entry[1]
+        copy = Copier().visit(expr)
+        self.quickened[key] = (expr, copy)
+        if len(self.quickened) > QUICKENED_TREES:
+            self.quickened.popitem(last=False)
+        return copy
+
+    def rewrite(self, expr: Expr, form: type[Expr]) -> None:
+        # only nodes of a copy made by `quicken` get here; they are frozen,
+        # so bypass their __setattr__
+        object.__setattr__(expr, "__class__", form)
+
+    @visits(BinaryExpr)
+    def visit_binary(self, expr: BinaryExpr) -> object:
+        leftObj = self.evaluate(expr.left)
+        rightObj = self.evaluate(expr.right)
+        value = self.apply_binary(expr.operator, leftObj, rightObj)
+
+        form: type[Expr] = GenericBinaryExpr
+        if type(leftObj) is float and type(rightObj) is float:
+            form = _FLOAT_SPECIALIZATIONS[expr.operator.type]
+        elif (
+            type(leftObj) is str
+            and type(rightObj) is str
+            and expr.operator.type == PTokenType.PLUS
+        ):
+            form = StringConcatExpr
+        self.rewrite(expr, form)
+        if form is not GenericBinaryExpr and form is not GenericUnaryExpr:
+            self.specialized[form.__name__] += 1
+        return value
+
+    @visits(FloatBinaryExpr)
+    def visit_float_binary(self, expr: FloatBinaryExpr) -> object:
+        leftObj = self.evaluate(expr.left)
+        rightObj = self.evaluate(expr.right)
+        if type(leftObj) is float and type(rightObj) is float:
+            return expr.operation(leftObj, rightObj)
+        return self.deoptimize_binary(expr, leftObj, rightObj)
+
+    @visits(StringConcatExpr)
+    def visit_string_concat(self, expr: StringConcatExpr) -> object:
+        leftObj = self.evaluate(expr.left)
+        rightObj = self.evaluate(expr.right)
+        if type(leftObj) is str and type(rightObj) is str:
+            return leftObj + rightObj
+        return self.deoptimize_binary(expr, leftObj, rightObj)
+
+    @visits(GenericBinaryExpr)
+    def visit_generic_binary(self, expr: GenericBinaryExpr) -> object:
+        leftObj = self.evaluate(expr.left)
+        rightObj = self.evaluate(expr.right)
+        return self.apply_binary(expr.operator, leftObj, rightObj)
+
+    @visits(UnaryExpr)
+    def visit_unary(self, expr: UnaryExpr) -> object:
+        rightObj = self.evaluate(expr.right)
+        value = self.apply_unary(expr.operator, rightObj)
+
+        form: type[Expr] = GenericUnaryExpr
+        if expr.operator.type == PTokenType.BANG:
+            form = NotExpr
+        elif type(rightObj) is float:
+            form = FloatNegateExpr
+        self.rewrite(expr, form)
+        if form is not GenericBinaryExpr and form is not GenericUnaryExpr:
+            self.specialized[form.__name__] += 1
+        return value
+
+    @visits(FloatNegateExpr)
+    def visit_float_negate(self, expr: FloatNegateExpr) -> object:
+        rightObj = self.evaluate(expr.right)
+        if type(rightObj) is float:
+            return -rightObj
+        self.deoptimized[type(expr).__name__] += 1
+        self.rewrite(expr, GenericUnaryExpr)
+        return self.apply_unary(expr.operator, rightObj)
+
+    @visits(NotExpr)
+    def visit_not(self, expr: NotExpr) -> object:
+        return not self.is_truthy(self.evaluate(expr.right))
+
+    @visits(GenericUnaryExpr)
+    def visit_generic_unary(self, expr: GenericUnaryExpr) -> object:
+        return self.apply_unary(expr.operator, self.evaluate(expr.right))
+
+    def deoptimize_binary(
+        self, expr: BinaryExpr, leftObj: object, rightObj: object
+    ) -> object:
+        self.deoptimized[type(expr).__name__] += 1
+        self.rewrite(expr, GenericBinaryExpr)
+        return self.apply_binary(expr.operator, leftObj, rightObj)
+
+    def report(self) -> str:
+        """Summarize the specializations and deoptimizations seen so far."""
+        lines = [
+            f"specialized: {sum(self.specialized.values())}, "
+            f"deoptimized: {sum(self.deoptimized.values())}"
+        ]
+        for form, count in sorted(self.specialized.items()):
+            lines.append(f"  {form}: {count} specialized")
+        for form, count in sorted(self.deoptimized.items()):
+            lines.append(f"  {form}: {count} deoptimized")
+        return "\n".join(lines)
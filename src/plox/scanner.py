@@ -1,6 +1,56 @@
-from plox.ptoken import PToken, PTokenType
-from plox.logger import error
-from typing import Any
+import os
+import re
+import sys
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from mmap import mmap
+from typing import Any, Callable, Iterable, Iterator
+
+from plox import logger
+from plox.logger import error, write
+from plox.ptoken import TOKEN_CODES, PToken, PTokenType, TokenBuffer
+
+KEYWORDS: dict[str, PTokenType] = {
+    "and": PTokenType.AND,
+    "class": PTokenType.CLASS,
+    "else": PTokenType.ELSE,
+    "false": PTokenType.FALSE,
+    "for": PTokenType.FOR,
+    "fun": PTokenType.FUN,
+    "if": PTokenType.IF,
+    "nil": PTokenType.NIL,
+    "or": PTokenType.OR,
+    "print": PTokenType.PRINT,
+    "return": PTokenType.RETURN,
+    "super": PTokenType.SUPER,
+    "this": PTokenType.THIS,
+    "true": PTokenType.TRUE,
+    "var": PTokenType.VAR,
+    "while": PTokenType.WHILE,
+}
+
+PUNCTUATORS: dict[str, PTokenType] = {
+    "(": PTokenType.LEFT_PAREN,
+    ")": PTokenType.RIGHT_PAREN,
+    "{": PTokenType.LEFT_BRACE,
+    "}": PTokenType.RIGHT_BRACE,
+    ",": PTokenType.COMMA,
+    ".": PTokenType.DOT,
+    "-": PTokenType.MINUS,
+    "+": PTokenType.PLUS,
+    ";": PTokenType.SEMICOLON,
+    "*": PTokenType.STAR,
+    "/": PTokenType.SLASH,
+    "!": PTokenType.BANG,
+    "!=": PTokenType.BANG_EQUAL,
+    "=": PTokenType.EQUAL,
+    "==": PTokenType.EQUAL_EQUAL,
+    "<": PTokenType.LESS,
+    "<=": PTokenType.LESS_EQUAL,
+    ">": PTokenType.GREATER,
+    ">=": PTokenType.GREATER_EQUAL,
+}
 
 
 class Scanner:
@@ -10,6 +60,7 @@ class Scanner:
         self.start: int = 0
         self.current: int = 0
         self.line: int = 1
+        self.had_error: bool = False
 
         self.scan_tokens()
 
@@ -147,6 +198,7 @@ class Scanner:
 
         if self.is_at_end():
             error(self.line, "Unterminated string")
+            self.had_error = True
             return
 
         # get the closing "
@@ -173,27 +225,698 @@ class Scanner:
             self.advance()
 
         identifierName: str = self.source[self.start : self.current]
-        reservedKeywords: list[str] = [
-            "and",
-            "class",
-            "else",
-            "false",
-            "for",
-            "fun",
-            "if",
-            "nil",
-            "or",
-            "print",
-            "return",
-            "super",
-            "this",
-            "true",
-            "var",
-            "while",
-        ]
-        if identifierName in reservedKeywords:
-            tokenType = PTokenType[identifierName.upper()]
-        else:
-            tokenType = PTokenType.IDENTIFIER
+        tokenType = KEYWORDS.get(identifierName, PTokenType.IDENTIFIER)
 
         self.add_token_simple(tokenType)
+
+
+# Leading blanks are folded into every match, the alternatives are ordered by
+# how often they occur in typical sources, and the final catch-all guarantees
+# that consecutive matches tile the whole source, so `finditer` never silently
+# skips a character. `FastScanner` dispatches on `match.lastindex`, which must
+# line up with the `_GROUP_*` constants below.
+_TOKEN_PATTERN = re.compile(
+    r"""
+    [ \t\r]*
+    (?:
+        ([!=<>]=?|[(){},.\-+;*]|/(?!/))    # punctuator
+        | ([0-9]+(?:\.[0-9]+)?)            # number
+        | ([A-Za-z_][A-Za-z0-9_]*)         # identifier or keyword
+        | (\n+)                            # newlines
+        | ("[^"]*")                        # string
+        | (//[^\n]*)                       # comment
+        | ("[^"]*)                         # unterminated string
+        | (.)                              # anything else
+        | \Z
+    )
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+_GROUP_PUNCTUATOR = 1
+_GROUP_NUMBER = 2
+_GROUP_IDENTIFIER = 3
+_GROUP_NEWLINE = 4
+_GROUP_STRING = 5
+_GROUP_COMMENT = 6
+_GROUP_UNTERMINATED = 7
+_GROUP_OTHER = 8
+
+# The same grammar over UTF-8 encoded bytes, for `BytesScanner`. Newlines are
+# any of "\r\n", "\r" and "\n", the way text mode reads a script, and a
+# non-ASCII character is matched as a whole UTF-8 sequence so that it still
+# becomes a single token.
+_BYTES_TOKEN_PATTERN = re.compile(
+    rb"""
+    [ \t]*
+    (?:
+        ([!=<>]=?|[(){},.\-+;*]|/(?!/))    # punctuator
+        | ([0-9]+(?:\.[0-9]+)?)            # number
+        | ([A-Za-z_][A-Za-z0-9_]*)         # identifier or keyword
+        | ((?:\r\n?|\n)+)                  # newlines
+        | ("[^"]*")                        # string
+        | (//[^\r\n]*)                     # comment
+        | ("[^"]*)                         # unterminated string
+        | ([\xc0-\xff][\x80-\xbf]*|.)       # anything else
+        | \Z
+    )
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+# Lexeme and token type of every punctuator and keyword, keyed by its bytes.
+_BYTES_PUNCTUATORS: dict[bytes, tuple[str, PTokenType]] = {
+    lexeme.encode("ascii"): (lexeme, token_type)
+    for lexeme, token_type in PUNCTUATORS.items()
+}
+_BYTES_KEYWORDS: dict[bytes, tuple[str, PTokenType]] = {
+    name.encode("ascii"): (name, token_type) for name, token_type in KEYWORDS.items()
+}
+
+# Sources shorter than this many characters are not worth a process pool.
+PARALLEL_THRESHOLD: int = 4 * 1024 * 1024
+
+# Strings (terminated or not) and comments, the only places where a newline
+# does not separate two tokens; used to find safe split points.
+_OPAQUE_PATTERN = re.compile(r'"[^"]*"?|//[^\n]*')
+
+# `TokenBuffer` type codes of the constant maps, for `CompactScanner`.
+_PUNCTUATOR_CODES: dict[str, int] = {
+    lexeme: TOKEN_CODES[token_type] for lexeme, token_type in PUNCTUATORS.items()
+}
+_KEYWORD_CODES: dict[str, int] = {
+    name: TOKEN_CODES[token_type] for name, token_type in KEYWORDS.items()
+}
+
+
+class FastScanner:
+    """
+    A drop-in replacement for `Scanner` that lexes with a single compiled
+    master regex instead of dispatching on one character at a time.
+
+    Whitespace, comments and string bodies are consumed in bulk by the regex
+    engine, keywords and punctuators are resolved through constant maps, and
+    the resulting token stream is identical to the one `Scanner` produces.
+    """
+
+    def __init__(self, source: str) -> None:
+        self.source: str = source
+        self.tokens: list[PToken] = []
+        self.line: int = 1
+        self.had_error: bool = False
+
+        self.scan_tokens()
+
+    def scan_tokens(self) -> None:
+        self.tokens.extend(scan_chunks((self.source,), self.error))
+        self.line = self.tokens[-1].line
+
+    def error(self, line: int | None, message: str) -> None:
+        error(line, message)
+        self.had_error = True
+
+
+class CompactScanner:
+    """
+    Lexes like `FastScanner`, but stores the tokens in a `TokenBuffer`
+    instead of allocating a `PToken` per token.
+    """
+
+    def __init__(self, source: str, line: int = 1) -> None:
+        self.source: str = source
+        self.tokens: TokenBuffer = TokenBuffer(source)
+        self.line: int = line
+
+        self.scan_tokens()
+
+    def scan_tokens(self) -> None:
+        tokens = self.tokens
+        add_type = tokens.types.append
+        add_start = tokens.starts.append
+        add_end = tokens.ends.append
+        add_literal = tokens.literal_ids.append
+        add_line = tokens.line_starts.append
+        intern = tokens.intern
+        punctuators = _PUNCTUATOR_CODES
+        keywords = _KEYWORD_CODES
+        identifier = TOKEN_CODES[PTokenType.IDENTIFIER]
+        number = TOKEN_CODES[PTokenType.NUMBER]
+        string = TOKEN_CODES[PTokenType.STRING]
+        unimplemented = TOKEN_CODES[PTokenType.UNIMPLEMENTED]
+        source = self.source
+        find = source.find
+        line = self.line
+
+        for match in _TOKEN_PATTERN.finditer(source):
+            group = match.lastindex
+            if group is None or group == _GROUP_COMMENT:
+                continue
+            start, end = match.span(group)
+            if group == _GROUP_PUNCTUATOR:
+                add_type(punctuators[match.group(group)])
+                add_literal(-1)
+            elif group == _GROUP_NUMBER:
+                add_type(number)
+                add_literal(intern(float(match.group(group))))
+            elif group == _GROUP_IDENTIFIER:
+                name = match.group(group)
+                keyword = keywords.get(name)
+                if keyword is None:
+                    add_type(identifier)
+                    add_literal(intern(sys.intern(name)))
+                else:
+                    add_type(keyword)
+                    add_literal(-1)
+            elif group == _GROUP_NEWLINE:
+                for offset in range(start + 1, end + 1):
+                    add_line(offset)
+                line += end - start
+                continue
+            elif group == _GROUP_STRING or group == _GROUP_UNTERMINATED:
+                newline = find("\n", start, end)
+                while newline != -1:
+                    add_line(newline + 1)
+                    line += 1
+                    newline = find("\n", newline + 1, end)
+                if group == _GROUP_UNTERMINATED:
+                    error(line, "Unterminated string")
+                    continue
+                add_type(string)
+                add_literal(intern(sys.intern(source[start + 1 : end - 1])))
+            else:
+                add_type(unimplemented)
+                add_literal(-1)
+            add_start(start)
+            add_end(end)
+
+        self.line = line
+        add_type(TOKEN_CODES[PTokenType.EOF])
+        add_start(len(source))
+        add_end(len(source))
+        add_literal(-1)
+
+
+class BytesScanner:
+    """
+    Lexes UTF-8 encoded source straight from a bytes-like buffer, such as a
+    memory-mapped script, without decoding it up front.
+
+    Only the lexemes and string literals of the produced tokens are decoded;
+    whitespace, comments and everything else are skipped in place. Newlines
+    are translated like a file opened in text mode, so the tokens match what
+    `Scanner` produces for the decoded text.
+    """
+
+    def __init__(self, source: bytes | bytearray | memoryview | mmap) -> None:
+        self.source: bytes | bytearray | memoryview | mmap = source
+        self.tokens: list[PToken] = []
+        self.line: int = 1
+
+        self.scan_tokens()
+
+    def scan_tokens(self) -> None:
+        append = self.tokens.append
+        punctuators = _BYTES_PUNCTUATORS
+        keywords = _BYTES_KEYWORDS
+        identifier = PTokenType.IDENTIFIER
+        number = PTokenType.NUMBER
+        line = self.line
+
+        for match in _BYTES_TOKEN_PATTERN.finditer(self.source):
+            group = match.lastindex
+            if group == _GROUP_PUNCTUATOR:
+                lexeme, token_type = punctuators[match.group(group)]
+                append(PToken(token_type, lexeme, None, line))
+            elif group == _GROUP_NUMBER:
+                lexeme = match.group(group).decode("ascii")
+                append(PToken(number, lexeme, float(lexeme), line))
+            elif group == _GROUP_IDENTIFIER:
+                name = match.group(group)
+                lexeme, token_type = keywords.get(name) or (
+                    name.decode("ascii"),
+                    identifier,
+                )
+                append(PToken(token_type, lexeme, None, line))
+            elif group == _GROUP_NEWLINE:
+                newlines = match.group(group)
+                line += newlines.count(b"\n") + newlines.count(b"\r")
+                line -= newlines.count(b"\r\n")
+            elif group == _GROUP_STRING:
+                lexeme = _decode_text(match.group(group))
+                line += lexeme.count("\n")
+                append(PToken(PTokenType.STRING, lexeme, lexeme[1:-1], line))
+            elif group == _GROUP_UNTERMINATED:
+                line += _decode_text(match.group(group)).count("\n")
+                error(line, "Unterminated string")
+            elif group == _GROUP_OTHER:
+                lexeme = match.group(group).decode("utf-8")
+                append(PToken(PTokenType.UNIMPLEMENTED, lexeme, None, line))
+            # comments and trailing blanks produce no tokens
+
+        self.line = line
+        append(PToken(type=PTokenType.EOF, lexeme="", literal=None, line=line))
+
+
+def _decode_text(raw: bytes) -> str:
+    """Decode UTF-8 bytes with the newline translation of text mode."""
+    text = raw.decode("utf-8")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+class ParallelScanner:
+    """
+    Lexes a large source into a `TokenBuffer` across worker processes.
+
+    The source is split at newlines that are not inside a string literal or
+    a comment, every chunk is lexed by a `CompactScanner` in a
+    `ProcessPoolExecutor`, and the chunk buffers are merged with their
+    offsets, line table and literal table rebased onto the whole source.
+    Sources shorter than `threshold` characters are lexed sequentially,
+    since below that the cost of the pool outweighs the parallelism.
+    """
+
+    def __init__(
+        self,
+        source: str,
+        workers: int | None = None,
+        threshold: int = PARALLEL_THRESHOLD,
+    ) -> None:
+        self.source: str = source
+        self.workers: int = workers or os.cpu_count() or 1
+        self.threshold: int = threshold
+        self.tokens: TokenBuffer
+
+        self.scan_tokens()
+
+    def scan_tokens(self) -> None:
+        source = self.source
+        if len(source) < self.threshold or self.workers < 2:
+            self.tokens = CompactScanner(source).tokens
+            return
+
+        bounds = self.split_points(self.workers)
+        chunks = [source[start:end] for start, end in zip(bounds, bounds[1:])]
+        lines = [1]
+        for start, end in zip(bounds, bounds[1:-1]):
+            lines.append(lines[-1] + source.count("\n", start, end))
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            results = list(executor.map(_scan_chunk, chunks, lines))
+
+        tokens = self.tokens = TokenBuffer(source)
+        for base, (columns, diagnostics) in zip(bounds, results):
+            types, starts, ends, literal_ids, literals, line_starts = columns
+            # reported here, in chunk order: what a worker prints would
+            # bypass the output of this process
+            for diagnostic in diagnostics:
+                write(diagnostic)
+            tokens.types.extend(types)
+            tokens.starts.extend(map(base.__add__, starts))
+            tokens.ends.extend(map(base.__add__, ends))
+            # the trailing -1 keeps "no literal" ids at -1 after remapping
+            remap = [tokens.intern(literal) for literal in literals]
+            remap.append(-1)
+            tokens.literal_ids.extend(map(remap.__getitem__, literal_ids))
+            tokens.line_starts.extend(map(base.__add__, line_starts))
+
+        tokens.types.append(TOKEN_CODES[PTokenType.EOF])
+        tokens.starts.append(len(source))
+        tokens.ends.append(len(source))
+        tokens.literal_ids.append(-1)
+
+    def split_points(self, parts: int) -> list[int]:
+        """
+        Return the offsets that split the source into at most `parts`
+        chunks, each starting right after a newline that lies outside every
+        string literal and comment
+        """
+        source = self.source
+        bounds = [0]
+        opaque = _OPAQUE_PATTERN.finditer(source)
+        span = next(opaque, None)
+        for part in range(1, parts):
+            newline = source.find("\n", max(len(source) * part // parts, bounds[-1]))
+            while newline != -1:
+                while span is not None and span.end() <= newline:
+                    span = next(opaque, None)
+                if span is None or span.start() > newline:
+                    break
+                newline = source.find("\n", span.end())
+            if newline == -1:
+                break
+            bounds.append(newline + 1)
+        if bounds[-1] != len(source):
+            bounds.append(len(source))
+        return bounds
+
+
+def _scan_chunk(chunk: str, line: int) -> tuple[
+    tuple[array[int], array[int], array[int], array[int], list[Any], array[int]],
+    list[str],
+]:
+    """
+    Lex one chunk in a worker, returning its buffer columns without EOF and
+    the diagnostics it reported.
+    """
+    diagnostics: list[str] = []
+    reset = logger.output.set(diagnostics.append)
+    try:
+        tokens = CompactScanner(chunk, line).tokens
+    finally:
+        logger.output.reset(reset)
+    columns = (
+        tokens.types[:-1],
+        tokens.starts[:-1],
+        tokens.ends[:-1],
+        tokens.literal_ids[:-1],
+        tokens.literals,
+        tokens.line_starts[1:],
+    )
+    return columns, diagnostics
+
+
+class StreamingScanner:
+    """
+    Lazily lexes a source that arrives as an iterable of text chunks.
+
+    Iterating over the scanner yields the same tokens `Scanner` would produce
+    for the concatenated chunks, ending with EOF, while only holding on to the
+    unconsumed tail of the current chunk.
+    """
+
+    def __init__(self, chunks: Iterable[str]) -> None:
+        self.chunks: Iterable[str] = chunks
+
+    def __iter__(self) -> Iterator[PToken]:
+        return scan_chunks(self.chunks)
+
+
+def scan_chunks(
+    chunks: Iterable[str], report: Callable[[int | None, str], None] = error
+) -> Iterator[PToken]:
+    """
+    Yield the tokens of the concatenation of `chunks`, followed by EOF, and
+    pass the diagnostics to `report`.
+
+    A match is only trusted once at least two more characters are buffered
+    behind it, which is the furthest any pattern looks past its own end
+    (`1.` followed by a digit); anything closer to the end of a chunk is
+    re-scanned once the next chunk has been appended.
+    """
+    keywords = KEYWORDS
+    punctuators = PUNCTUATORS
+    identifier = PTokenType.IDENTIFIER
+    number = PTokenType.NUMBER
+    line = 1
+
+    chunk_iter = iter(chunks)
+    chunk = next(chunk_iter, None)
+    buffer = ""
+    while chunk is not None:
+        buffer += chunk
+        chunk = next(chunk_iter, None)
+        limit = len(buffer) if chunk is None else len(buffer) - 2
+        consumed = 0
+
+        for match in _TOKEN_PATTERN.finditer(buffer):
+            if match.end() > limit:
+                break
+            consumed = match.end()
+            group = match.lastindex
+            if group == _GROUP_PUNCTUATOR:
+                lexeme = match.group(group)
+                yield PToken(punctuators[lexeme], lexeme, None, line)
+            elif group == _GROUP_NUMBER:
+                lexeme = match.group(group)
+                yield PToken(number, lexeme, float(lexeme), line)
+            elif group == _GROUP_IDENTIFIER:
+                lexeme = match.group(group)
+                yield PToken(keywords.get(lexeme, identifier), lexeme, None, line)
+            elif group == _GROUP_NEWLINE:
+                line += consumed - match.start(group)
+            elif group == _GROUP_STRING:
+                lexeme = match.group(group)
+                line += lexeme.count("\n")
+                yield PToken(PTokenType.STRING, lexeme, lexeme[1:-1], line)
+            elif group == _GROUP_UNTERMINATED:
+                line += match.group(group).count("\n")
+                report(line, "Unterminated string")
+            elif group == _GROUP_OTHER:
+                lexeme = match.group(group)
+                yield PToken(PTokenType.UNIMPLEMENTED, lexeme, None, line)
+            # comments and trailing blanks produce no tokens
+
+        buffer = buffer[consumed:]
+
+    yield PToken(type=PTokenType.EOF, lexeme="", literal=None, line=line)
+
+
+# Furthest any pattern looks past the end of its match (`1.` followed by a
+# digit), and so the distance at which an edit can change a token before it.
+_LOOKAHEAD = 2
+
+
+@dataclass(frozen=True)
+class Edit:
+    """Replace `deleted` characters at `offset` of a source with `inserted`."""
+
+    offset: int
+    deleted: int
+    inserted: str
+
+    def apply(self, source: str) -> str:
+        if not 0 <= self.offset <= self.offset + self.deleted <= len(source):
+            raise ValueError(
+                f"Edit of {self.deleted} characters at {self.offset} is out of "
+                f"a source of {len(source)} characters"
+            )
+        return (
+            source[: self.offset] + self.inserted + source[self.offset + self.deleted :]
+        )
+
+
+class LineShift:
+    """Lines a pending edit adds to the tokens after it, see `IncrementalToken`."""
+
+    __slots__ = ("lines",)
+
+    def __init__(self) -> None:
+        self.lines: int = 0
+
+
+class IncrementalToken(PToken):
+    """
+    A token of an `IncrementalScanner`. While `shift` is set, the token is
+    after an edit the scanner has not settled, and its line is `shift.lines`
+    further than the one it recorded.
+    """
+
+    def __init__(self, type: PTokenType, lexeme: str, literal: Any, line: int) -> None:
+        self.shift: LineShift | None = None
+        self.recorded_line: int = line
+        super().__init__(type, lexeme, literal, line)
+
+    @property
+    def line(self) -> int:
+        if self.shift is None:
+            return self.recorded_line
+        return self.recorded_line + self.shift.lines
+
+    @line.setter
+    def line(self, line: int) -> None:
+        if self.shift is None:
+            self.recorded_line = line
+        else:
+            self.recorded_line = line - self.shift.lines
+
+
+class IncrementalScanner:
+    """
+    Lexes like `FastScanner`, then keeps the tokens up to date as the source
+    is edited, re-lexing only around each edit.
+
+    Lexing restarts at the end of the last token the edit cannot have
+    changed, and stops at the first token past the edit that is identical
+    to an old one at the same place: from there on the lexer would go
+    through the same matches as before, so the old tokens are kept.
+
+    Every edit shifts the offsets of the tokens after it, and their lines if
+    it added or removed newlines, which is deferred: the tokens from index
+    `step` on are short of `step_delta` characters, in the `starts` and
+    `ends` arrays used to find where an edit lands, and of `shift.lines`
+    lines, which their `line` adds. Moving the step to the next edit only
+    settles the tokens in between, so the cost follows the distance between
+    successive edits rather than the size of the source.
+    """
+
+    def __init__(self, source: str) -> None:
+        self.source: str = source
+        self.tokens: list[IncrementalToken] = []
+        self.starts: array[int] = array("q")
+        self.ends: array[int] = array("q")
+        self.step: int = 0
+        self.step_delta: int = 0
+        self.shift: LineShift = LineShift()
+
+        self.tokens, self.starts, self.ends, _, _ = self.relex(
+            source, 0, 1, len(source) + 1, 0
+        )
+        for token in self.tokens:
+            token.shift = self.shift
+
+    def edit(self, edit: Edit) -> tuple[int, int, int]:
+        """
+        Apply `edit` to the source and its tokens. Returns the range of old
+        tokens `[start, stop)` that were replaced, and how many new tokens
+        replaced them.
+        """
+        source = edit.apply(self.source)
+        delta = len(edit.inserted) - edit.deleted
+        first = self.count_ending_by(edit.offset - _LOOKAHEAD)
+        self.settle(first)
+        if first:
+            position, line = self.ends[first - 1], self.tokens[first - 1].line
+        else:
+            position, line = 0, 1
+
+        tokens, starts, ends, stop, line_delta = self.relex(
+            source, position, line, edit.offset + len(edit.inserted), delta, first
+        )
+        self.tokens[first:stop] = tokens
+        self.starts[first:stop] = starts
+        self.ends[first:stop] = ends
+        self.step = first + len(tokens)
+        self.step_delta += delta
+        self.shift.lines += line_delta
+        self.source = source
+        return first, stop, len(tokens)
+
+    def relex(
+        self,
+        source: str,
+        position: int,
+        line: int,
+        edit_end: int,
+        delta: int,
+        index: int = 0,
+    ) -> tuple[list[IncrementalToken], array[int], array[int], int, int]:
+        """
+        Lex `source` from `position`, on `line`, until a token that starts at
+        or after `edit_end` is the old token at `index` or after it, `delta`
+        characters further. Returns the new tokens and their offsets, the
+        index of that old token and how many lines it moved, or the number
+        of old tokens and 0 if the new tokens run to EOF.
+        """
+        tokens: list[IncrementalToken] = []
+        starts: array[int] = array("q")
+        ends: array[int] = array("q")
+        keywords = KEYWORDS
+        punctuators = PUNCTUATORS
+        identifier = PTokenType.IDENTIFIER
+        number = PTokenType.NUMBER
+
+        for match in _TOKEN_PATTERN.finditer(source, position):
+            group = match.lastindex
+            if group == _GROUP_PUNCTUATOR:
+                lexeme = match.group(group)
+                token = IncrementalToken(punctuators[lexeme], lexeme, None, line)
+            elif group == _GROUP_NUMBER:
+                lexeme = match.group(group)
+                token = IncrementalToken(number, lexeme, float(lexeme), line)
+            elif group == _GROUP_IDENTIFIER:
+                lexeme = match.group(group)
+                token = IncrementalToken(
+                    keywords.get(lexeme, identifier), lexeme, None, line
+                )
+            elif group == _GROUP_NEWLINE:
+                line += match.end(group) - match.start(group)
+                continue
+            elif group == _GROUP_STRING:
+                lexeme = match.group(group)
+                line += lexeme.count("\n")
+                token = IncrementalToken(PTokenType.STRING, lexeme, lexeme[1:-1], line)
+            elif group == _GROUP_UNTERMINATED:
+                line += match.group(group).count("\n")
+                error(line, "Unterminated string")
+                continue
+            elif group == _GROUP_OTHER:
+                lexeme = match.group(group)
+                token = IncrementalToken(PTokenType.UNIMPLEMENTED, lexeme, None, line)
+            else:
+                # comments and trailing blanks produce no tokens
+                continue
+
+            start, end = match.span(group)
+            if start >= edit_end:
+                index = self.find_token(index, start - delta)
+                if self.same_token(index, token, end - delta):
+                    line_delta = token.line - self.tokens[index].line
+                    return tokens, starts, ends, index, line_delta
+            tokens.append(token)
+            starts.append(start)
+            ends.append(end)
+
+        # the old EOF always matches, unless there are no old tokens
+        token = IncrementalToken(PTokenType.EOF, "", None, line)
+        index = self.find_token(index, len(source) - delta)
+        if self.same_token(index, token, len(source) - delta):
+            line_delta = token.line - self.tokens[index].line
+            return tokens, starts, ends, index, line_delta
+        tokens.append(token)
+        starts.append(len(source))
+        ends.append(len(source))
+        return tokens, starts, ends, len(self.tokens), 0
+
+    def start_of(self, index: int) -> int:
+        return self.starts[index] + (self.step_delta if index >= self.step else 0)
+
+    def end_of(self, index: int) -> int:
+        return self.ends[index] + (self.step_delta if index >= self.step else 0)
+
+    def find_token(self, index: int, offset: int) -> int:
+        """The first old token from `index` on that starts at or after `offset`."""
+        while index < len(self.tokens) and self.start_of(index) < offset:
+            index += 1
+        return index
+
+    def same_token(self, index: int, token: IncrementalToken, end: int) -> bool:
+        """Whether the old token at `index` ends at `end` and lexes as `token`."""
+        if index == len(self.tokens):
+            return False
+        old = self.tokens[index]
+        return (
+            self.end_of(index) == end
+            and old.type == token.type
+            and old.lexeme == token.lexeme
+        )
+
+    def count_ending_by(self, offset: int) -> int:
+        """The number of tokens that end at or before `offset`."""
+        step = self.step
+        count = bisect_right(self.ends, offset, 0, step)
+        if count < step:
+            return count
+        return bisect_right(self.ends, offset - self.step_delta, step, len(self.ends))
+
+    def settle(self, index: int) -> None:
+        """Move the step to `index`, shifting the tokens in between."""
+        tokens, starts, ends = self.tokens, self.starts, self.ends
+        delta, shift = self.step_delta, self.shift
+        if index > self.step:
+            for moved in range(self.step, index):
+                starts[moved] += delta
+                ends[moved] += delta
+                token = tokens[moved]
+                token.recorded_line += shift.lines
+                token.shift = None
+        else:
+            for moved in range(index, self.step):
+                starts[moved] -= delta
+                ends[moved] -= delta
+                token = tokens[moved]
+                token.recorded_line -= shift.lines
+                token.shift = shift
+        self.step = index
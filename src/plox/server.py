@@ -0,0 +1,350 @@
+"""
+A long-lived evaluation server, as `plox --serve`.
+
+Requests and responses are newline-delimited JSON objects, read from stdin
+and written to stdout, or exchanged over the connections of a Unix socket:
+
+    {"id": 1, "source": "1 + 2"}      ->  {"id": 1, "value": 3.0}
+    {"id": 2, "source": "-\\"a\\""}     ->  {"id": 2, "error": {"type": ...}}
+    {"id": 3, "stats": true}          ->  {"id": 3, "stats": {...}}
+
+Sources are evaluated by a `Session` in each worker of a pool of warm
+processes, threads or subinterpreters (see `plox.executor`), so a source
+that was seen before skips scanning and parsing. Responses are written as
+soon as they are ready, which is not necessarily in the order of the
+requests. At most `max_concurrency` requests are evaluated at once: beyond
+that the server stops reading, so clients feel the backpressure through the
+socket or pipe.
+"""
+
+import asyncio
+import contextlib
+import json
+import math
+import os
+import signal
+import stat
+import sys
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Awaitable, Callable, Sequence
+
+from plox import executor
+from plox.errors import PloxErrorBase
+from plox.session import Session
+
+if TYPE_CHECKING:
+    from plox import main
+
+# Default number of requests evaluated at once.
+DEFAULT_MAX_CONCURRENCY: int = executor.DEFAULT_MAX_CONCURRENCY
+
+# Longest request line accepted, in bytes.
+MAX_REQUEST_SIZE: int = 16 * 1024 * 1024
+
+# Number of most recent requests the latency percentiles are computed over.
+LATENCY_WINDOW: int = 10_000
+
+# Percentiles of the latency reported by a stats request.
+PERCENTILES: tuple[int, ...] = (50, 90, 99)
+
+# The sessions of the calling worker thread, by engine settings.
+_sessions = threading.local()
+
+
+def to_json(value: object) -> object:
+    """A Lox value as JSON: non-finite numbers, which JSON lacks, as strings."""
+    if type(value) is float and not math.isfinite(value):
+        return str(value)
+    return value
+
+
+def describe_error(error: PloxErrorBase) -> dict[str, object]:
+    """A diagnostic as JSON, with the location of its token if it has one."""
+    token = error.token
+    return {
+        "type": type(error).__name__,
+        "message": error.message,
+        "line": token.line if token is not None else None,
+        "lexeme": token.lexeme if token is not None else None,
+        "text": str(error),
+    }
+
+
+def invalid_request(message: str) -> dict[str, object]:
+    return {"type": "InvalidRequest", "message": message}
+
+
+def evaluate(source: str, options: "main.RunOptions") -> dict[str, object]:
+    """
+    Evaluate `source` in the session of the calling worker and return the
+    body of its response: its value, or its error.
+    """
+    sessions = getattr(_sessions, "sessions", None)
+    if sessions is None:
+        sessions = _sessions.sessions = {}
+    key = (options.engine, options.opt_level, options.typecheck)
+    session = sessions.get(key)
+    if session is None:
+        session = sessions[key] = Session(
+            engine=options.engine,
+            opt_level=options.opt_level,
+            typecheck=options.typecheck,
+        )
+    try:
+        return {"value": to_json(session.evaluate(source))}
+    except PloxErrorBase as e:
+        return {"error": describe_error(e)}
+    except Exception as e:
+        # e.g. RecursionError on a deeply nested expression; the server and
+        # the other requests carry on
+        return {"error": {"type": type(e).__name__, "message": str(e)}}
+
+
+def percentile(values: Sequence[float], q: float) -> float | None:
+    """The `q`th percentile of sorted `values`, by the nearest-rank method."""
+    if not values:
+        return None
+    return values[max(1, math.ceil(q / 100 * len(values))) - 1]
+
+
+class Server:
+    """
+    Serves evaluation requests on any number of connections, sharing one
+    worker pool and one concurrency limit between them.
+    """
+
+    def __init__(
+        self,
+        options: "main.RunOptions | None" = None,
+        workers: int | None = None,
+        kind: str = "processes",
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> None:
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        # imported here: plox.main imports this module
+        from plox import main
+
+        self.options = options or main.RunOptions()
+        self.workers = workers or os.cpu_count() or 1
+        self.kind = kind
+        self.max_concurrency = max_concurrency
+        self.pool = executor.make_executor(kind, self.workers)
+        self.limit = asyncio.Semaphore(max_concurrency)
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    async def start(self) -> None:
+        """Start the workers, so the first requests do not wait for them."""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(
+                loop.run_in_executor(self.pool, evaluate, "nil", self.options)
+                for _ in range(self.workers)
+            )
+        )
+
+    def close(self) -> None:
+        self.pool.shutdown(cancel_futures=True)
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve the requests of one socket connection until it is closed."""
+
+        async def send(data: bytes) -> None:
+            writer.write(data)
+            # waits while the client is not reading its responses
+            await writer.drain()
+
+        try:
+            await self.serve_lines(reader.readline, send)
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def serve_lines(
+        self,
+        readline: Callable[[], Awaitable[bytes]],
+        send: Callable[[bytes], Awaitable[None]],
+    ) -> None:
+        """
+        Serve the request lines returned by `readline` until it returns an
+        empty line, and wait for their responses to be sent. `readline`
+        raises `ValueError` on a line longer than `MAX_REQUEST_SIZE`.
+        """
+        tasks: set[asyncio.Task[None]] = set()
+        while True:
+            await self.limit.acquire()
+            try:
+                line = await readline()
+            except ValueError:
+                # the rest of the line cannot be told apart from the next
+                # request, so the connection is dropped
+                self.limit.release()
+                await self.respond(
+                    send, {"id": None, "error": invalid_request("Request too large")}
+                )
+                break
+            if not line.strip():
+                self.limit.release()
+                if not line:
+                    break
+                continue
+            task = asyncio.create_task(self.serve_request(line, send))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def serve_request(
+        self, line: bytes, send: Callable[[bytes], Awaitable[None]]
+    ) -> None:
+        try:
+            await self.respond(send, await self.dispatch(line))
+        finally:
+            self.limit.release()
+
+    async def dispatch(self, line: bytes) -> dict[str, object]:
+        """The response to one request line."""
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return {"id": None, "error": invalid_request(f"Invalid JSON: {e}")}
+        if not isinstance(request, dict):
+            return {"id": None, "error": invalid_request("Expected a JSON object")}
+        request_id = request.get("id")
+        if request.get("stats"):
+            return {"id": request_id, "stats": self.stats()}
+        source = request.get("source")
+        if not isinstance(source, str):
+            return {
+                "id": request_id,
+                "error": invalid_request("Expected a string 'source'"),
+            }
+
+        self.requests += 1
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            response = await asyncio.get_running_loop().run_in_executor(
+                self.pool, evaluate, source, self.options
+            )
+        finally:
+            self.in_flight -= 1
+        self.latencies.append(time.perf_counter() - start)
+        if "error" in response:
+            self.errors += 1
+        return {"id": request_id, **response}
+
+    async def respond(
+        self, send: Callable[[bytes], Awaitable[None]], response: dict[str, object]
+    ) -> None:
+        await send(json.dumps(response).encode("utf-8") + b"\n")
+
+    def stats(self) -> dict[str, object]:
+        """Request counts and the latency percentiles of the recent requests."""
+        latencies = sorted(self.latencies)
+        latency_ms: dict[str, float | None] = {}
+        for q in PERCENTILES:
+            value = percentile(latencies, q)
+            latency_ms[f"p{q}"] = None if value is None else value * 1000
+        latency_ms["max"] = latencies[-1] * 1000 if latencies else None
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "workers": self.workers,
+            "executor": self.kind,
+            "max_concurrency": self.max_concurrency,
+            "latency_ms": latency_ms,
+        }
+
+
+async def serve_stdio(server: Server) -> None:
+    """
+    Serve the requests read from stdin. Lines are read on a thread and
+    responses written as they come, so a client that does not read its
+    responses stalls the server, as it would stall a socket connection.
+    """
+    loop = asyncio.get_running_loop()
+    stdin = sys.stdin.buffer
+    stdout = sys.stdout.buffer
+
+    async def readline() -> bytes:
+        line: bytes = await loop.run_in_executor(
+            None, stdin.readline, MAX_REQUEST_SIZE + 1
+        )
+        if len(line) > MAX_REQUEST_SIZE:
+            raise ValueError("Request too large")
+        return line
+
+    async def send(data: bytes) -> None:
+        stdout.write(data)
+        stdout.flush()
+
+    await server.serve_lines(readline, send)
+
+
+async def serve_socket(server: Server, path: str) -> None:
+    """
+    Serve the connections to a Unix socket at `path` until interrupted, and
+    remove the socket then. A stale socket at `path` is replaced, but any
+    other file there is left alone: `FileExistsError` is raised instead.
+    """
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        pass
+    else:
+        if not stat.S_ISSOCK(mode):
+            raise FileExistsError(f"{path} exists and is not a socket")
+    unix_server = await asyncio.start_unix_server(
+        server.handle, path, limit=MAX_REQUEST_SIZE
+    )
+    bound = os.stat(path).st_ino
+    try:
+        async with unix_server:
+            await unix_server.serve_forever()
+    finally:
+        # unless another server has replaced the socket since
+        with contextlib.suppress(FileNotFoundError):
+            if os.stat(path).st_ino == bound:
+                os.unlink(path)
+
+
+def serve(
+    options: "main.RunOptions | None" = None,
+    socket: str | None = None,
+    workers: int | None = None,
+    kind: str = "processes",
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> None:
+    """
+    Serve requests on stdin and stdout until stdin is closed, or on a Unix
+    socket at `socket` until interrupted. Raises `ValueError` on invalid
+    settings and `OSError` if the socket cannot be bound.
+    """
+
+    async def run() -> None:
+        server = Server(options, workers, kind, max_concurrency)
+        try:
+            await server.start()
+            if socket is None:
+                await serve_stdio(server)
+            else:
+                await serve_socket(server, socket)
+        finally:
+            server.close()
+
+    # a daemon is stopped with SIGTERM: let it clean up as on Ctrl-C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,212 @@
+"""
+An embeddable API for evaluating Lox expressions from a long-running
+program. A `Session` returns values and raises errors instead of printing,
+and keeps bounded caches of everything it derives from a source text.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, Generic, Hashable, Iterable, TypeVar
+
+from plox import logger
+from plox.codegen import CodeGenerator
+from plox.errors import PloxErrorBase, PloxSyntaxError
+from plox.expression import Expr
+from plox.hashcons import MemoizingInterpreter
+from plox.interpreter import Interpreter, IterativeInterpreter
+from plox.optimizer import Optimizer
+from plox.parser import PrattParser
+from plox.ptoken import PToken
+from plox.quickening import QuickeningInterpreter
+from plox.scanner import FastScanner
+from plox.typecheck import TypeChecker
+from plox.vm import VM, Compiler
+
+# Default number of entries kept by each cache of a session.
+DEFAULT_CACHE_SIZE: int = 1024
+
+# A prepared expression, evaluated by calling it.
+Executable = Callable[[], object]
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """A snapshot of the counters of an `LRUCache`."""
+
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    A mapping bounded to `maxsize` entries, evicting the least recently used
+    one when full, that counts its hits, misses and evictions.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.entries: OrderedDict[K, V] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: K) -> V | None:
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: K, value: V) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            self.hits, self.misses, self.evictions, len(self.entries), self.maxsize
+        )
+
+
+class Session:
+    """
+    Evaluates Lox source texts and returns their values.
+
+    Scanning, parsing and preparing an expression for the selected engine
+    (`tree`, `vm`, `python`, `quickening`, `iterative` or `memo`, as for
+    `plox --engine`) happen once per distinct source text: the token stream,
+    the syntax tree and the executable form are kept in LRU caches keyed by
+    the source. Errors are raised as `PloxSyntaxError`, `PloxTypeError` or
+    `PloxRuntimeError`; scanner diagnostics are raised rather than printed.
+    """
+
+    def __init__(
+        self,
+        engine: str = "tree",
+        opt_level: int = 0,
+        typecheck: bool = False,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ) -> None:
+        self.engine = engine
+        self.opt_level = opt_level
+        self.typecheck = typecheck
+        self.tokens: LRUCache[str, list[PToken]] = LRUCache(cache_size)
+        self.asts: LRUCache[str, Expr] = LRUCache(cache_size)
+        self.executables: LRUCache[str, Executable] = LRUCache(cache_size)
+        self.compile = self.make_compiler(engine)
+
+    def make_compiler(self, engine: str) -> Callable[[Expr], Executable]:
+        """The function turning a tree into an executable form for `engine`."""
+        evaluate: Callable[[Expr], object]
+        match engine:
+            case "vm":
+                vm = VM()
+                return lambda expr: partial(vm.run, Compiler().compile(expr))
+            case "python":
+                return lambda expr: CodeGenerator().compile(expr)
+            case "tree":
+                evaluate = Interpreter().evaluate
+            case "iterative":
+                evaluate = IterativeInterpreter().evaluate
+            case "quickening":
+                quickening = QuickeningInterpreter()
+                return lambda expr: partial(
+                    quickening.evaluate, quickening.quicken(expr)
+                )
+            case "memo":
+                memo = MemoizingInterpreter()
+                return lambda expr: partial(memo.run_interned, memo.intern(expr))
+            case _:
+                raise ValueError(f"Unknown engine {engine!r}")
+        return lambda expr: partial(evaluate, expr)
+
+    def scan(self, source: str) -> list[PToken]:
+        tokens = self.tokens.get(source)
+        if tokens is None:
+            messages: list[str] = []
+            reset = logger.output.set(messages.append)
+            try:
+                tokens = FastScanner(source).tokens
+            finally:
+                logger.output.reset(reset)
+            if messages:
+                raise PloxSyntaxError("\n".join(messages))
+            self.tokens.put(source, tokens)
+        return tokens
+
+    def parse(self, source: str) -> Expr:
+        expr = self.asts.get(source)
+        if expr is None:
+            expr = PrattParser(self.scan(source)).expression()
+            self.asts.put(source, expr)
+        return expr
+
+    def prepare(self, source: str) -> Executable:
+        executable = self.executables.get(source)
+        if executable is None:
+            expr = Optimizer(self.opt_level).optimize(self.parse(source))
+            if self.typecheck:
+                checker = TypeChecker()
+                expr = checker.check(expr)
+                if checker.errors:
+                    raise checker.errors[0]
+            executable = self.compile(expr)
+            self.executables.put(source, executable)
+        return executable
+
+    def evaluate(self, source: str) -> object:
+        """Evaluate the expression in `source` and return its value."""
+        return self.prepare(source)()
+
+    def evaluate_many(
+        self, sources: Iterable[str], return_exceptions: bool = False
+    ) -> list[object]:
+        """
+        Evaluate every source in turn. With `return_exceptions`, a source
+        that fails yields its exception in place of a value instead of
+        aborting the batch.
+        """
+        prepare = self.prepare
+        values: list[object] = []
+        for source in sources:
+            try:
+                values.append(prepare(source)())
+            except PloxErrorBase as e:
+                if not return_exceptions:
+                    raise
+                values.append(e)
+        return values
+
+    def stats(self) -> dict[str, CacheStats]:
+        """Hit, miss and eviction counts of the caches of the session."""
+        return {
+            "tokens": self.tokens.stats(),
+            "asts": self.asts.stats(),
+            "executables": self.executables.stats(),
+        }
+
+    def clear(self) -> None:
+        self.tokens.clear()
+        self.asts.clear()
+        self.executables.clear()
@@ -0,0 +1,159 @@
+import operator
+from enum import Enum
+from typing import Callable
+
+from plox.errors import PloxTypeError
+from plox.expression import (
+    AssignExpr,
+    BinaryExpr,
+    Expr,
+    GroupingExpr,
+    LiteralExpr,
+    NumericBinaryExpr,
+    NumericNegateExpr,
+    UnaryExpr,
+    VariableExpr,
+    Visitor,
+    visits,
+)
+from plox.interpreter import divide
+from plox.ptoken import PTokenType
+
+
+class LoxType(Enum):
+    """The static type of an expression."""
+
+    NUMBER = "number"
+    STRING = "string"
+    BOOL = "bool"
+    NIL = "nil"
+    UNKNOWN = "unknown"
+
+
+# Operations of the binary operators that take two numbers, and the type
+# of their result.
+_NUMERIC_OPERATIONS: dict[
+    PTokenType, tuple[Callable[[float, float], object], LoxType]
+] = {
+    PTokenType.MINUS: (operator.sub, LoxType.NUMBER),
+    PTokenType.STAR: (operator.mul, LoxType.NUMBER),
+    PTokenType.SLASH: (divide, LoxType.NUMBER),
+    PTokenType.GREATER: (operator.gt, LoxType.BOOL),
+    PTokenType.GREATER_EQUAL: (operator.ge, LoxType.BOOL),
+    PTokenType.LESS: (operator.lt, LoxType.BOOL),
+    PTokenType.LESS_EQUAL: (operator.le, LoxType.BOOL),
+}
+
+_LITERAL_TYPES: dict[type, LoxType] = {
+    float: LoxType.NUMBER,
+    str: LoxType.STRING,
+    bool: LoxType.BOOL,
+    type(None): LoxType.NIL,
+}
+
+# A rewritten node and its type.
+Typed = tuple[Expr, LoxType]
+
+
+class TypeChecker(Visitor[Typed]):
+    """
+    Infer the type of every node of an expression tree.
+
+    A node's type is what it evaluates to whenever it does not raise;
+    `UNKNOWN` stands for any value: a variable, a "number or string" sum or
+    a node downstream of an error. Operators applied to operands of a
+    definitely wrong type are collected in `errors`, with the messages the
+    interpreter would raise.
+
+    `check` returns a copy of the tree in which operators proven to receive
+    numbers are replaced by `NumericBinaryExpr` and `NumericNegateExpr`,
+    which engines may evaluate without checking their operands.
+    """
+
+    def __init__(self) -> None:
+        self.errors: list[PloxTypeError] = []
+
+    def check(self, expr: Expr) -> Expr:
+        typed, _ = self.visit(expr)
+        return typed
+
+    def infer(self, expr: Expr) -> LoxType:
+        _, lox_type = self.visit(expr)
+        return lox_type
+
+    @visits(AssignExpr)
+    def visit_assign(self, expr: AssignExpr) -> Typed:
+        value, value_type = self.visit(expr.value)
+        return AssignExpr(expr.name, value), value_type
+
+    @visits(LiteralExpr)
+    def visit_literal(self, expr: LiteralExpr) -> Typed:
+        return expr, _LITERAL_TYPES.get(type(expr.value), LoxType.UNKNOWN)
+
+    @visits(VariableExpr)
+    def visit_variable(self, expr: VariableExpr) -> Typed:
+        return expr, LoxType.UNKNOWN
+
+    @visits(GroupingExpr)
+    def visit_grouping(self, expr: GroupingExpr) -> Typed:
+        inner, inner_type = self.visit(expr.expression)
+        return GroupingExpr(inner), inner_type
+
+    @visits(UnaryExpr)
+    def visit_unary(self, expr: UnaryExpr) -> Typed:
+        right, right_type = self.visit(expr.right)
+        if expr.operator.type == PTokenType.BANG:
+            return UnaryExpr(expr.operator, right), LoxType.BOOL
+        if right_type == LoxType.NUMBER:
+            return NumericNegateExpr(expr.operator, right), LoxType.NUMBER
+        if right_type != LoxType.UNKNOWN:
+            self.errors.append(PloxTypeError("Operand must be a number", expr.operator))
+            return UnaryExpr(expr.operator, right), LoxType.UNKNOWN
+        return UnaryExpr(expr.operator, right), LoxType.NUMBER
+
+    @visits(BinaryExpr)
+    def visit_binary(self, expr: BinaryExpr) -> Typed:
+        left, left_type = self.visit(expr.left)
+        right, right_type = self.visit(expr.right)
+        operator_type = expr.operator.type
+
+        if operator_type in (PTokenType.EQUAL_EQUAL, PTokenType.BANG_EQUAL):
+            return BinaryExpr(left, expr.operator, right), LoxType.BOOL
+
+        if operator_type == PTokenType.PLUS:
+            return self.check_plus(expr, left, left_type, right, right_type)
+
+        operation, result_type = _NUMERIC_OPERATIONS[operator_type]
+        if left_type == LoxType.NUMBER and right_type == LoxType.NUMBER:
+            return (
+                NumericBinaryExpr(left, expr.operator, right, operation),
+                result_type,
+            )
+        if not {left_type, right_type} <= {LoxType.NUMBER, LoxType.UNKNOWN}:
+            self.errors.append(PloxTypeError("Operand must be a number", expr.operator))
+            return BinaryExpr(left, expr.operator, right), LoxType.UNKNOWN
+        return BinaryExpr(left, expr.operator, right), result_type
+
+    def check_plus(
+        self,
+        expr: BinaryExpr,
+        left: Expr,
+        left_type: LoxType,
+        right: Expr,
+        right_type: LoxType,
+    ) -> Typed:
+        if left_type == LoxType.NUMBER and right_type == LoxType.NUMBER:
+            return (
+                NumericBinaryExpr(left, expr.operator, right, operator.add),
+                LoxType.NUMBER,
+            )
+        operand_types = {left_type, right_type}
+        if operand_types <= {LoxType.NUMBER, LoxType.UNKNOWN}:
+            result_type = left_type if right_type == LoxType.UNKNOWN else right_type
+            return BinaryExpr(left, expr.operator, right), result_type
+        if operand_types <= {LoxType.STRING, LoxType.UNKNOWN}:
+            return BinaryExpr(left, expr.operator, right), LoxType.STRING
+        self.errors.append(
+            PloxTypeError("Illegal combination of operarands", expr.operator)
+        )
+        return BinaryExpr(left, expr.operator, right), LoxType.UNKNOWN
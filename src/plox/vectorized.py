@@ -0,0 +1,297 @@
+"""
+Evaluate one expression over whole columns of input values at once.
+
+Requires NumPy, which is an optional dependency (`pip install plox[vectorized]`).
+"""
+
+from typing import Any, Mapping
+
+from plox.errors import PloxRuntimeError
+from plox.expression import (
+    BinaryExpr,
+    Expr,
+    GroupingExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr,
+    Visitor,
+    visits,
+)
+from plox.interpreter import Interpreter
+from plox.ptoken import PTokenType, TokenLike
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore[assignment]
+
+# The value of a node over every row: a Python value shared by all rows, or
+# an array with one value per row. A float64 array holds only numbers, a
+# bool array only booleans, and an object array any mix of Lox values.
+Column = Any
+
+_COMPARISONS = {
+    PTokenType.GREATER: "greater",
+    PTokenType.GREATER_EQUAL: "greater_equal",
+    PTokenType.LESS: "less",
+    PTokenType.LESS_EQUAL: "less_equal",
+}
+
+_ARITHMETIC = {
+    PTokenType.MINUS: "subtract",
+    PTokenType.STAR: "multiply",
+}
+
+
+def to_lox(value: Any) -> object:
+    """Convert a NumPy or Python scalar to the Python value Lox uses for it."""
+    if np is not None and isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    raise TypeError(f"{type(value).__name__} values have no Lox equivalent")
+
+
+class BatchEvaluator(Visitor[Column]):
+    """
+    Evaluates an expression for every row of a table of variable values,
+    with NumPy array operations over whole columns instead of one
+    `Interpreter` run per row.
+
+    The results are those of evaluating each row with `Interpreter`. Numbers
+    and booleans are computed with array operations; nodes whose operands
+    mix types across rows (object arrays) fall back to evaluating each row
+    with the scalar `apply_unary`/`apply_binary`, after which the column is
+    narrowed back to a float or bool array when it allows. A row whose
+    evaluation raises is marked as failed and ignored from then on; if any
+    row failed, the first one is evaluated again with `Interpreter` to raise
+    exactly the error the row-at-a-time loop would have stopped at.
+    """
+
+    def __init__(self, columns: Mapping[str, Any], length: int | None = None) -> None:
+        if np is None:
+            raise ImportError("batch evaluation requires NumPy")
+        self.failed: Any = None
+        self.columns: dict[str, Column] = {}
+        for name, values in columns.items():
+            if isinstance(values, (list, tuple, np.ndarray)):
+                column = self.to_column(values)
+                if length is None:
+                    length = len(column)
+                elif len(column) != length:
+                    raise ValueError(
+                        f"Column '{name}' has {len(column)} rows, expected {length}"
+                    )
+                self.columns[name] = column
+            else:
+                self.columns[name] = to_lox(values)
+        self.length: int = 1 if length is None else length
+        self.scalar = Interpreter()
+        self.failed = np.zeros(self.length, dtype=bool)
+
+    def to_column(self, values: Any) -> Column:
+        if isinstance(values, np.ndarray):
+            array = values
+        else:
+            # not np.asarray: it would make [1.0, "a"] strings and
+            # [1.0, True] numbers, hiding the rows that must fail
+            array = np.array(values, dtype=object)
+        if array.ndim != 1:
+            raise ValueError("Columns must be one-dimensional")
+        if array.dtype.kind == "b":
+            return array
+        if array.dtype.kind in "iuf":
+            return array.astype(np.float64)
+        return self.narrow(np.array([to_lox(v) for v in array], dtype=object))
+
+    def narrow(self, column: Column) -> Column:
+        """Store an object column as a float or bool array if it holds only those."""
+        live = column if self.failed is None else column[~self.failed]
+        if all(type(v) is float for v in live):
+            return np.array(
+                [v if type(v) is float else 0.0 for v in column], dtype=np.float64
+            )
+        if all(type(v) is bool for v in live):
+            return np.array([v is True for v in column], dtype=bool)
+        return column
+
+    def row(self, index: int) -> dict[str, object]:
+        return {
+            name: to_lox(column[index]) if isinstance(column, np.ndarray) else column
+            for name, column in self.columns.items()
+        }
+
+    def evaluate(self, expr: Expr) -> "np.ndarray":
+        """The value of `expr` for every row, as a float, bool or object array."""
+        self.failed[:] = False
+        with np.errstate(all="ignore"):
+            result = self.visit(expr)
+        if self.failed.any():
+            index = int(np.argmax(self.failed))
+            # raises the error of the first failing row
+            Interpreter(self.row(index)).evaluate(expr)
+            raise ValueError(
+                f"Row {index} failed in batch but not alone, "
+                "this is an error in Plox implementation"
+            )
+        if isinstance(result, np.ndarray):
+            return result
+        if type(result) is float:
+            return np.full(self.length, result, dtype=np.float64)
+        if type(result) is bool:
+            return np.full(self.length, result, dtype=bool)
+        column = np.empty(self.length, dtype=object)
+        column.fill(result)
+        return column
+
+    def fail_all(self) -> Column:
+        self.failed[:] = True
+        return None
+
+    def per_row(self, function: Any, *operands: Column) -> Column:
+        """Apply a scalar operation row by row, marking the rows it fails on."""
+        column = np.empty(self.length, dtype=object)
+        failed = self.failed
+        values = [
+            operand if isinstance(operand, np.ndarray) else [operand] * self.length
+            for operand in operands
+        ]
+        for index in range(self.length):
+            if failed[index]:
+                continue
+            try:
+                column[index] = function(*(to_lox(v[index]) for v in values))
+            except PloxRuntimeError:
+                failed[index] = True
+        return self.narrow(column)
+
+    def is_numbers(self, column: Column) -> bool:
+        if isinstance(column, np.ndarray):
+            return bool(column.dtype == np.float64)
+        return type(column) is float
+
+    def is_booleans(self, column: Column) -> bool:
+        if isinstance(column, np.ndarray):
+            return bool(column.dtype == np.bool_)
+        return type(column) is bool
+
+    def is_mixed(self, column: Column) -> bool:
+        return isinstance(column, np.ndarray) and column.dtype == object
+
+    @visits(LiteralExpr)
+    def visit_literal(self, expr: LiteralExpr) -> Column:
+        return expr.value
+
+    @visits(VariableExpr)
+    def visit_variable(self, expr: VariableExpr) -> Column:
+        try:
+            return self.columns[expr.name.lexeme]
+        except KeyError:
+            return self.fail_all()
+
+    @visits(GroupingExpr)
+    def visit_grouping(self, expr: GroupingExpr) -> Column:
+        return self.visit(expr.expression)
+
+    @visits(UnaryExpr)
+    def visit_unary(self, expr: UnaryExpr) -> Column:
+        right = self.visit(expr.right)
+        operator = expr.operator
+        if not isinstance(right, np.ndarray):
+            try:
+                return self.scalar.apply_unary(operator, right)
+            except PloxRuntimeError:
+                return self.fail_all()
+        if self.is_mixed(right):
+            return self.per_row(
+                lambda value: self.scalar.apply_unary(operator, value), right
+            )
+        if operator.type == PTokenType.BANG:
+            if self.is_booleans(right):
+                return ~right
+            # numbers are truthy
+            return np.zeros(self.length, dtype=bool)
+        if self.is_numbers(right):
+            return -right
+        return self.fail_all()
+
+    @visits(BinaryExpr)
+    def visit_binary(self, expr: BinaryExpr) -> Column:
+        left = self.visit(expr.left)
+        right = self.visit(expr.right)
+        operator = expr.operator
+        if not isinstance(left, np.ndarray) and not isinstance(right, np.ndarray):
+            try:
+                return self.scalar.apply_binary(operator, left, right)
+            except PloxRuntimeError:
+                return self.fail_all()
+        if self.is_mixed(left) or self.is_mixed(right):
+            return self.per_row(
+                lambda a, b: self.scalar.apply_binary(operator, a, b), left, right
+            )
+        return self.apply_columns(operator, left, right)
+
+    def apply_columns(self, operator: TokenLike, left: Column, right: Column) -> Column:
+        """Apply a binary operator to float and bool columns or values."""
+        operator_type = operator.type
+        numbers = self.is_numbers(left) and self.is_numbers(right)
+
+        if operator_type == PTokenType.EQUAL_EQUAL:
+            return self.equal(left, right)
+        if operator_type == PTokenType.BANG_EQUAL:
+            return ~self.equal(left, right)
+        if operator_type == PTokenType.PLUS:
+            if numbers:
+                return np.add(left, right)
+            # a string and a column of numbers or booleans never add up
+            return self.fail_all()
+        if not numbers:
+            return self.fail_all()
+        if operator_type == PTokenType.SLASH:
+            return self.divide(left, right)
+        if operator_type in _ARITHMETIC:
+            return getattr(np, _ARITHMETIC[operator_type])(left, right)
+        if operator_type in _COMPARISONS:
+            return getattr(np, _COMPARISONS[operator_type])(left, right)
+        raise ValueError(
+            "Invalid binary operator type parsed, "
+            "this is an error in Plox implementation",
+            operator,
+        )
+
+    def equal(self, left: Column, right: Column) -> Column:
+        """`is_equal` for float and bool columns: values of other types differ."""
+        if self.is_numbers(left) and self.is_numbers(right):
+            return np.equal(left, right)
+        if self.is_booleans(left) and self.is_booleans(right):
+            return np.equal(left, right)
+        return np.zeros(self.length, dtype=bool)
+
+    def divide(self, left: Column, right: Column) -> Column:
+        """Divide like `Interpreter`: x / 0 is NaN for x == 0 and ±inf otherwise."""
+        left, right = np.broadcast_arrays(
+            np.asarray(left, dtype=np.float64), np.asarray(right, dtype=np.float64)
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            quotient = np.divide(left, right)
+        by_zero = right == 0.0
+        if by_zero.any():
+            # the sign of a zero divisor is ignored, as in Python
+            quotient[by_zero] = np.where(
+                left[by_zero] == 0.0,
+                np.nan,
+                np.where(left[by_zero] > 0.0, np.inf, -np.inf),
+            )
+        return quotient
+
+
+def evaluate_batch(
+    expr: Expr, columns: Mapping[str, Any], length: int | None = None
+) -> "np.ndarray":
+    """
+    Evaluate `expr` once per row of `columns`, a mapping from variable names
+    to arrays of per-row values or to scalars shared by every row.
+    """
+    return BatchEvaluator(columns, length).evaluate(expr)
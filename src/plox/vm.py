@@ -0,0 +1,272 @@
+import math
+from array import array
+from enum import IntEnum
+from typing import Any, Mapping
+
+from plox.errors import PloxRuntimeError
+from plox.expression import (
+    BinaryExpr,
+    Expr,
+    GroupingExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr,
+    Visitor,
+    visits,
+)
+from plox.logger import error, write
+from plox.ptoken import PTokenType, TokenLike
+
+
+class OpCode(IntEnum):
+    CONSTANT = 0
+    NEGATE = 1
+    NOT = 2
+    ADD = 3
+    SUBTRACT = 4
+    MULTIPLY = 5
+    DIVIDE = 6
+    GREATER = 7
+    GREATER_EQUAL = 8
+    LESS = 9
+    LESS_EQUAL = 10
+    EQUAL = 11
+    NOT_EQUAL = 12
+    RETURN = 13
+    GET_GLOBAL = 14
+
+
+class Chunk:
+    """
+    A compiled expression: a flat array of opcodes (each `CONSTANT` and
+    `GET_GLOBAL` followed by an index into the constant pool, holding the
+    value or the variable name), and, for every opcode, the token runtime
+    errors are reported against.
+    """
+
+    def __init__(self) -> None:
+        self.code: array[int] = array("L")
+        # Lox values and variable names
+        self.constants: list[Any] = []
+        self.tokens: list[TokenLike | None] = []
+
+    def emit(self, opcode: OpCode, token: TokenLike | None = None) -> None:
+        self.code.append(opcode)
+        self.tokens.append(token)
+
+    def emit_constant(
+        self,
+        value: object,
+        opcode: OpCode = OpCode.CONSTANT,
+        token: TokenLike | None = None,
+    ) -> None:
+        self.emit(opcode, token)
+        self.code.append(len(self.constants))
+        self.tokens.append(None)
+        self.constants.append(value)
+
+    def disassemble(self) -> str:
+        lines: list[str] = []
+        offset = 0
+        while offset < len(self.code):
+            opcode = OpCode(self.code[offset])
+            if opcode == OpCode.CONSTANT or opcode == OpCode.GET_GLOBAL:
+                value = self.constants[self.code[offset + 1]]
+                lines.append(f"{offset:04} {opcode.name:<16} {value!r}")
+                offset += 2
+            else:
+                lines.append(f"{offset:04} {opcode.name}")
+                offset += 1
+        return "\n".join(lines)
+
+
+_BINARY_OPCODES: dict[PTokenType, OpCode] = {
+    PTokenType.PLUS: OpCode.ADD,
+    PTokenType.MINUS: OpCode.SUBTRACT,
+    PTokenType.STAR: OpCode.MULTIPLY,
+    PTokenType.SLASH: OpCode.DIVIDE,
+    PTokenType.GREATER: OpCode.GREATER,
+    PTokenType.GREATER_EQUAL: OpCode.GREATER_EQUAL,
+    PTokenType.LESS: OpCode.LESS,
+    PTokenType.LESS_EQUAL: OpCode.LESS_EQUAL,
+    PTokenType.EQUAL_EQUAL: OpCode.EQUAL,
+    PTokenType.BANG_EQUAL: OpCode.NOT_EQUAL,
+}
+
+_UNARY_OPCODES: dict[PTokenType, OpCode] = {
+    PTokenType.MINUS: OpCode.NEGATE,
+    PTokenType.BANG: OpCode.NOT,
+}
+
+
+class Compiler(Visitor[None]):
+    """Compiles an expression tree into a `Chunk` for the `VM`."""
+
+    def compile(self, expr: Expr) -> Chunk:
+        self.chunk = Chunk()
+        expr.accept(self)
+        self.chunk.emit(OpCode.RETURN)
+        return self.chunk
+
+    @visits(LiteralExpr)
+    def visit_literal(self, expr: LiteralExpr) -> None:
+        self.chunk.emit_constant(expr.value)
+
+    @visits(VariableExpr)
+    def visit_variable(self, expr: VariableExpr) -> None:
+        self.chunk.emit_constant(expr.name.lexeme, OpCode.GET_GLOBAL, expr.name)
+
+    @visits(GroupingExpr)
+    def visit_grouping(self, expr: GroupingExpr) -> None:
+        expr.expression.accept(self)
+
+    @visits(UnaryExpr)
+    def visit_unary(self, expr: UnaryExpr) -> None:
+        expr.right.accept(self)
+        opcode = _UNARY_OPCODES.get(expr.operator.type)
+        if opcode is None:
+            raise ValueError(
+                "Invalid unary operator type parsed, "
+                "this is an error in Plox implementation",
+                expr.operator,
+            )
+        self.chunk.emit(opcode, expr.operator)
+
+    @visits(BinaryExpr)
+    def visit_binary(self, expr: BinaryExpr) -> None:
+        expr.left.accept(self)
+        expr.right.accept(self)
+        opcode = _BINARY_OPCODES.get(expr.operator.type)
+        if opcode is None:
+            raise ValueError(
+                "Invalid binary operator type parsed, "
+                "this is an error in Plox implementation",
+                expr.operator,
+            )
+        self.chunk.emit(opcode, expr.operator)
+
+
+class VM:
+    """
+    A stack-based virtual machine executing compiled `Chunk`s, with the same
+    semantics and runtime errors as the tree-walking `Interpreter`.
+    """
+
+    def __init__(self, environment: Mapping[str, object] | None = None) -> None:
+        # values of the variables an expression may refer to
+        self.environment: Mapping[str, object] = environment or {}
+
+    def interpret(self, expr: Expr) -> None:
+        try:
+            value = self.run(Compiler().compile(expr))
+            write(self.stringify(value))
+        except PloxRuntimeError as e:
+            error(e.token.line if e.token is not None else None, e.message)
+
+    def stringify(self, value: object) -> str:
+        if value is None:
+            return "nil"
+        return str(value)
+
+    def run(self, chunk: Chunk) -> object:
+        code = chunk.code
+        constants = chunk.constants
+        # Any: the opcodes check the types of their operands themselves
+        stack: list[Any] = []
+        push = stack.append
+        pop = stack.pop
+        ip = 0
+
+        # opcodes are compared as plain ints, ordered by how common they are
+        CONSTANT = int(OpCode.CONSTANT)
+        ADD = int(OpCode.ADD)
+        SUBTRACT = int(OpCode.SUBTRACT)
+        MULTIPLY = int(OpCode.MULTIPLY)
+        DIVIDE = int(OpCode.DIVIDE)
+        NEGATE = int(OpCode.NEGATE)
+        NOT = int(OpCode.NOT)
+        GREATER = int(OpCode.GREATER)
+        GREATER_EQUAL = int(OpCode.GREATER_EQUAL)
+        LESS = int(OpCode.LESS)
+        LESS_EQUAL = int(OpCode.LESS_EQUAL)
+        EQUAL = int(OpCode.EQUAL)
+        NOT_EQUAL = int(OpCode.NOT_EQUAL)
+        RETURN = int(OpCode.RETURN)
+        GET_GLOBAL = int(OpCode.GET_GLOBAL)
+
+        while True:
+            opcode = code[ip]
+            ip += 1
+            if opcode == CONSTANT:
+                push(constants[code[ip]])
+                ip += 1
+                continue
+            if opcode == RETURN:
+                return pop()
+            if opcode == NEGATE:
+                right = stack[-1]
+                if type(right) is not float:
+                    raise self.number_error(chunk, ip)
+                stack[-1] = -right
+                continue
+            if opcode == NOT:
+                right = stack[-1]
+                stack[-1] = right is None or right is False
+                continue
+            if opcode == GET_GLOBAL:
+                name = constants[code[ip]]
+                ip += 1
+                try:
+                    push(self.environment[name])
+                except KeyError:
+                    raise PloxRuntimeError(
+                        f"Undefined variable '{name}'.", chunk.tokens[ip - 2]
+                    ) from None
+                continue
+
+            right = pop()
+            left = stack[-1]
+            if opcode == ADD:
+                if type(left) is type(right) and (
+                    type(left) is float or type(left) is str
+                ):
+                    stack[-1] = left + right
+                else:
+                    raise PloxRuntimeError(
+                        "Illegal combination of operarands", chunk.tokens[ip - 1]
+                    )
+            elif opcode == EQUAL:
+                stack[-1] = type(left) is type(right) and left == right
+            elif opcode == NOT_EQUAL:
+                stack[-1] = not (type(left) is type(right) and left == right)
+            elif type(left) is not float or type(right) is not float:
+                raise self.number_error(chunk, ip)
+            elif opcode == SUBTRACT:
+                stack[-1] = left - right
+            elif opcode == MULTIPLY:
+                stack[-1] = left * right
+            elif opcode == DIVIDE:
+                if right == 0.0:
+                    # emulate Lox division
+                    if left == 0.0:
+                        stack[-1] = math.nan
+                    else:
+                        stack[-1] = math.inf if left > 0 else -math.inf
+                else:
+                    stack[-1] = left / right
+            elif opcode == GREATER:
+                stack[-1] = left > right
+            elif opcode == GREATER_EQUAL:
+                stack[-1] = left >= right
+            elif opcode == LESS:
+                stack[-1] = left < right
+            elif opcode == LESS_EQUAL:
+                stack[-1] = left <= right
+            else:
+                raise ValueError(
+                    f"Invalid opcode {opcode} at offset {ip - 1}, "
+                    "this is an error in Plox implementation"
+                )
+
+    def number_error(self, chunk: Chunk, ip: int) -> PloxRuntimeError:
+        return PloxRuntimeError("Operand must be a number", chunk.tokens[ip - 1])
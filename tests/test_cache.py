@@ -0,0 +1,102 @@
+"""
+Tests of the on-disk cache of parsed programs: an entry is used only while
+it matches the source, the plox version and the optimization level, and a
+run falls back to parsing the source, and stores a fresh entry, otherwise.
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+import plox
+from plox import cache
+from plox.executor import captured_output
+from plox.main import RunOptions, run_file
+from plox.parser import PrattParser
+from plox.scanner import FastScanner
+
+
+def run_script(script: Path, opt_level: int = 0) -> list[str]:
+    """What running `script` with the cache prints, after the file name."""
+    with captured_output() as lines:
+        had_error = run_file(str(script), options=RunOptions(opt_level=opt_level))
+    assert not had_error
+    return [line for line in lines[1:] if not line.startswith("Optimizer")]
+
+
+@pytest.fixture
+def script(tmp_path: Path) -> Path:
+    path = tmp_path / "script.lox"
+    path.write_text("1 + 2\n", encoding="utf-8")
+    return path
+
+
+def test_entry_is_stored_and_used(script: Path) -> None:
+    assert run_script(script) == ["3.0"]
+    entry = cache.cache_path(script)
+    assert cache.load(entry, "1 + 2\n") is not None
+    # an entry that differs from what parsing gives proves it is used
+    cache.store(entry, "1 + 2\n", PrattParser(FastScanner("7").tokens).expression())
+    assert run_script(script) == ["7.0"]
+
+
+def test_entry_mode_follows_the_umask(script: Path) -> None:
+    umask = os.umask(0o022)
+    try:
+        run_script(script)
+    finally:
+        os.umask(umask)
+    assert cache.cache_path(script).stat().st_mode & 0o777 == 0o644
+
+
+def test_changed_source_makes_the_entry_stale(script: Path) -> None:
+    run_script(script)
+    entry = cache.cache_path(script)
+    stat = script.stat()
+    script.write_text("2 * 3\n", encoding="utf-8")
+    # even with the modification time of the cached source
+    os.utime(script, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert cache.load(entry, "2 * 3\n") is None
+    assert run_script(script) == ["6.0"]
+    assert cache.load(entry, "2 * 3\n") is not None
+
+
+def test_other_version_makes_the_entry_stale(
+    script: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    run_script(script)
+    entry = cache.cache_path(script)
+    monkeypatch.setattr(plox, "__version__", plox.__version__ + ".post1")
+    assert cache.load(entry, "1 + 2\n") is None
+    assert run_script(script) == ["3.0"]
+    assert cache.load(entry, "1 + 2\n") is not None
+
+
+def test_entries_are_per_opt_level(script: Path) -> None:
+    run_script(script, opt_level=1)
+    entry = cache.cache_path(script, 1)
+    assert entry != cache.cache_path(script)
+    assert cache.load(entry, "1 + 2\n", opt_level=1) is not None
+    # an entry read at another level than it was stored at is stale
+    assert cache.load(entry, "1 + 2\n", opt_level=2) is None
+    assert run_script(script) == ["3.0"]
+    assert cache.load(cache.cache_path(script), "1 + 2\n") is not None
+
+
+@pytest.mark.parametrize(
+    "damage",
+    [
+        lambda data: data[: len(data) // 2],
+        lambda data: b"",
+        lambda data: b"not marshal data" + data,
+        lambda data: data[:-1] + bytes([data[-1] ^ 0xFF]),
+    ],
+    ids=["truncated", "empty", "garbage", "flipped"],
+)
+def test_corrupt_entry_falls_back_to_parsing(script: Path, damage) -> None:
+    run_script(script)
+    entry = cache.cache_path(script)
+    entry.write_bytes(damage(entry.read_bytes()))
+    assert run_script(script) == ["3.0"]
+    assert cache.load(entry, "1 + 2\n") is not None
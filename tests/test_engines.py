@@ -0,0 +1,68 @@
+"""
+Differential tests of the execution engines: on a randomized corpus of
+expressions, every engine at every optimization level must print what the
+tree-walking interpreter prints without optimization, values and runtime
+error messages alike.
+"""
+
+import random
+
+import pytest
+
+from plox.executor import captured_output
+from plox.main import ENGINES, RunOptions, run
+
+# The corpus is SEEDS * EXPRESSIONS expressions.
+SEEDS = 5
+EXPRESSIONS = 2000
+
+LEAVES = ["0", "1", "2.5", "3", '"a"', '"b"', '""', "true", "false", "nil"]
+OPERATORS = ["+", "-", "*", "/", "==", "!=", "<", "<=", ">", ">=", "+", "/"]
+
+
+def random_expression(rng: random.Random, depth: int) -> str:
+    """
+    An expression of any type mix, so that many raise runtime errors, with
+    operators spread over lines so that error lines are checked too.
+    """
+    if depth <= 0 or rng.random() < 0.3:
+        return rng.choice(LEAVES)
+    choice = rng.random()
+    if choice < 0.15:
+        return rng.choice(["-", "!", "- "]) + random_expression(rng, depth - 1)
+    if choice < 0.3:
+        return f"({random_expression(rng, depth - 1)})"
+    return (
+        random_expression(rng, depth - 1)
+        + rng.choice([" ", " ", "\n"])
+        + rng.choice(OPERATORS)
+        + " "
+        + random_expression(rng, depth - 1)
+    )
+
+
+def output(source: str, options: RunOptions) -> tuple[list[str], bool]:
+    with captured_output() as lines:
+        had_error = run(source, options)
+    # only the optimized runs report what the optimizer removed
+    lines = [line for line in lines if not line.startswith("Optimizer removed ")]
+    return lines, had_error
+
+
+@pytest.mark.parametrize("seed", range(SEEDS))
+def test_engines_agree(seed: int) -> None:
+    rng = random.Random(seed)
+    configurations = [
+        RunOptions(engine=engine, opt_level=opt_level, cache=False)
+        for engine in ENGINES
+        for opt_level in (0, 1, 2)
+    ]
+    for _ in range(EXPRESSIONS):
+        source = random_expression(rng, 6)
+        expected = output(source, RunOptions(cache=False))
+        for options in configurations:
+            assert output(source, options) == expected, (
+                options.engine,
+                options.opt_level,
+                source,
+            )
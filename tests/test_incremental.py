@@ -0,0 +1,108 @@
+"""
+Randomized tests of incremental lexing and parsing: after every edit, a
+`Document` must hold the tokens and the tree of scanning and parsing its
+whole source again.
+"""
+
+import random
+
+import pytest
+
+from plox.executor import captured_output
+from plox.expression import (
+    BinaryExpr,
+    Expr,
+    GroupingExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr,
+)
+from plox.incremental import Document
+from plox.parser import Parser
+from plox.scanner import FastScanner
+
+SOURCES = 60
+EDITS = 80
+
+LEAVES = ["0", "1", "25", "2.5", '"a"', '"b c"', "true", "nil", "x", "y"]
+OPERATORS = ["+", "-", "*", "/", "==", "!=", "<", ">="]
+
+# Pieces inserted by edits: digits and operators, and what changes the
+# tokens around an edit (a space, a newline, quotes, comments, `1.`, `.5`).
+PIECES = list('0123456789+-*/()! \n".ab') + ["//", "==", "1.", ".5"]
+
+
+def random_expression(rng: random.Random, depth: int) -> str:
+    if depth <= 0 or rng.random() < 0.2:
+        return rng.choice(LEAVES)
+    choice = rng.random()
+    if choice < 0.1:
+        return rng.choice(["-", "!"]) + random_expression(rng, depth - 1)
+    if choice < 0.4:
+        return f"({random_expression(rng, depth - 1)})"
+    return (
+        random_expression(rng, depth - 1)
+        + rng.choice([" ", " ", "\n"])
+        + rng.choice(OPERATORS)
+        + " "
+        + random_expression(rng, depth - 1)
+    )
+
+
+def shape(expr: Expr | None) -> object:
+    """The structure of a tree, with the lines of its tokens."""
+    match expr:
+        case None:
+            return None
+        case BinaryExpr():
+            operator = expr.operator
+            return (
+                shape(expr.left),
+                operator.lexeme,
+                operator.line,
+                shape(expr.right),
+            )
+        case UnaryExpr():
+            return (expr.operator.lexeme, expr.operator.line, shape(expr.right))
+        case GroupingExpr():
+            return ("group", shape(expr.expression))
+        case VariableExpr():
+            return (expr.name.lexeme, expr.name.line)
+        case LiteralExpr():
+            return (type(expr.value), expr.value)
+    raise TypeError(f"Unexpected {type(expr).__name__} node")
+
+
+def check(document: Document, tree: Expr | None) -> None:
+    source = document.source
+    with captured_output():
+        tokens = FastScanner(source).tokens
+        expected = Parser(tokens).parse()
+    assert [
+        (token.type, token.lexeme, token.literal, token.line)
+        for token in document.tokens
+    ] == [(token.type, token.lexeme, token.literal, token.line) for token in tokens]
+    scanner = document.scanner
+    for index, token in enumerate(document.tokens[:-1]):
+        assert source[scanner.start_of(index) : scanner.end_of(index)] == (token.lexeme)
+    end = len(document.tokens) - 1
+    assert scanner.start_of(end) == scanner.end_of(end) == len(source)
+    assert shape(tree) == shape(expected)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_edits_match_full_reparse(seed: int) -> None:
+    rng = random.Random(seed)
+    for _ in range(SOURCES):
+        with captured_output():
+            document = Document(random_expression(rng, rng.randint(1, 7)))
+        for _ in range(EDITS):
+            size = len(document.source)
+            offset = rng.randint(0, size)
+            deleted = rng.randint(0, min(3, size - offset))
+            inserted = "".join(
+                rng.choice(PIECES) for _ in range(rng.choice([0, 1, 1, 2, 4]))
+            )
+            with captured_output():
+                tree = document.edit(offset, deleted, inserted)
+            check(document, tree)
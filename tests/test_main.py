@@ -0,0 +1,101 @@
+"""
+Tests of the `plox` command line, run in-process through `plox.main.main`.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+from plox import main as plox_main
+from plox.executor import captured_output
+from plox.scanner import FastScanner
+
+
+def run_cli(monkeypatch: pytest.MonkeyPatch, *args: str) -> tuple[list[str], int]:
+    """The lines `plox args` prints through the logger, and its exit status."""
+    monkeypatch.setattr(sys, "argv", ["plox", *args])
+    status = 0
+    with captured_output() as lines:
+        try:
+            plox_main.main()
+        except SystemExit as e:
+            status = e.code if isinstance(e.code, int) else 1
+    return lines, status
+
+
+@pytest.fixture
+def scanned(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    """The sources the command line scans with `FastScanner`."""
+    sources: list[str] = []
+
+    def scanner(source: str) -> FastScanner:
+        sources.append(source)
+        return FastScanner(source)
+
+    monkeypatch.setattr(plox_main, "FastScanner", scanner)
+    return sources
+
+
+@pytest.mark.parametrize("cache", [[], ["--no-cache"]])
+def test_script_is_scanned_with_fast_scanner(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    scanned: list[str],
+    cache: list[str],
+) -> None:
+    script = tmp_path / "script.lox"
+    script.write_text("1 + 2 * 3\n", encoding="utf-8")
+    lines, status = run_cli(monkeypatch, *cache, str(script))
+    assert lines == [f"Running file: {script}", "7.0"]
+    assert status == 0
+    assert scanned == ["1 + 2 * 3\n"]
+
+
+def test_scan_errors_are_reported_and_not_cached(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, scanned: list[str]
+) -> None:
+    script = tmp_path / "script.lox"
+    script.write_text('1 + 2 "open\n', encoding="utf-8")
+    for _ in range(2):
+        lines, _ = run_cli(monkeypatch, str(script))
+        assert lines == [
+            f"Running file: {script}",
+            "[line 2] Error: Unterminated string",
+            "3.0",
+        ]
+    # the erroneous script was scanned again rather than loaded from the cache
+    assert len(scanned) == 2
+    assert not (tmp_path / "__ploxcache__").exists()
+
+
+def test_profile_shows_the_phases_the_cache_saved(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    script = tmp_path / "script.lox"
+    script.write_text("1 + 2\n", encoding="utf-8")
+    phases = []
+    for _ in range(2):
+        run_cli(monkeypatch, "--profile", "--profile-format", "json", str(script))
+        phases.append(json.loads(capsys.readouterr().err)["phases"])
+    miss, hit = phases
+    assert [name for name, stats in miss.items() if stats["calls"]] == [
+        "load",
+        "scan",
+        "parse",
+        "optimize",
+        "store",
+        "interpret",
+    ]
+    assert not any(stats["cached"] for stats in miss.values())
+    assert {name: stats["cached"] for name, stats in hit.items()} == {
+        "load": 0,
+        "scan": 1,
+        "parse": 1,
+        "optimize": 1,
+        "interpret": 0,
+    }
+    assert hit["scan"]["calls"] == hit["parse"]["calls"] == 0
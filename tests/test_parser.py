@@ -0,0 +1,84 @@
+"""
+Differential tests of `PrattParser`, the parser of the command line and of
+`Session`: on random token sequences it must build the trees of `Parser`
+and report the same syntax errors, and it must parse any nesting depth.
+"""
+
+import random
+
+import pytest
+
+from plox.executor import captured_output
+from plox.expression import Expr, GroupingExpr, UnaryExpr
+from plox.parser import Parser, PrattParser
+from plox.ptoken import TokenSequence
+from plox.scanner import FastScanner
+
+# Tokens random sources are made of, valid and not, so that about half of
+# the sources are syntax errors somewhere.
+PIECES = [
+    "1",
+    "2.5",
+    '"s"',
+    "true",
+    "false",
+    "nil",
+    "x",
+    "(",
+    ")",
+    "(",
+    ")",
+    "-",
+    "!",
+    "+",
+    "*",
+    "/",
+    "==",
+    "!=",
+    "<",
+    "<=",
+    ">",
+    ">=",
+    "=",
+    ";",
+    "and",
+    "\n",
+]
+
+SOURCES = 5000
+
+
+def parse(parser: type[Parser], tokens: TokenSequence) -> tuple[Expr | None, list[str]]:
+    """The tree `parser` builds from `tokens`, and the errors it reports."""
+    with captured_output() as errors:
+        tree = parser(tokens).parse()
+    return tree, errors
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_pratt_parser_agrees_with_parser(seed: int) -> None:
+    rng = random.Random(seed)
+    for _ in range(SOURCES):
+        source = " ".join(rng.choice(PIECES) for _ in range(rng.randint(1, 30)))
+        tokens = FastScanner(source).tokens
+        # the tokens are shared, so the trees compare equal only when they
+        # are made of the same tokens
+        assert parse(PrattParser, tokens) == parse(Parser, tokens), source
+
+
+def test_moderate_nesting_agrees_with_parser() -> None:
+    source = "-(!(" * 40 + "1" + " + 2))" * 40
+    tokens = FastScanner(source).tokens
+    assert parse(PrattParser, tokens) == parse(Parser, tokens)
+
+
+def test_deep_nesting() -> None:
+    depth = 100_000
+    tokens = FastScanner("(-" * depth + "1" + ")" * depth).tokens
+    tree, errors = parse(PrattParser, tokens)
+    assert errors == []
+    for _ in range(depth):
+        assert isinstance(tree, GroupingExpr)
+        assert isinstance(tree.expression, UnaryExpr)
+        tree = tree.expression.right
+    assert tree is not None and getattr(tree, "value", None) == 1.0
@@ -0,0 +1,102 @@
+"""
+Differential tests of the scanners: every scanner must produce the tokens and
+the diagnostics of the reference `Scanner`, on random sources.
+"""
+
+import random
+from typing import Callable, Iterable
+
+import pytest
+
+from plox.executor import captured_output
+from plox.ptoken import TokenLike
+from plox.scanner import (
+    BytesScanner,
+    CompactScanner,
+    FastScanner,
+    ParallelScanner,
+    Scanner,
+    StreamingScanner,
+)
+
+# Pieces random sources are made of: every kind of token, and the tricky
+# spots of the grammar (comments, strings spanning lines, `1.` at the end,
+# unterminated strings, characters Lox does not know).
+PIECES = list('abcXYZ_019 .\t\n"/=!<>+-*(){},;#é\0') + [
+    "//",
+    "and",
+    "or",
+    "nil",
+    "1.5",
+    '"str\n"',
+    "==",
+    "abc",
+    '"abc"',
+]
+
+SOURCES = 2000
+
+Token = tuple[object, str, object, int]
+
+
+def random_sources(seed: int, pieces: list[str] = PIECES) -> Iterable[str]:
+    rng = random.Random(seed)
+    for _ in range(SOURCES):
+        yield "".join(rng.choice(pieces) for _ in range(rng.randint(0, 40)))
+
+
+def scan(
+    make_tokens: Callable[[], Iterable[TokenLike]],
+) -> tuple[list[Token], list[str]]:
+    """The tokens made by `make_tokens`, and the diagnostics it printed."""
+    with captured_output() as diagnostics:
+        tokens = [
+            (token.type, token.lexeme, token.literal, token.line)
+            for token in make_tokens()
+        ]
+    return tokens, diagnostics
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_fast_scanner(seed: int) -> None:
+    for source in random_sources(seed):
+        expected = scan(lambda: Scanner(source).tokens)
+        assert scan(lambda: FastScanner(source).tokens) == expected, source
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_compact_scanner(seed: int) -> None:
+    for source in random_sources(seed):
+        expected = scan(lambda: Scanner(source).tokens)
+        assert scan(lambda: CompactScanner(source).tokens) == expected, source
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_streaming_scanner_one_character_chunks(seed: int) -> None:
+    for source in random_sources(seed):
+        expected = scan(lambda: Scanner(source).tokens)
+        assert scan(lambda: StreamingScanner(list(source))) == expected, source
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_bytes_scanner(seed: int) -> None:
+    # raw bytes with any newline convention, against the text a script
+    # opened in text mode reads
+    pieces = PIECES + ["\r\n", "\r", '"s\r\nt\rr\n"', "日本"]
+    for source in random_sources(seed, pieces):
+        text = source.replace("\r\n", "\n").replace("\r", "\n")
+        expected = scan(lambda: Scanner(text).tokens)
+        raw = source.encode("utf-8")
+        assert scan(lambda: BytesScanner(raw).tokens) == expected, source
+
+
+def test_parallel_scanner() -> None:
+    # joined sources, so each worker gets many lines to lex and some
+    # chunks hold unterminated strings and characters Lox does not know
+    rng = random.Random(0)
+    sources = list(random_sources(0))
+    for _ in range(20):
+        source = "\n".join(rng.sample(sources, 50))
+        expected = scan(lambda: Scanner(source).tokens)
+        parallel = scan(lambda: ParallelScanner(source, workers=4, threshold=0).tokens)
+        assert parallel == expected, source
@@ -0,0 +1,132 @@
+"""
+Tests of `plox --serve`, run as a subprocess on stdin and stdout or on a
+Unix socket.
+"""
+
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+import plox
+
+# What the `plox` console script runs, serving on one thread.
+PLOX = [sys.executable, "-c", "from plox.main import main; main()"]
+SERVE = [*PLOX, "--serve", "--executor", "threads", "--jobs", "1"]
+
+# The environment of the server: plox importable from where it is tested.
+ENV = {**os.environ, "PYTHONPATH": str(Path(plox.__file__).parents[1])}
+
+
+def serve(*args: str, stdin: bytes = b"") -> subprocess.CompletedProcess[bytes]:
+    return subprocess.run(
+        [*SERVE, *args], input=stdin, capture_output=True, env=ENV, timeout=60
+    )
+
+
+def requests(*lines: object) -> bytes:
+    return b"".join(json.dumps(line).encode() + b"\n" for line in lines)
+
+
+def responses(output: bytes) -> dict[object, dict[str, object]]:
+    """The responses in `output`, by request id."""
+    return {
+        response["id"]: response for response in map(json.loads, output.splitlines())
+    }
+
+
+def test_stdio() -> None:
+    result = serve(
+        stdin=requests(
+            {"id": 1, "source": "1 + 2"},
+            {"id": 2, "source": '-"a"'},
+            {"id": 3, "source": 1},
+        )
+        + b"not json\n"
+    )
+    assert result.returncode == 0
+    by_id = responses(result.stdout)
+    assert by_id[1] == {"id": 1, "value": 3.0}
+    assert by_id[2]["error"]["type"] == "PloxRuntimeError"
+    assert by_id[3]["error"]["type"] == "InvalidRequest"
+    assert by_id[None]["error"]["type"] == "InvalidRequest"
+
+
+@pytest.fixture
+def short_tmp_path() -> Iterator[Path]:
+    """A directory whose paths fit in a socket address, unlike `tmp_path`'s."""
+    with tempfile.TemporaryDirectory(dir="/tmp") as directory:
+        yield Path(directory)
+
+
+def connect(path: Path, server: subprocess.Popen[bytes]) -> socket.socket:
+    """A connection to the socket of a starting `server`."""
+    deadline = time.monotonic() + 30
+    while True:
+        assert server.poll() is None, server.stderr.read()
+        client = socket.socket(socket.AF_UNIX)
+        try:
+            client.connect(str(path))
+            return client
+        except OSError:
+            client.close()
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def test_socket(short_tmp_path: Path) -> None:
+    path = short_tmp_path / "plox.sock"
+    server = subprocess.Popen(
+        [*SERVE, "--socket", str(path)], stderr=subprocess.PIPE, env=ENV
+    )
+    try:
+        with connect(path, server) as client, client.makefile("rwb") as file:
+            file.write(requests({"id": 1, "source": "2 * 3"}, {"id": 2, "stats": True}))
+            file.flush()
+            by_id = responses(file.readline() + file.readline())
+        assert by_id[1] == {"id": 1, "value": 6.0}
+        assert by_id[2]["stats"]["requests"] == 1
+    finally:
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=30) == 0
+    assert not path.exists()
+
+
+def test_socket_replaces_stale_socket(short_tmp_path: Path) -> None:
+    path = short_tmp_path / "plox.sock"
+    with socket.socket(socket.AF_UNIX) as stale:
+        stale.bind(str(path))
+    server = subprocess.Popen(
+        [*SERVE, "--socket", str(path)], stderr=subprocess.PIPE, env=ENV
+    )
+    try:
+        connect(path, server).close()
+    finally:
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=30) == 0
+    assert not path.exists()
+
+
+def test_socket_keeps_other_files(tmp_path: Path) -> None:
+    path = tmp_path / "keep.txt"
+    path.write_text("keep me\n", encoding="utf-8")
+    result = serve("--socket", str(path))
+    assert result.returncode != 0
+    assert result.stderr.decode() == f"Error: {path} exists and is not a socket\n"
+    assert path.read_text(encoding="utf-8") == "keep me\n"
+
+
+def test_socket_bind_failure(tmp_path: Path) -> None:
+    result = serve("--socket", str(tmp_path / "missing" / "plox.sock"))
+    assert result.returncode != 0
+    assert result.stderr.startswith(b"Error: ")
+    assert b"Traceback" not in result.stderr
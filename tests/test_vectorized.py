@@ -0,0 +1,63 @@
+"""
+Tests of batch evaluation: its results and errors must be those of running
+`Interpreter` on each row in turn.
+"""
+
+import pytest
+
+from plox.errors import PloxRuntimeError
+from plox.expression import Expr
+from plox.interpreter import Interpreter
+from plox.parser import Parser
+from plox.scanner import FastScanner
+
+np = pytest.importorskip("numpy")
+
+from plox.vectorized import evaluate_batch, to_lox  # noqa: E402
+
+COLUMNS = [
+    [1.0, 2.0, 3.0],
+    [1, 2, 3],
+    [True, False],
+    ["a", "b"],
+    [1.0, "a"],
+    [1.0, True],
+    [1, True],
+    [True, None],
+    ["a", None],
+]
+
+SOURCES = ["x + 1", "x + x", "-x", "!x", "x == 1", "x == true", "x + x == x"]
+
+
+def parse(source: str) -> Expr:
+    return Parser(FastScanner(source).tokens).parse()
+
+
+def row_by_row(expr: Expr, column: list[object]) -> list[object]:
+    """The value of `expr` for each `x` of `column`, up to the first error."""
+    return [Interpreter({"x": to_lox(x)}).evaluate(expr) for x in column]
+
+
+@pytest.mark.parametrize("column", COLUMNS)
+@pytest.mark.parametrize("source", SOURCES)
+def test_batch_agrees_with_rows(source: str, column: list[object]) -> None:
+    expr = parse(source)
+    try:
+        expected = row_by_row(expr, column)
+    except PloxRuntimeError as e:
+        with pytest.raises(PloxRuntimeError) as raised:
+            evaluate_batch(expr, {"x": column})
+        assert raised.value.message == e.message
+    else:
+        assert list(evaluate_batch(expr, {"x": column})) == expected
+
+
+def test_mixed_list_is_not_coerced() -> None:
+    # np.asarray would turn True into 1.0 and let `x + 1` succeed
+    with pytest.raises(PloxRuntimeError):
+        evaluate_batch(parse("x + 1"), {"x": [1.0, True]})
+    assert list(evaluate_batch(parse("x == 1"), {"x": [1.0, "1"]})) == [
+        True,
+        False,
+    ]